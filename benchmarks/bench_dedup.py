@@ -0,0 +1,184 @@
+"""
+Duplicate TransactionID detection benchmark
+
+Streams synthetic TransactionIDs (sequential, with a share replayed from
+earlier in the stream) through each duplicate filter and reports IDs/sec
+and the memory held per distinct ID:
+- set of str: a plain Python set of the ID strings
+- set of int: the same integer keys as the index, in a Python set
+- TransactionIDIndex, without and with a Bloom filter in front
+Every variant must find exactly the replayed IDs. The index is then
+saved, loaded again memory-mapped and fed a batch of new and replayed
+IDs, as the next incremental run would be.
+
+The Python set variants are skipped above --set-limit IDs (at 100M IDs
+they need far more memory than the index).
+
+Run from the repository root:
+    python -m benchmarks.bench_dedup --ids 10000000
+    python -m benchmarks.bench_dedup --ids 100000000 --data-dir /scratch
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+
+from utils.id_index import TransactionIDIndex, encode_transaction_id
+
+
+BATCH = 1 << 20
+
+
+def id_batches(count, duplicate_rate, start=0, seed=42):
+    """
+    Each ID is a replay of an earlier one with probability duplicate_rate,
+    else the next new ID (numbered from start)
+
+    Yields: (list of up to BATCH IDs, replays so far)
+    """
+
+    rng = random.Random(seed)
+    issued = start
+    produced = 0
+
+    while produced < count:
+        batch = []
+        for _ in range(min(BATCH, count - produced)):
+            if issued and rng.random() < duplicate_rate:
+                batch.append(f"T{rng.randrange(issued):09d}")
+            else:
+                batch.append(f"T{issued:09d}")
+                issued += 1
+        produced += len(batch)
+        yield batch, produced - (issued - start)
+
+
+def set_of_strings():
+    seen = set()
+    mark = seen.add
+
+    def is_new(tid):
+        return not (tid in seen or mark(tid))
+
+    def memory():
+        return sys.getsizeof(seen) + sum(map(sys.getsizeof, seen))
+
+    return is_new, memory
+
+
+def set_of_ints():
+    seen = set()
+    mark = seen.add
+
+    def is_new(tid):
+        key = encode_transaction_id(tid)
+        return not (key in seen or mark(key))
+
+    def memory():
+        return sys.getsizeof(seen) + sum(map(sys.getsizeof, seen))
+
+    return is_new, memory
+
+
+def run(is_new, batches):
+    """
+    Returns: (seconds spent in is_new, duplicates found, replays in the stream)
+    """
+
+    seconds = 0.0
+    duplicates = 0
+    replays = 0
+
+    for batch, replays in batches:
+        start = time.perf_counter()
+        for tid in batch:
+            if not is_new(tid):
+                duplicates += 1
+        seconds += time.perf_counter() - start
+
+    return seconds, duplicates, replays
+
+
+def report(name, ids, seconds, duplicates, replays, memory, distinct):
+    status = '' if duplicates == replays else f"  ✗ found {duplicates:,} of {replays:,} duplicates"
+    print(f"{name:<36}{seconds:>10.1f}{ids / seconds:>14,.0f}{memory / 2**20:>12,.1f}"
+          f"{memory / max(distinct, 1):>10.1f}{status}")
+    return not status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--ids', type=int, default=2000000)
+    parser.add_argument('--duplicate-rate', type=float, default=0.01)
+    parser.add_argument('--bloom-error', type=float, default=0.01)
+    parser.add_argument('--set-limit', type=int, default=20000000,
+                        help="skip the Python set variants above this many IDs")
+    parser.add_argument('--replay', type=int, help="IDs in the incremental run (default ids / 10)")
+    parser.add_argument('--data-dir', help="where the saved index files are written")
+    args = parser.parse_args()
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix='sales_bench_')
+    replay = args.replay or max(args.ids // 10, 1)
+
+    print(f"{args.ids:,} IDs, {args.duplicate_rate:.1%} replayed\n")
+    print(f"{'Variant':<36}{'Seconds':>10}{'IDs/sec':>14}{'MB':>12}{'B/ID':>10}")
+
+    variants = []
+    if args.ids <= args.set_limit:
+        variants += [('set of str', set_of_strings), ('set of int', set_of_ints)]
+    variants += [
+        ('TransactionIDIndex', lambda: _index_variant(TransactionIDIndex())),
+        ('TransactionIDIndex + Bloom', lambda: _index_variant(TransactionIDIndex(bloom_error=args.bloom_error))),
+    ]
+
+    ok = True
+    index_files = {}
+    for name, make in variants:
+        gc.collect()
+        is_new, memory = make()
+        seconds, duplicates, replays = run(is_new, id_batches(args.ids, args.duplicate_rate))
+        distinct = args.ids - replays
+        ok &= report(name, args.ids, seconds, duplicates, replays, memory(), distinct)
+
+        index = getattr(is_new, '__self__', None)
+        if isinstance(index, TransactionIDIndex):
+            filename = os.path.join(data_dir, f"ids_{len(index_files)}.ids")
+            start = time.perf_counter()
+            index.save(filename)
+            index_files[name] = (filename, time.perf_counter() - start, distinct)
+
+        is_new = memory = index = None
+
+    # Next incremental run: saved keys stay in the mapped file
+    print(f"\nIncremental run: {replay:,} more IDs against the saved index")
+    print(f"{'Variant':<36}{'Save s':>10}{'Load s':>10}{'File MB':>10}{'IDs/sec':>14}")
+
+    for name, (filename, save_seconds, distinct) in index_files.items():
+        gc.collect()
+        start = time.perf_counter()
+        index = TransactionIDIndex.load(filename, mapped=True)
+        load_seconds = time.perf_counter() - start
+
+        batches = id_batches(replay, args.duplicate_rate, start=distinct, seed=7)
+        seconds, duplicates, replays = run(index.add, batches)
+        index.close()
+
+        status = '' if duplicates == replays else f"  ✗ found {duplicates:,} of {replays:,} duplicates"
+        ok &= not status
+        print(f"{name + ' (mapped)':<36}{save_seconds:>10.2f}{load_seconds:>10.3f}"
+              f"{os.path.getsize(filename) / 2**20:>10,.1f}{replay / seconds:>14,.0f}{status}")
+        index = None
+
+    return 0 if ok else 1
+
+
+def _index_variant(index):
+    return index.add, index.memory_bytes
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Enrichment join benchmark
+
+Compares the original per-row enrichment loop (numeric ID parsing,
+try/except and tx.copy() for every transaction) with the
+EnrichedTransactions hash join on a synthetic dataset.
+
+Run from the repository root:
+    python -m benchmarks.bench_enrichment --rows 10000000
+"""
+
+import argparse
+import random
+import time
+
+from utils.api_handler import EnrichedTransactions
+
+
+def legacy_enrich(transactions, product_mapping):
+    """
+    The enrich_sales_data loop as it was before the hash join (without
+    the file write)
+    """
+
+    enriched_transactions = []
+
+    for tx in transactions:
+        enriched = tx.copy()
+
+        api_category = None
+        api_brand = None
+        api_rating = None
+        api_match = False
+
+        try:
+            product_id_str = tx.get('ProductID', '')
+            numeric_id = int(''.join(filter(str.isdigit, product_id_str)))
+
+            if numeric_id in product_mapping:
+                product = product_mapping[numeric_id]
+                api_category = product.get('category')
+                api_brand = product.get('brand')
+                api_rating = product.get('rating')
+                api_match = True
+
+        except Exception:
+            api_match = False
+
+        enriched['API_Category'] = api_category
+        enriched['API_Brand'] = api_brand
+        enriched['API_Rating'] = api_rating
+        enriched['API_Match'] = api_match
+
+        enriched_transactions.append(enriched)
+
+    return enriched_transactions
+
+
+def synthetic_transactions(rows, products=20, seed=42):
+    rng = random.Random(seed)
+    product_ids = [f"P{100 + i}" for i in range(products)] + ['PX']
+
+    return [
+        {
+            'TransactionID': f"T{i:08d}",
+            'Date': f"2024-12-{rng.randint(1, 30):02d}",
+            'ProductID': rng.choice(product_ids),
+            'ProductName': 'Item',
+            'Quantity': rng.randint(1, 10),
+            'UnitPrice': float(rng.randint(100, 5000)),
+            'CustomerID': f"C{rng.randint(1, 500):03d}",
+            'Region': rng.choice(('North', 'South', 'East', 'West'))
+        }
+        for i in range(rows)
+    ]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--products', type=int, default=20)
+    args = parser.parse_args()
+
+    transactions = synthetic_transactions(args.rows, args.products)
+    mapping = {
+        pid: {'title': f"Item {pid}", 'category': 'cat', 'brand': 'brand', 'rating': 4.2}
+        for pid in range(100, 100 + args.products, 2)
+    }
+
+    legacy, legacy_time = timed(legacy_enrich, transactions, mapping)
+    legacy_matches = sum(1 for tx in legacy if tx['API_Match'])
+    del legacy
+
+    view, join_time = timed(EnrichedTransactions, transactions, mapping)
+    join_matches, count_time = timed(view.match_count)
+
+    assert join_matches == legacy_matches
+
+    print(f"rows:                 {args.rows:,}")
+    print(f"legacy loop:          {legacy_time:8.3f}s")
+    print(f"hash join:            {join_time:8.3f}s")
+    print(f"match count (view):   {count_time:8.3f}s")
+    print(f"speedup (join+count): {legacy_time / (join_time + count_time):8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Parser throughput benchmark
+
+Generates (or reuses) a synthetic sales file and reports rows/sec for
+the line-by-line parser and the bulk regex parser, parsing already read
+lines and reading + parsing the whole file, into dictionaries or a
+TransactionTable. Every variant's output is checked against
+parse_transactions(read_sales_data(...)) before it is timed.
+
+Run from the repository root:
+    python -m benchmarks.bench_parser --rows 1000000
+    python -m benchmarks.bench_parser --rows 1000000 --repeat 5 --data-dir /scratch
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.data_generator import generate_sales_file
+from utils.fast_parser import parse_sales_file_fast, parse_transactions_fast
+from utils.file_handler import parse_transactions, read_sales_data
+
+
+def variants(filename, lines):
+    """
+    Returns: [(name, reference variant name, callable)] for every parser
+    variant; speedups are relative to the reference
+    """
+
+    line_by_line = 'parse_transactions'
+    line_by_line_columnar = 'parse_transactions columnar'
+    read_and_parse = 'read + parse_transactions'
+    read_and_parse_columnar = 'read + parse_transactions columnar'
+
+    return [
+        (line_by_line, line_by_line, lambda: parse_transactions(lines)),
+        ('parse_transactions_fast', line_by_line, lambda: parse_transactions_fast(lines)),
+        (line_by_line_columnar, line_by_line_columnar, lambda: parse_transactions(lines, columnar=True)),
+        ('parse_transactions_fast columnar', line_by_line_columnar,
+         lambda: parse_transactions_fast(lines, columnar=True)),
+        (read_and_parse, read_and_parse, lambda: parse_transactions(read_sales_data(filename))),
+        ('parse_sales_file_fast', read_and_parse, lambda: parse_sales_file_fast(filename)),
+        (read_and_parse_columnar, read_and_parse_columnar,
+         lambda: parse_transactions(read_sales_data(filename), columnar=True)),
+        ('parse_sales_file_fast columnar', read_and_parse_columnar,
+         lambda: parse_sales_file_fast(filename, columnar=True)),
+    ]
+
+
+def timed(func, repeat):
+    """
+    Returns: (median seconds, last result)
+    """
+
+    times = []
+    result = None
+    for _ in range(repeat):
+        # Earlier results would otherwise be scanned by every GC pass
+        result = None
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--noise', type=float, default=0.05)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--data-dir', help="where generated inputs are kept between runs")
+    args = parser.parse_args()
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix='sales_bench_')
+    filename = os.path.join(data_dir, f"sales_{args.rows}_{args.seed}_{args.noise}.txt")
+    if not os.path.exists(filename):
+        generate_sales_file(filename, args.rows, args.seed, args.noise)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        lines = read_sales_data(filename)
+        expected = repr(parse_transactions(lines))
+
+    print(f"{len(lines):,} data lines, {os.path.getsize(filename) / 2**20:.1f} MB\n")
+    print(f"{'Variant':<36}{'Seconds':>10}{'Rows/sec':>14}{'Speedup':>10}")
+
+    baseline = {}
+    failed = False
+    for name, reference, func in variants(filename, lines):
+        with contextlib.redirect_stdout(io.StringIO()):
+            seconds, result = timed(func, args.repeat)
+
+        rows = result.to_dicts() if hasattr(result, 'to_dicts') else result
+        if repr(rows) != expected:
+            print(f"{name:<36}  ✗ result differs from parse_transactions")
+            failed = True
+            continue
+
+        baseline.setdefault(name, seconds)
+        speedup = baseline[reference] / seconds if reference in baseline else float('nan')
+
+        print(f"{name:<36}{seconds:>10.3f}{len(rows) / seconds:>14,.0f}{speedup:>9.2f}x")
+        result = rows = None
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Per-stage pipeline benchmark
+
+Generates (or reuses) a synthetic sales file for each requested size,
+runs every pipeline stage main() uses against it, with the product API
+replaced by the local stub server, and records wall time, CPU time, rows
+in / out and memory for each stage. Results are written as JSON; pass
+an earlier results file with --compare to flag stages that got slower.
+
+Run from the repository root:
+    python -m benchmarks.bench_pipeline --rows 1000 100000 1000000
+    python -m benchmarks.bench_pipeline --rows 100000000 --columnar --data-dir /scratch
+    python -m benchmarks.bench_pipeline --rows 100000 --compare output/bench_pipeline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.data_generator import generate_sales_file
+from benchmarks.stub_server import StubProductServer
+from utils import data_processor
+from utils.api_handler import create_product_mapping, enrich_sales_data, fetch_all_products_paginated
+from utils.enriched_writer import save_enriched_data
+from utils.file_handler import parse_transactions, read_sales_data, validate_and_filter
+from utils.instrumentation import peak_rss_bytes
+from utils.report_generator import generate_sales_report
+
+
+ANALYSIS_FUNCTIONS = (
+    'calculate_total_revenue', 'region_wise_sales', 'top_selling_products',
+    'customer_analysis', 'daily_sales_trend', 'find_peak_sales_day',
+    'low_performing_products'
+)
+
+
+def _row_count(value):
+    if isinstance(value, tuple):
+        value = value[0]
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+class StageTimer:
+    """
+    Runs stages one at a time and keeps one result record per stage
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = []
+
+    def run(self, name, func, *args, rows_in=None, **kwargs):
+        if self.trace_memory:
+            tracemalloc.start()
+
+        wall = time.perf_counter()
+        cpu = time.process_time()
+
+        # Stages print progress; keep the benchmark output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func(*args, **kwargs)
+
+        record = {
+            'stage': name,
+            'seconds': time.perf_counter() - wall,
+            'cpu_seconds': time.process_time() - cpu,
+            'rows_in': rows_in,
+            'rows_out': _row_count(result),
+            'max_rss_bytes': peak_rss_bytes()
+        }
+
+        if self.trace_memory:
+            record['peak_traced_bytes'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        if record['rows_out'] and record['seconds']:
+            record['rows_per_second'] = (rows_in or record['rows_out']) / record['seconds']
+
+        self.stages.append(record)
+        return result
+
+
+def run_pipeline(filename, work_dir, base_url, columnar=False, trace_memory=False):
+    """
+    Returns: list of stage records for one input file
+    """
+
+    timer = StageTimer(trace_memory)
+
+    lines = timer.run('read_sales_data', read_sales_data, filename)
+    transactions = timer.run(
+        'parse_transactions', parse_transactions, lines, columnar=columnar, rows_in=len(lines)
+    )
+    del lines
+
+    valid, _, _ = timer.run(
+        'validate_and_filter', validate_and_filter, transactions, rows_in=len(transactions)
+    )
+    del transactions
+
+    rows = len(valid)
+    metrics = timer.run('aggregate_sales', data_processor.aggregate_sales, valid, rows_in=rows)
+    for name in ANALYSIS_FUNCTIONS:
+        timer.run(name, getattr(data_processor, name), valid, rows_in=rows)
+
+    products = timer.run('fetch_all_products', fetch_all_products_paginated, base_url)
+    mapping = timer.run('create_product_mapping', create_product_mapping, products, rows_in=len(products))
+
+    enriched = timer.run('enrich_sales_data', enrich_sales_data, valid, mapping, rows_in=rows)
+    timer.run(
+        'save_enriched_data', save_enriched_data, enriched,
+        os.path.join(work_dir, 'enriched_sales_data.txt'), rows_in=rows
+    )
+    timer.run(
+        'generate_sales_report', generate_sales_report, valid, enriched,
+        os.path.join(work_dir, 'sales_report.txt'), metrics=metrics, rows_in=rows
+    )
+
+    return timer.stages
+
+
+def compare_results(previous, current, tolerance):
+    """
+    Prints stages whose wall time grew by more than tolerance (a fraction)
+
+    Returns: number of regressions
+    """
+
+    before = {
+        (run['rows'], stage['stage']): stage['seconds']
+        for run in previous['runs'] for stage in run['stages']
+    }
+
+    regressions = 0
+    for run in current['runs']:
+        for stage in run['stages']:
+            old = before.get((run['rows'], stage['stage']))
+            if old is None or old < 0.001:
+                continue
+            change = stage['seconds'] / old - 1
+            if change > tolerance:
+                regressions += 1
+                print(f"REGRESSION {run['rows']:>11,} rows  {stage['stage']:<26} "
+                      f"{old:9.4f}s -> {stage['seconds']:9.4f}s ({change:+.0%})")
+
+    return regressions
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--noise', type=float, default=0.05)
+    parser.add_argument('--columnar', action='store_true', help="parse into a TransactionTable")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="record tracemalloc peaks (slows allocation-heavy stages)")
+    parser.add_argument('--data-dir', help="where generated inputs are kept between runs")
+    parser.add_argument('--api-delay', type=float, default=0.0, help="stub latency per request, seconds")
+    parser.add_argument('--output', default='output/bench_pipeline.json')
+    parser.add_argument('--compare', help="earlier results file to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    # Read first: the comparison file may be the one about to be overwritten
+    previous = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            previous = json.load(file)
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix='sales_bench_')
+    results = {
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'columnar': args.columnar,
+        'seed': args.seed,
+        'noise': args.noise,
+        'runs': []
+    }
+
+    with StubProductServer(delay=args.api_delay) as stub, tempfile.TemporaryDirectory() as work_dir:
+        for rows in args.rows:
+            filename = os.path.join(data_dir, f"sales_{rows}_{args.seed}_{args.noise}.txt")
+            if not os.path.exists(filename):
+                generate_sales_file(filename, rows, args.seed, args.noise)
+
+            stages = run_pipeline(filename, work_dir, stub.base_url, args.columnar, args.trace_memory)
+            results['runs'].append({'rows': rows, 'input_bytes': os.path.getsize(filename), 'stages': stages})
+
+            print(f"\n{rows:,} rows")
+            for stage in stages:
+                rss = stage['max_rss_bytes']
+                rss = 'n/a' if rss is None else f"{rss / 2**20:.1f} MB"
+                print(f"  {stage['stage']:<26} {stage['seconds']:9.4f}s  cpu {stage['cpu_seconds']:9.4f}s  "
+                      f"rss {rss:>11}")
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if previous and compare_results(previous, results, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Sketch accuracy vs memory benchmark
+
+Builds the exact SalesAggregator and SalesSketch at several error
+settings over a synthetic high-cardinality dataset, and reports build
+time, peak traced memory, unique_customers error per day and top-N
+recall / error for products and customers.
+
+Run from the repository root:
+    python -m benchmarks.bench_sketches --rows 1000000 --customers 200000
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from utils.data_processor import aggregate_sales
+from utils.transaction_table import TransactionTable
+
+
+SETTINGS = (
+    {'hll_error': 0.05, 'cms_epsilon': 0.01, 'cms_delta': 0.05, 'top_k': 50},
+    {'hll_error': 0.02, 'cms_epsilon': 0.001, 'cms_delta': 0.01, 'top_k': 100},
+    {'hll_error': 0.01, 'cms_epsilon': 0.0005, 'cms_delta': 0.001, 'top_k': 500},
+)
+
+
+def synthetic_transactions(rows, customers, products, days, seed=42):
+    """
+    Zipf-like product and customer popularity, so there are real heavy
+    hitters for the top-N queries
+    """
+
+    rng = random.Random(seed)
+    product_weights = [1 / (i + 1) for i in range(products)]
+    customer_weights = [1 / (i + 1) ** 0.8 for i in range(customers)]
+    product_picks = rng.choices(range(products), product_weights, k=rows)
+    customer_picks = rng.choices(range(customers), customer_weights, k=rows)
+
+    return [
+        {
+            'TransactionID': f"T{i:09d}",
+            'Date': f"day-{rng.randrange(days):05d}",
+            'ProductID': f"P{product_picks[i]}",
+            'ProductName': f"Product {product_picks[i]}",
+            'Quantity': rng.randint(1, 10),
+            'UnitPrice': float(rng.randint(100, 5000)),
+            'CustomerID': f"C{customer_picks[i]:07d}",
+            'Region': rng.choice(('North', 'South', 'East', 'West'))
+        }
+        for i in range(rows)
+    ]
+
+
+def measured(func, *args, **kwargs):
+    """
+    Times one run, then repeats it under tracemalloc for the peak (tracing
+    slows allocation-heavy code too much to time both at once)
+    """
+
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def recall(exact_top, approx_top):
+    exact_keys = {row[0] for row in exact_top}
+    return len(exact_keys & {row[0] for row in approx_top}) / len(exact_keys)
+
+
+def relative_errors(exact, approx):
+    errors = [abs(approx[key] - value) / value for key, value in exact.items() if value]
+    return sum(errors) / len(errors), max(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--customers', type=int, default=200_000)
+    parser.add_argument('--products', type=int, default=5_000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--columnar', action='store_true', help="aggregate a TransactionTable")
+    args = parser.parse_args()
+
+    transactions = synthetic_transactions(args.rows, args.customers, args.products, args.days)
+    if args.columnar:
+        transactions = TransactionTable.from_dicts(transactions)
+
+    exact, exact_time, exact_peak = measured(aggregate_sales, transactions)
+    exact_daily = {d: v['unique_customers'] for d, v in exact.daily_sales_trend().items()}
+    exact_products = exact.top_selling_products(args.top)
+    exact_customers = exact.top_customers(args.top)
+    exact_spent = {cid: entry['total_spent'] for cid, entry in exact_customers}
+
+    print(f"rows: {args.rows:,}  customers: {args.customers:,}  "
+          f"products: {args.products:,}  days: {args.days}")
+    print(f"exact:  {exact_time:7.2f}s  peak {exact_peak / 2**20:8.1f} MB")
+
+    for options in SETTINGS:
+        sketch, sketch_time, sketch_peak = measured(
+            aggregate_sales, transactions, approximate=True, **options
+        )
+
+        approx_daily = {d: v['unique_customers'] for d, v in sketch.daily_sales_trend().items()}
+        mean_hll, max_hll = relative_errors(exact_daily, approx_daily)
+
+        approx_products = sketch.top_selling_products(args.top)
+        approx_customers = sketch.top_customers(args.top)
+        approx_spent = {cid: entry['total_spent'] for cid, entry in sketch.top_customers(options['top_k'])}
+        spent_errors = [
+            abs(approx_spent[cid] - spent) / spent
+            for cid, spent in exact_spent.items() if cid in approx_spent
+        ]
+
+        print(
+            f"sketch {options}\n"
+            f"        {sketch_time:7.2f}s  peak {sketch_peak / 2**20:8.1f} MB  "
+            f"sketch payload {sketch.memory_bytes() / 2**20:6.1f} MB\n"
+            f"        unique_customers error mean {mean_hll:6.2%} max {max_hll:6.2%}\n"
+            f"        top-{args.top} products recall {recall(exact_products, approx_products):5.0%}  "
+            f"customers recall {recall(exact_customers, approx_customers):5.0%}  "
+            f"spent error max {max(spent_errors, default=0):6.2%}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Import-time benchmark for the analytics entry point
+
+Runs a fresh interpreter with python -X importtime for each module, and
+reports the median cumulative import time, the slowest modules it pulls
+in, and whether heavy dependencies (requests by default) were actually
+executed. Interpreter startup alone ('pass') is measured for reference.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --module utils.main utils.api_handler --runs 20
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+def import_profile(module):
+    """
+    Returns: ({module: (self_us, cumulative_us)}, wall_seconds) for one
+    fresh interpreter importing module
+    """
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        capture_output=True, text=True, check=True, cwd=os.getcwd()
+    )
+    wall = time.perf_counter() - start
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+
+    return timings, wall
+
+
+def interpreter_wall():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--module', nargs='+', default=['utils.main'])
+    parser.add_argument('--heavy', nargs='+', default=['requests', 'urllib3', 'numpy', 'pyarrow'],
+                        help="dependencies that should not load at import time")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    baseline = statistics.median(interpreter_wall() for _ in range(args.runs))
+    print(f"interpreter startup ('pass'): {baseline * 1000:8.1f} ms wall")
+
+    for module in args.module:
+        profiles = [import_profile(module) for _ in range(args.runs)]
+        cumulative = statistics.median(timings[module][1] for timings, _ in profiles)
+        wall = statistics.median(wall for _, wall in profiles)
+        timings = profiles[-1][0]
+
+        print(f"\nimport {module}")
+        print(f"  cumulative import time: {cumulative / 1000:8.1f} ms (median of {args.runs})")
+        print(f"  process wall time:      {wall * 1000:8.1f} ms")
+
+        loaded = [name for name in args.heavy if name in timings]
+        print(f"  heavy dependencies executed: {', '.join(loaded) if loaded else 'none'}")
+
+        print("  slowest modules (self time):")
+        slowest = sorted(timings.items(), key=lambda x: x[1][0], reverse=True)[:args.top]
+        for name, (self_us, cumulative_us) in slowest:
+            print(f"    {name:<40}{self_us / 1000:8.2f} ms  (cumulative {cumulative_us / 1000:8.2f} ms)")
+
+
+if __name__ == '__main__':
+    main()
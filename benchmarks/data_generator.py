@@ -0,0 +1,129 @@
+"""
+Deterministic synthetic sales data generator
+
+Writes files in the data/sales_data.txt format with the same kinds of
+noise as the sample: comma-formatted prices, commas inside product
+names (which the parser removes), zero quantities, TransactionIDs
+without the T prefix, missing CustomerID / Region and blank lines, plus
+product names containing a '|', which break the field count so the
+parser skips the row.
+The same (rows, seed, noise) always gives byte-identical output.
+
+Run from the repository root:
+    python -m benchmarks.data_generator output/sales_1m.txt --rows 1000000
+"""
+
+import argparse
+import datetime
+import os
+import random
+
+
+HEADER = 'TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n'
+
+# ProductID -> (name, variant name with a comma, unit price range)
+PRODUCTS = {
+    'P101': ('Laptop', 'Laptop,Premium', (35000, 75000)),
+    'P102': ('Mouse', 'Mouse,Wireless', (300, 1500)),
+    'P103': ('Keyboard', 'Keyboard,Mechanical', (1000, 4000)),
+    'P104': ('Monitor', 'Monitor,LED', (8000, 25000)),
+    'P105': ('Webcam', 'Webcam,HD', (1500, 4000)),
+    'P106': ('Headphones', 'Headphones,Wireless', (1000, 6000)),
+    'P107': ('USB Cable', 'USB Cable,3m', (150, 500)),
+    'P108': ('External Hard Drive', 'External Hard Drive,1TB', (3500, 8000)),
+    'P109': ('Wireless Mouse', 'Wireless Mouse,Gaming', (400, 2000)),
+    'P110': ('Laptop Charger', 'Laptop Charger,65W', (1200, 2500)),
+}
+REGIONS = ('North', 'South', 'East', 'West')
+
+BATCH_ROWS = 100000
+
+
+def generate_sales_file(filename, rows, seed=42, noise=0.05, customers=None,
+                        start_date='2024-01-01', days=365):
+    """
+    Writes rows transaction lines (plus header) to filename
+
+    noise is the fraction of rows that get one of the defects found in
+    the sample file; customers defaults to about one per 20 rows.
+
+    Returns: filename
+    """
+
+    rng = random.Random(seed)
+    customers = customers or max(25, rows // 20)
+    first_day = datetime.date.fromisoformat(start_date)
+    dates = [(first_day + datetime.timedelta(days=i)).isoformat() for i in range(days)]
+    product_ids = list(PRODUCTS)
+
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(filename, 'w', encoding='utf-8', newline='\n', buffering=1 << 20) as file:
+        file.write(HEADER)
+
+        for batch_start in range(0, rows, BATCH_ROWS):
+            count = min(BATCH_ROWS, rows - batch_start)
+            file.write(''.join(_generate_batch(
+                rng, batch_start, count, noise, customers, dates, product_ids
+            )))
+
+    return filename
+
+
+def _generate_batch(rng, batch_start, count, noise, customers, dates, product_ids):
+    picks = rng.choices(product_ids, k=count)
+    days = rng.choices(dates, k=count)
+    regions = rng.choices(REGIONS, k=count)
+    quantities = rng.choices(range(1, 11), k=count)
+
+    lines = []
+    for i in range(count):
+        pid = picks[i]
+        name, variant, (low, high) = PRODUCTS[pid]
+        tid = f"T{batch_start + i + 1:03d}"
+        qty = str(quantities[i])
+        price = rng.randint(low, high)
+        price_text = str(price)
+        cid = f"C{rng.randint(1, customers):03d}"
+        region = regions[i]
+
+        if price >= 1000 and rng.random() < 0.2:
+            price_text = f"{price:,}"
+
+        if rng.random() < noise:
+            defect = rng.randrange(7)
+            if defect == 0:
+                name = variant
+            elif defect == 1:
+                qty = '0'
+            elif defect == 2:
+                tid = 'X' + tid[1:]
+            elif defect == 3:
+                cid = ''
+            elif defect == 4:
+                region = ''
+            elif defect == 5:
+                name = variant.replace(',', '|')
+            else:
+                lines.append('\n')
+
+        lines.append(f"{tid}|{days[i]}|{pid}|{name}|{qty}|{price_text}|{cid}|{region}\n")
+
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('filename')
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--noise', type=float, default=0.05)
+    args = parser.parse_args()
+
+    generate_sales_file(args.filename, args.rows, args.seed, args.noise)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Local stand-in for the DummyJSON products API
+
+Serves /products?limit=&skip= (with an ETag, answering 304 to a matching
+If-None-Match) and /products/<id> from a generated catalog, so the
+benchmarks never touch the network. delay adds a fixed latency per
+request to imitate the real round trip, max_limit caps the page size
+like the real API does, and fail_next answers that many of the next
+requests with 503 to exercise retries.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+CATEGORIES = ('laptops', 'mobile-accessories', 'tablets', 'smartphones')
+BRANDS = ('Apple', 'Asus', 'Dell', 'Lenovo', 'Logitech')
+
+
+def stub_product(product_id):
+    return {
+        'id': product_id,
+        'title': f"Product {product_id}",
+        'category': CATEGORIES[product_id % len(CATEGORIES)],
+        'brand': BRANDS[product_id % len(BRANDS)],
+        'price': 10 + product_id,
+        'rating': round(3 + product_id % 20 / 10, 2)
+    }
+
+
+class StubProductServer:
+    """
+    Threaded HTTP server on 127.0.0.1 (a free port unless one is given)
+
+    Use as a context manager; base_url is the products endpoint to pass
+    as PRODUCTS_BASE_URL. max_active records the most requests that
+    were being served at once.
+    """
+
+    def __init__(self, total=194, delay=0.0, port=0, max_limit=None, fail_next=0):
+        self.total = total
+        self.delay = delay
+        self.max_limit = max_limit
+        self.fail_next = fail_next
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/products"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                    fail = stub.fail_next > 0
+                    if fail:
+                        stub.fail_next -= 1
+
+                try:
+                    if stub.delay:
+                        threading.Event().wait(stub.delay)
+                    if fail:
+                        return self._send(503, {'message': 'unavailable'})
+                    self._route()
+                finally:
+                    with stub._lock:
+                        stub.active -= 1
+
+            def _route(self):
+                url = urlsplit(self.path)
+                parts = url.path.strip('/').split('/')
+
+                if parts[0] != 'products' or len(parts) > 2:
+                    return self._send(404, {'message': 'not found'})
+
+                if len(parts) == 2:
+                    product_id = int(parts[1]) if parts[1].isdigit() else 0
+                    if not 1 <= product_id <= stub.total:
+                        return self._send(404, {'message': f"Product with id '{parts[1]}' not found"})
+                    return self._send(200, stub_product(product_id))
+
+                etag = f'"catalog-{stub.total}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+
+                query = parse_qs(url.query)
+                limit = int(query.get('limit', ['30'])[0]) or stub.total
+                if stub.max_limit:
+                    limit = min(limit, stub.max_limit)
+                skip = int(query.get('skip', ['0'])[0])
+                products = [stub_product(i) for i in range(skip + 1, min(skip + limit, stub.total) + 1)]
+
+                self._send(200, {
+                    'products': products, 'total': stub.total,
+                    'skip': skip, 'limit': len(products)
+                }, etag)
+
+            def _send(self, status, body, etag=None):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                if etag:
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
@@ -0,0 +1,84 @@
+from bisect import bisect_left, bisect_right
+
+from utils.transaction_table import TransactionTable
+
+
+class AmountIndex:
+    """
+    Per-dataset index of transaction amounts (Quantity * UnitPrice)
+
+    Amounts are computed once per row and kept sorted together with their
+    row ids, so min/max are O(1) and an amount range is a bisect plus a
+    slice. Build it once for a parsed dataset and pass it to every
+    validate_and_filter call on that dataset.
+    """
+
+    def __init__(self, transactions):
+        if isinstance(transactions, TransactionTable):
+            self.amounts = transactions.amounts
+        else:
+            self.amounts = [_amount(tx) for tx in transactions]
+
+        # Rows whose amount cannot be computed are left out of the order
+        self.row_ids = sorted(
+            (row for row, amount in enumerate(self.amounts) if amount is not None),
+            key=self.amounts.__getitem__
+        )
+        self.sorted_amounts = [self.amounts[row] for row in self.row_ids]
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def min(self):
+        if not self.sorted_amounts:
+            raise ValueError("min() arg is an empty sequence")
+        return self.sorted_amounts[0]
+
+    def max(self):
+        if not self.sorted_amounts:
+            raise ValueError("max() arg is an empty sequence")
+        return self.sorted_amounts[-1]
+
+    def min_max(self, mask=None):
+        """
+        Returns: (min, max) amount over all rows, or only over rows whose
+        entry in mask (a per-row sequence of flags) is set; the scan stops
+        at the first matching row from each end of the sorted order
+        """
+
+        if mask is None:
+            return self.min(), self.max()
+
+        row_ids = self.row_ids
+        sorted_amounts = self.sorted_amounts
+
+        low = next((sorted_amounts[i] for i, row in enumerate(row_ids) if mask[row]), None)
+        if low is None:
+            raise ValueError("min() arg is an empty sequence")
+
+        high = next(sorted_amounts[i] for i in reversed(range(len(row_ids))) if mask[row_ids[i]])
+        return low, high
+
+    def range_rows(self, min_amount=None, max_amount=None):
+        """
+        Returns: row ids (in slice order) with min_amount <= amount <= max_amount
+        """
+
+        lo = 0 if min_amount is None else bisect_left(self.sorted_amounts, min_amount)
+        hi = len(self.sorted_amounts) if max_amount is None else bisect_right(self.sorted_amounts, max_amount)
+        return self.row_ids[lo:hi]
+
+
+def _amount(tx):
+    try:
+        return tx['Quantity'] * tx['UnitPrice']
+    except Exception:
+        return None
+
+
+def build_amount_index(transactions):
+    """
+    Returns: AmountIndex for parsed transactions (list or TransactionTable)
+    """
+
+    return AmountIndex(transactions)
@@ -1,14 +1,36 @@
-import requests
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 
+from utils.instrumentation import instrumented
+from utils.lazy_imports import lazy_import
+from utils.storage import atomic_write
 
-def fetch_all_products():
+# save_enriched_data moved to its own stage; still importable from here
+from utils.enriched_writer import save_enriched_data
+
+# requests is only loaded when a stage actually talks to the API
+requests = lazy_import('requests')
+
+
+PRODUCTS_BASE_URL = "https://dummyjson.com/products"
+PRODUCTS_URL = PRODUCTS_BASE_URL + "?limit=100"
+
+# Responses worth retrying: rate limiting and server-side errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@instrumented()
+def fetch_all_products(url=PRODUCTS_URL):
     """
     Task 3.1 (a)
     Fetches all products from DummyJSON API
     """
 
-    url = "https://dummyjson.com/products?limit=100"
-
     try:
         response = requests.get(url, timeout=10)
         response.raise_for_status()
@@ -18,14 +40,7 @@ def fetch_all_products():
 
         result = []
         for p in products:
-            result.append({
-                'id': p.get('id'),
-                'title': p.get('title'),
-                'category': p.get('category'),
-                'brand': p.get('brand'),
-                'price': p.get('price'),
-                'rating': p.get('rating')
-            })
+            result.append(_product_fields(p))
 
         print("Product fetch successful")
         return result
@@ -35,6 +50,158 @@ def fetch_all_products():
         return []
 
 
+@instrumented()
+def fetch_all_products_paginated(base_url=PRODUCTS_BASE_URL, page_size=100, max_workers=4,
+                                 host_limit=4, retries=3, backoff=0.5, session=None):
+    """
+    Fetches the whole catalog page by page using skip/limit
+
+    The first page gives the catalog total; the remaining pages are
+    requested concurrently over one pooled session, at most host_limit
+    at a time per host, each with bounded retries and jittered backoff.
+    The fetch fails as a whole (returns []) if any page cannot be read.
+
+    Returns: list of products in the same shape as fetch_all_products
+    """
+
+    own_session = session is None
+    if own_session:
+        session = create_session(max_workers)
+
+    try:
+        response = get_with_retry(
+            session, base_url, params={'limit': page_size, 'skip': 0},
+            retries=retries, backoff=backoff, host_limit=host_limit
+        )
+        response.raise_for_status()
+
+        products = fetch_remaining_pages(
+            session, base_url, response.json(), page_size,
+            max_workers=max_workers, host_limit=host_limit, retries=retries, backoff=backoff
+        )
+
+        print("Product fetch successful")
+        return [_product_fields(p) for p in products]
+
+    except Exception:
+        print("Product fetch failed")
+        return []
+
+    finally:
+        if own_session:
+            session.close()
+
+
+def fetch_remaining_pages(session, base_url, first_page, page_size=100, max_workers=4,
+                          host_limit=4, retries=3, backoff=0.5):
+    """
+    Given the decoded first page, fetches every later page concurrently
+
+    Returns: raw product dictionaries from all pages, in catalog order
+    """
+
+    products = list(first_page.get('products', []))
+    total = first_page.get('total', len(products))
+
+    # Step by what the server actually returned, in case it caps limit
+    step = len(products) or page_size
+    skips = range(len(products), total, step)
+
+    def fetch_page(skip):
+        response = get_with_retry(
+            session, base_url, params={'limit': step, 'skip': skip},
+            retries=retries, backoff=backoff, host_limit=host_limit
+        )
+        response.raise_for_status()
+        return response.json().get('products', [])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for page in pool.map(fetch_page, skips):
+            products.extend(page)
+
+    return products
+
+
+def create_session(pool_size=10):
+    """
+    Returns a requests.Session whose connection pool can serve pool_size
+    concurrent requests per host
+    """
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+
+def _host_semaphore(url, limit):
+    """
+    Shared semaphore capping concurrent requests to the host of url
+
+    There is one semaphore per host: the limit of the first caller for a
+    host applies to every later caller, whatever host_limit they pass
+    """
+
+    host = urlsplit(url).netloc
+
+    with _host_semaphores_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = _host_semaphores[host] = threading.BoundedSemaphore(limit)
+
+    return semaphore
+
+
+def get_with_retry(session, url, params=None, headers=None, retries=3, backoff=0.5,
+                   timeout=10, host_limit=4):
+    """
+    GET with bounded retries
+
+    Connection errors, timeouts and RETRY_STATUSES responses are retried
+    up to retries times, sleeping a random time up to backoff * 2**attempt
+    seconds in between (full jitter). Other responses are returned as is.
+
+    Returns: the last response (raises the last error if none arrived)
+    """
+
+    semaphore = _host_semaphore(url, host_limit)
+
+    for attempt in range(retries + 1):
+        try:
+            with semaphore:
+                response = session.get(url, params=params, headers=headers, timeout=timeout)
+
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+
+        time.sleep(random.uniform(0, backoff * 2 ** attempt))
+
+
+def _product_fields(p):
+    """
+    Keeps only the product fields the pipeline uses
+    """
+
+    return {
+        'id': p.get('id'),
+        'title': p.get('title'),
+        'category': p.get('category'),
+        'brand': p.get('brand'),
+        'price': p.get('price'),
+        'rating': p.get('rating')
+    }
+
+
+@instrumented()
 def create_product_mapping(api_products):
     """
     Task 3.1 (b)
@@ -57,78 +224,524 @@ def create_product_mapping(api_products):
     return product_mapping
 
 
+@instrumented()
 def enrich_sales_data(transactions, product_mapping):
     """
     Task 3.2
     Enriches transaction data with API product information
+
+    Returns an EnrichedTransactions view: the API fields are resolved
+    once per distinct ProductID and attached to rows on access, so the
+    transactions are not copied. Persisting is a separate stage, see
+    utils.enriched_writer
     """
 
-    enriched_transactions = []
+    return EnrichedTransactions(transactions, product_mapping)
 
-    for tx in transactions:
-        enriched = tx.copy()
 
-        api_category = None
-        api_brand = None
-        api_rating = None
-        api_match = False
+def build_join_index(product_ids, product_mapping):
+    """
+    Resolves each distinct ProductID against the product mapping once
 
-        try:
-            # Extract numeric product ID (P101 -> 101)
-            product_id_str = tx.get('ProductID', '')
-            numeric_id = int(''.join(filter(str.isdigit, product_id_str)))
+    Returns: dict of ProductID -> API field dictionary
+    """
 
-            if numeric_id in product_mapping:
-                product = product_mapping[numeric_id]
-                api_category = product.get('category')
-                api_brand = product.get('brand')
-                api_rating = product.get('rating')
-                api_match = True
+    join_index = {}
 
-        except Exception:
-            api_match = False
+    for product_id_str in product_ids:
+        fields = {
+            'API_Category': None,
+            'API_Brand': None,
+            'API_Rating': None,
+            'API_Match': False
+        }
 
-        enriched['API_Category'] = api_category
-        enriched['API_Brand'] = api_brand
-        enriched['API_Rating'] = api_rating
-        enriched['API_Match'] = api_match
+        # Extract numeric product ID (P101 -> 101)
+        numeric_id = extract_numeric_id(product_id_str)
+        product = product_mapping.get(numeric_id) if numeric_id is not None else None
 
-        enriched_transactions.append(enriched)
+        if product is not None:
+            fields['API_Category'] = product.get('category')
+            fields['API_Brand'] = product.get('brand')
+            fields['API_Rating'] = product.get('rating')
+            fields['API_Match'] = True
 
-    # Save to file as required
-    save_enriched_data(enriched_transactions)
+        join_index[product_id_str] = fields
 
-    return enriched_transactions
+    return join_index
 
 
-def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data.txt'):
+class EnrichedTransactions:
     """
-    Helper function
-    Saves enriched transactions back to file
+    Read-only sequence of enriched transactions
+
+    Holds the original transactions (a list or a TransactionTable) plus a
+    join index keyed by ProductID; each row is merged with its API fields
+    only when it is read. Aggregate questions such as match_count() are
+    answered per distinct ProductID without touching individual rows.
+    """
+
+    def __init__(self, transactions, product_mapping):
+        if not hasattr(transactions, '__getitem__'):
+            transactions = list(transactions)
+
+        self.transactions = transactions
+        self._table_ids = getattr(transactions, 'product_ids', None)
+
+        if self._table_ids is not None:
+            product_ids = self._table_ids.values
+        else:
+            product_ids = {tx.get('ProductID', '') for tx in transactions}
+
+        self.join_index = build_join_index(product_ids, product_mapping)
+
+    def __len__(self):
+        return len(self.transactions)
+
+    def __bool__(self):
+        return len(self.transactions) > 0
+
+    def __getitem__(self, row):
+        """
+        Returns: the enriched row, or an EnrichedTransactions over a slice
+        (sharing this join index)
+        """
+
+        if isinstance(row, slice):
+            subset = EnrichedTransactions.__new__(EnrichedTransactions)
+            subset.transactions = self.transactions[row]
+            subset._table_ids = getattr(subset.transactions, 'product_ids', None)
+            subset.join_index = self.join_index
+            return subset
+
+        tx = self.transactions[row]
+        return {**tx, **self.join_index[tx.get('ProductID', '')]}
+
+    def __iter__(self):
+        join_index = self.join_index
+        for tx in self.transactions:
+            yield {**tx, **join_index[tx.get('ProductID', '')]}
+
+    def product_counts(self):
+        """
+        Returns: dict of ProductID -> number of rows
+        """
+
+        if self._table_ids is not None:
+            counts = [0] * len(self._table_ids.values)
+            for code in self._table_ids.codes:
+                counts[code] += 1
+            return {pid: counts[code] for code, pid in enumerate(self._table_ids.values) if counts[code]}
+
+        counts = {}
+        for tx in self.transactions:
+            pid = tx.get('ProductID', '')
+            counts[pid] = counts.get(pid, 0) + 1
+        return counts
+
+    def match_count(self):
+        """
+        Returns: number of rows with API_Match True
+        """
+
+        return sum(
+            count for pid, count in self.product_counts().items()
+            if self.join_index[pid]['API_Match']
+        )
+
+    def unmatched_product_names(self):
+        """
+        Returns: sorted distinct ProductNames of rows without an API match
+        """
+
+        if self._table_ids is not None:
+            # Distinct (ProductID, ProductName) code pairs, no row dictionaries
+            unmatched = {
+                code for code, pid in enumerate(self._table_ids.values)
+                if not self.join_index[pid]['API_Match']
+            }
+            names = self.transactions.product_names
+            pairs = set(zip(self._table_ids.codes, names.codes)) if unmatched else ()
+            return sorted({names.values[name] for pid, name in pairs if pid in unmatched})
+
+        unmatched = {pid for pid, fields in self.join_index.items() if not fields['API_Match']}
+        return sorted({
+            tx['ProductName'] for tx in self.transactions
+            if tx.get('ProductID', '') in unmatched
+        })
+
+
+# Product catalog cache
+# cache_file -> thread revalidating it in the background
+_revalidating = {}
+_revalidating_lock = threading.Lock()
+
+
+@instrumented()
+def load_product_catalog(cache_file='data/product_cache.json', ttl=3600, url=PRODUCTS_BASE_URL,
+                         background=True, **fetch_options):
+    """
+    Returns the product mapping (as create_product_mapping builds it),
+    served from a local cache file when possible
+
+    - fresh cache (younger than ttl seconds): returned without any request
+    - stale cache: returned immediately while a background thread
+      revalidates it with If-None-Match / If-Modified-Since
+      (background=False revalidates before returning). The thread is not
+      a daemon, so the refresh is written before the process exits;
+      wait_for_revalidation() joins it explicitly
+    - no cache: fetched synchronously; {} if the fetch fails
+
+    A failed revalidation keeps serving the stale entries.
+
+    fetch_options (page_size, max_workers, host_limit, retries, backoff)
+    are passed to the paginated fetch.
     """
 
-    header = (
-        "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|"
-        "CustomerID|Region|API_Category|API_Brand|API_Rating|API_Match\n"
-    )
+    cache = _read_catalog_cache(cache_file)
 
-    with open(filename, 'w', encoding='utf-8') as file:
-        file.write(header)
+    if cache is None:
+        return revalidate_product_catalog(cache_file, url, **fetch_options)
 
-        for tx in enriched_transactions:
-            row = [
-                str(tx.get('TransactionID', '')),
-                str(tx.get('Date', '')),
-                str(tx.get('ProductID', '')),
-                str(tx.get('ProductName', '')),
-                str(tx.get('Quantity', '')),
-                str(tx.get('UnitPrice', '')),
-                str(tx.get('CustomerID', '')),
-                str(tx.get('Region', '')),
-                str(tx.get('API_Category', '')),
-                str(tx.get('API_Brand', '')),
-                str(tx.get('API_Rating', '')),
-                str(tx.get('API_Match', ''))
-            ]
+    if time.time() - cache['fetched_at'] < ttl:
+        return cache['products']
+
+    if not background:
+        return revalidate_product_catalog(cache_file, url, cache, **fetch_options)
+
+    with _revalidating_lock:
+        if cache_file not in _revalidating:
+            thread = threading.Thread(
+                target=_background_revalidate,
+                args=(cache_file, url, cache, fetch_options),
+                name='catalog-revalidate'
+            )
+            _revalidating[cache_file] = thread
+            thread.start()
+
+    return cache['products']
+
+
+def wait_for_revalidation(timeout=None):
+    """
+    Waits for the background revalidations started by load_product_catalog
+
+    Returns: True if none is still running
+    """
+
+    with _revalidating_lock:
+        threads = list(_revalidating.values())
+
+    for thread in threads:
+        thread.join(timeout)
+
+    return not any(thread.is_alive() for thread in threads)
+
+
+def read_cached_product_catalog(cache_file='data/product_cache.json'):
+    """
+    Returns the cached product mapping without any network access
+    (however old it is), or {} if there is no usable cache
+    """
+
+    cache = _read_catalog_cache(cache_file)
+    return cache['products'] if cache else {}
+
+
+def revalidate_product_catalog(cache_file, url=PRODUCTS_BASE_URL, cache=None, page_size=100,
+                               max_workers=4, host_limit=4, retries=3, backoff=0.5):
+    """
+    Refreshes the cache file
+
+    The first catalog page is requested conditionally; unless the server
+    answers 304 Not Modified, the remaining pages are fetched concurrently.
+
+    Returns: current product mapping (the cached one on 304 or on failure)
+    """
+
+    headers = {}
+    if cache:
+        if cache.get('etag'):
+            headers['If-None-Match'] = cache['etag']
+        if cache.get('last_modified'):
+            headers['If-Modified-Since'] = cache['last_modified']
+
+    session = create_session(max_workers)
+
+    try:
+        response = get_with_retry(
+            session, url, params={'limit': page_size, 'skip': 0}, headers=headers,
+            retries=retries, backoff=backoff, host_limit=host_limit
+        )
+
+        if response.status_code == 304 and cache:
+            cache['fetched_at'] = time.time()
+            _write_catalog_cache(cache_file, cache)
+            return cache['products']
+
+        response.raise_for_status()
+
+        products = fetch_remaining_pages(
+            session, url, response.json(), page_size,
+            max_workers=max_workers, host_limit=host_limit, retries=retries, backoff=backoff
+        )
+        cache = {
+            'fetched_at': time.time(),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'products': create_product_mapping([_product_fields(p) for p in products])
+        }
+        _write_catalog_cache(cache_file, cache)
+        return cache['products']
+
+    except Exception:
+        print("Product catalog revalidation failed")
+        return cache['products'] if cache else {}
+
+    finally:
+        session.close()
+
+
+def _background_revalidate(cache_file, url, cache, fetch_options):
+    try:
+        revalidate_product_catalog(cache_file, url, cache, **fetch_options)
+    finally:
+        with _revalidating_lock:
+            _revalidating.pop(cache_file, None)
+
+
+def _read_catalog_cache(cache_file):
+    """
+    Returns: cache dictionary with integer product IDs, or None
+    """
+
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as file:
+            cache = json.load(file)
+
+        # JSON object keys are strings; the mapping is keyed by int ID
+        cache['products'] = {int(pid): info for pid, info in cache['products'].items()}
+        cache['fetched_at'] = float(cache['fetched_at'])
+        return cache
+
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def _write_catalog_cache(cache_file, cache):
+    """
+    Writes the cache atomically so readers never see a partial file
+    """
+
+    with atomic_write(cache_file, encoding='utf-8') as file:
+        json.dump(cache, file)
+
+
+# On-demand product lookup
+def extract_numeric_id(product_id_str):
+    """
+    Extracts the numeric API ID from a ProductID (P101 -> 101)
+
+    Returns: int, or None if the ProductID has no digits
+    """
+
+    try:
+        return int(''.join(filter(str.isdigit, product_id_str)))
+    except (TypeError, ValueError):
+        return None
+
+
+def distinct_product_ids(transactions):
+    """
+    Returns: set of numeric API IDs referenced by the transactions
+    """
+
+    product_ids = getattr(transactions, 'product_ids', None)
+    if product_ids is not None:
+        # TransactionTable already holds each distinct ProductID once
+        raw_ids = product_ids.values
+    else:
+        raw_ids = {tx.get('ProductID', '') for tx in transactions}
+
+    numeric_ids = {extract_numeric_id(pid) for pid in raw_ids}
+    numeric_ids.discard(None)
+    return numeric_ids
+
+
+class ProductLookup:
+    """
+    Fetches products by ID on demand instead of downloading the catalog
+
+    Found products and misses (404) are kept in a size-bounded in-process
+    LRU; misses expire after negative_ttl seconds so unknown IDs are not
+    re-requested on every call. With cache_file set, entries are also
+    persisted between runs.
+    """
+
+    def __init__(self, base_url=PRODUCTS_BASE_URL, maxsize=4096, cache_file=None,
+                 ttl=None, negative_ttl=86400, max_workers=8, host_limit=8,
+                 retries=3, backoff=0.5):
+        self.base_url = base_url.rstrip('/')
+        self.maxsize = maxsize
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_workers = max_workers
+        self.host_limit = host_limit
+        self.retries = retries
+        self.backoff = backoff
+
+        # numeric id -> (product info or None for a miss, stored_at)
+        self._lru = OrderedDict()
+        self._persistent = self._load_persistent()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def get_many(self, product_ids):
+        """
+        Looks up several numeric IDs, fetching only those not cached
+
+        Returns: mapping of the IDs that exist, shaped like
+        create_product_mapping output
+        """
+
+        mapping = {}
+        missing = []
+
+        for pid in set(product_ids):
+            hit, info = self._cached(pid)
+            if not hit:
+                missing.append(pid)
+            elif info is not None:
+                mapping[pid] = info
+
+        if missing:
+            session = create_session(self.max_workers)
+            try:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                    results = pool.map(lambda pid: self._fetch(session, pid), missing)
+
+                    for pid, (found, info) in zip(missing, results):
+                        if not found:
+                            # Network failure: not cached, retried next time
+                            continue
+                        self._store(pid, info)
+                        if info is not None:
+                            mapping[pid] = info
+            finally:
+                session.close()
+
+        if self._dirty:
+            self.save()
+
+        return mapping
+
+    def get(self, product_id):
+        """
+        Returns: product info for one numeric ID, or None
+        """
+
+        return self.get_many([product_id]).get(product_id)
+
+    def _cached(self, pid):
+        """
+        Returns: (hit, info) from the LRU, falling back to the persistent layer
+        """
+
+        with self._lock:
+            entry = self._lru.get(pid)
+            if entry is not None and self._fresh(entry):
+                self._lru.move_to_end(pid)
+                return True, entry[0]
+
+            entry = self._persistent.get(pid)
+            if entry is not None and self._fresh(entry):
+                self._remember(pid, entry)
+                return True, entry[0]
+
+        return False, None
+
+    def _fresh(self, entry):
+        info, stored_at = entry
+        ttl = self.negative_ttl if info is None else self.ttl
+        return ttl is None or time.time() - stored_at < ttl
+
+    def _remember(self, pid, entry):
+        self._lru[pid] = entry
+        self._lru.move_to_end(pid)
+
+        # Evict least recently used entries beyond maxsize
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    def _store(self, pid, info):
+        entry = (info, time.time())
+
+        with self._lock:
+            self._remember(pid, entry)
+            if self.cache_file:
+                self._persistent[pid] = entry
+                self._dirty = True
+
+    def _fetch(self, session, pid):
+        """
+        Returns: (True, info) when found, (True, None) on 404 and
+        (False, None) when the request failed
+        """
+
+        try:
+            response = get_with_retry(
+                session, f"{self.base_url}/{pid}",
+                retries=self.retries, backoff=self.backoff, host_limit=self.host_limit
+            )
+
+            if response.status_code == 404:
+                return True, None
+
+            response.raise_for_status()
+            product = _product_fields(response.json())
+            return True, {
+                'title': product['title'],
+                'category': product['category'],
+                'brand': product['brand'],
+                'rating': product['rating']
+            }
+
+        except Exception:
+            return False, None
+
+    def _load_persistent(self):
+        if not self.cache_file:
+            return {}
+
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            return {int(pid): (info, stored_at) for pid, (info, stored_at) in data.items()}
+        except (OSError, ValueError, TypeError):
+            return {}
+
+    def save(self):
+        """
+        Writes the persistent layer to cache_file
+        """
+
+        if not self.cache_file:
+            return
+
+        with self._lock:
+            data = {pid: list(entry) for pid, entry in self._persistent.items()}
+            self._dirty = False
+
+        _write_catalog_cache(self.cache_file, data)
+
+
+def lookup_products_for_transactions(transactions, lookup=None):
+    """
+    Fetches only the products the transactions reference
+
+    Returns: product mapping usable by enrich_sales_data
+    """
 
-            file.write('|'.join(row) + '\n')
+    lookup = lookup or ProductLookup()
+    return lookup.get_many(distinct_product_ids(transactions))
@@ -1,226 +1,568 @@
-def calculate_total_revenue(transactions):
-    """
-    Task 2.1 (a)
-    Calculates total revenue from all transactions
-    """
-    total = 0.0
-    for tx in transactions:
-        total += tx['Quantity'] * tx['UnitPrice']
-    return total
+import heapq
+from collections.abc import Mapping
 
+from utils.instrumentation import instrumented
+from utils.sketches import SalesSketch
+from utils.time_series import DailySeries
+from utils.transaction_table import TransactionTable, bincount
 
-def region_wise_sales(transactions):
+
+class SalesAggregator:
     """
-    Task 2.1 (b)
-    Analyzes sales by region
+    Single-pass aggregation engine
+
+    Walks the transactions once, computing Quantity * UnitPrice a single
+    time per row, and keeps every running total the analysis functions
+    below need. Results are derived from the stored totals, so one
+    aggregate can be shared by main() and generate_sales_report().
     """
 
-    region_data = {}
-    total_revenue = calculate_total_revenue(transactions)
+    def __init__(self, track_customer_products=True):
+        # Without per-customer product sets, customer_analysis(lazy=True)
+        # builds them only for the customers that are read
+        self.track_customer_products = track_customer_products
 
-    for tx in transactions:
+        self.total_revenue = 0.0
+        self.transaction_count = 0
+
+        # region -> [total_sales, transaction_count]
+        self.regions = {}
+        # product name -> [quantity, revenue]
+        self.products = {}
+        # customer id -> [total_spent, purchase_count, set of products or None]
+        self.customers = {}
+        # date -> [revenue, transaction_count, set of customers]
+        self.daily = {}
+
+    def add(self, tx):
+        """
+        Adds a single transaction to the running totals
+        """
+
+        qty = tx['Quantity']
+        revenue = qty * tx['UnitPrice']
+        name = tx['ProductName']
+        cid = tx['CustomerID']
+        date = tx['Date']
         region = tx['Region']
-        revenue = tx['Quantity'] * tx['UnitPrice']
 
-        if region not in region_data:
-            region_data[region] = {
-                'total_sales': 0.0,
-                'transaction_count': 0
+        self.total_revenue += revenue
+        self.transaction_count += 1
+
+        region_data = self.regions.get(region)
+        if region_data is None:
+            region_data = self.regions[region] = [0.0, 0]
+        region_data[0] += revenue
+        region_data[1] += 1
+
+        product_data = self.products.get(name)
+        if product_data is None:
+            product_data = self.products[name] = [0, 0.0]
+        product_data[0] += qty
+        product_data[1] += revenue
+
+        customer_data = self.customers.get(cid)
+        if customer_data is None:
+            customer_data = self.customers[cid] = [0.0, 0, set() if self.track_customer_products else None]
+        customer_data[0] += revenue
+        customer_data[1] += 1
+        if customer_data[2] is not None:
+            customer_data[2].add(name)
+
+        daily_data = self.daily.get(date)
+        if daily_data is None:
+            daily_data = self.daily[date] = [0.0, 0, set()]
+        daily_data[0] += revenue
+        daily_data[1] += 1
+        daily_data[2].add(cid)
+
+    def add_group(self, region, date, name, cid, revenue, quantity, count):
+        """
+        Adds a pre-aggregated group of count transactions sharing region,
+        date, product and customer (e.g. one rollup cube cell)
+        """
+
+        self.total_revenue += revenue
+        self.transaction_count += count
+
+        region_data = self.regions.setdefault(region, [0.0, 0])
+        region_data[0] += revenue
+        region_data[1] += count
+
+        product_data = self.products.setdefault(name, [0, 0.0])
+        product_data[0] += quantity
+        product_data[1] += revenue
+
+        customer_data = self.customers.get(cid)
+        if customer_data is None:
+            customer_data = self.customers[cid] = [0.0, 0, set() if self.track_customer_products else None]
+        customer_data[0] += revenue
+        customer_data[1] += count
+        if customer_data[2] is not None:
+            customer_data[2].add(name)
+
+        daily_data = self.daily.setdefault(date, [0.0, 0, set()])
+        daily_data[0] += revenue
+        daily_data[1] += count
+        daily_data[2].add(cid)
+
+    def add_all(self, transactions):
+        """
+        Adds every transaction from an iterable and returns the aggregator
+        """
+
+        for tx in transactions:
+            self.add(tx)
+        return self
+
+    def merge(self, other):
+        """
+        Folds another aggregator (e.g. from a later chunk of the same
+        data) into this one and returns this aggregator
+        """
+
+        self.total_revenue += other.total_revenue
+        self.transaction_count += other.transaction_count
+
+        for region, (sales, count) in other.regions.items():
+            region_data = self.regions.setdefault(region, [0.0, 0])
+            region_data[0] += sales
+            region_data[1] += count
+
+        for name, (qty, revenue) in other.products.items():
+            product_data = self.products.setdefault(name, [0, 0.0])
+            product_data[0] += qty
+            product_data[1] += revenue
+
+        tracked = self.track_customer_products and other.track_customer_products
+        self.track_customer_products = tracked
+
+        for cid, (spent, count, products) in other.customers.items():
+            customer_data = self.customers.setdefault(cid, [0.0, 0, set() if tracked else None])
+            customer_data[0] += spent
+            customer_data[1] += count
+            if tracked:
+                customer_data[2].update(products)
+            else:
+                customer_data[2] = None
+
+        for date, (revenue, count, customers) in other.daily.items():
+            daily_data = self.daily.setdefault(date, [0.0, 0, set()])
+            daily_data[0] += revenue
+            daily_data[1] += count
+            daily_data[2].update(customers)
+
+        return self
+
+    def to_state(self):
+        """
+        Returns: JSON-serializable snapshot of the running totals
+        """
+
+        return {
+            'track_customer_products': self.track_customer_products,
+            'total_revenue': self.total_revenue,
+            'transaction_count': self.transaction_count,
+            'regions': self.regions,
+            'products': self.products,
+            'customers': {
+                cid: [spent, count, sorted(products) if products is not None else None]
+                for cid, (spent, count, products) in self.customers.items()
+            },
+            'daily': {
+                date: [revenue, count, sorted(customers)]
+                for date, (revenue, count, customers) in self.daily.items()
             }
+        }
 
-        region_data[region]['total_sales'] += revenue
-        region_data[region]['transaction_count'] += 1
-
-    # Add percentage and sort by total_sales desc
-    sorted_regions = sorted(
-        region_data.items(),
-        key=lambda x: x[1]['total_sales'],
-        reverse=True
-    )
-
-    result = {}
-    for region, data in sorted_regions:
-        percentage = (data['total_sales'] / total_revenue) * 100 if total_revenue else 0
-        result[region] = {
-            'total_sales': data['total_sales'],
-            'transaction_count': data['transaction_count'],
-            'percentage': round(percentage, 2)
+    @classmethod
+    def from_state(cls, state):
+        """
+        Rebuilds an aggregator from a to_state() snapshot
+        """
+
+        agg = cls(state.get('track_customer_products', True))
+        agg.total_revenue = state['total_revenue']
+        agg.transaction_count = state['transaction_count']
+        agg.regions = {k: list(v) for k, v in state['regions'].items()}
+        agg.products = {k: list(v) for k, v in state['products'].items()}
+        agg.customers = {
+            cid: [spent, count, set(products) if products is not None else None]
+            for cid, (spent, count, products) in state['customers'].items()
         }
+        agg.daily = {
+            date: [revenue, count, set(customers)]
+            for date, (revenue, count, customers) in state['daily'].items()
+        }
+        return agg
+
+    def calculate_total_revenue(self):
+        return self.total_revenue
+
+    def region_wise_sales(self):
+        sorted_regions = sorted(
+            self.regions.items(),
+            key=lambda x: x[1][0],
+            reverse=True
+        )
+
+        result = {}
+        for region, (total_sales, count) in sorted_regions:
+            percentage = (total_sales / self.total_revenue) * 100 if self.total_revenue else 0
+            result[region] = {
+                'total_sales': total_sales,
+                'transaction_count': count,
+                'percentage': round(percentage, 2)
+            }
 
-    return result
+        return result
 
+    def top_selling_products(self, n=5):
+        # Bounded heap: same result and tie order as sorting then [:n]
+        top_products = heapq.nlargest(n, self.products.items(), key=lambda x: x[1][0])
 
-def top_selling_products(transactions, n=5):
-    """
-    Task 2.1 (c)
-    Finds top n products by total quantity sold
-    """
+        return [(name, qty, revenue) for name, (qty, revenue) in top_products]
 
-    product_data = {}
+    def customer_analysis(self):
+        """
+        Returns: per-customer entries by total_spent descending
 
-    for tx in transactions:
-        name = tx['ProductName']
-        qty = tx['Quantity']
-        revenue = qty * tx['UnitPrice']
+        Raises ValueError if the aggregator does not track customer
+        products, since the entries could not include products_bought
+        """
+
+        if not self.track_customer_products:
+            raise ValueError(
+                "customer_analysis needs track_customer_products=True; "
+                "use customer_analysis(transactions, lazy=True) to build products_bought on demand"
+            )
+
+        sorted_customers = sorted(
+            self.customers.items(),
+            key=lambda x: x[1][0],
+            reverse=True
+        )
 
-        if name not in product_data:
-            product_data[name] = {
-                'quantity': 0,
-                'revenue': 0.0
+        return {cid: _customer_entry(data) for cid, data in sorted_customers}
+
+    def top_customers(self, n=5):
+        """
+        Returns: the first n items of customer_analysis(), selected with a
+        bounded heap instead of sorting every customer; entries have no
+        products_bought when customer products are not tracked
+        """
+
+        top = heapq.nlargest(n, self.customers.items(), key=lambda x: x[1][0])
+
+        return [(cid, _customer_entry(data)) for cid, data in top]
+
+    def daily_sales_trend(self):
+        result = {}
+        for date in sorted(self.daily.keys()):
+            revenue, count, customers = self.daily[date]
+            result[date] = {
+                'revenue': revenue,
+                'transaction_count': count,
+                'unique_customers': len(customers)
             }
 
-        product_data[name]['quantity'] += qty
-        product_data[name]['revenue'] += revenue
+        return result
+
+    def find_peak_sales_day(self):
+        peak_date = max(self.daily.items(), key=lambda x: x[1][0])
+
+        return (
+            peak_date[0],
+            peak_date[1][0],
+            peak_date[1][1]
+        )
+
+    def time_series(self):
+        """
+        Returns: DailySeries over the per-date totals, for date-range,
+        rolling, weekly and monthly queries
+        """
 
-    sorted_products = sorted(
-        product_data.items(),
-        key=lambda x: x[1]['quantity'],
-        reverse=True
-    )
+        return DailySeries.from_transactions(self)
 
-    result = []
-    for name, data in sorted_products[:n]:
-        result.append((name, data['quantity'], data['revenue']))
+    def low_performing_products(self, threshold=10):
+        low_products = [
+            (name, qty, revenue)
+            for name, (qty, revenue) in self.products.items()
+            if qty < threshold
+        ]
 
-    return result
+        low_products.sort(key=lambda x: x[1])
 
+        return low_products
 
-def customer_analysis(transactions):
+
+def _customer_entry(data):
+    total_spent, count, products = data
+    entry = {
+        'total_spent': total_spent,
+        'purchase_count': count,
+        'avg_order_value': round(total_spent / count, 2)
+    }
+    if products is not None:
+        entry['products_bought'] = list(products)
+    return entry
+
+
+@instrumented()
+def aggregate_sales(transactions, track_customer_products=True, approximate=False, **sketch_options):
     """
-    Task 2.1 (d)
-    Analyzes customer purchase patterns
+    Computes every sales metric in a single pass
+
+    track_customer_products=False skips the per-customer product sets
+
+    approximate=True builds a SalesSketch instead, with memory bounded by
+    sketch_options (hll_error, cms_epsilon, cms_delta, top_k) rather than
+    by the number of customers. The wrappers below accept it like an
+    aggregator; see SalesSketch.low_performing_products for its bound.
+
+    Returns: SalesAggregator or SalesSketch (returned unchanged if one is passed in)
     """
 
-    customer_data = {}
+    if isinstance(transactions, (SalesAggregator, SalesSketch)):
+        return transactions
 
-    for tx in transactions:
-        cid = tx['CustomerID']
-        revenue = tx['Quantity'] * tx['UnitPrice']
-        product = tx['ProductName']
-
-        if cid not in customer_data:
-            customer_data[cid] = {
-                'total_spent': 0.0,
-                'purchase_count': 0,
-                'products': set()
-            }
+    if approximate:
+        return SalesSketch(**sketch_options).add_all(transactions)
 
-        customer_data[cid]['total_spent'] += revenue
-        customer_data[cid]['purchase_count'] += 1
-        customer_data[cid]['products'].add(product)
-
-    sorted_customers = sorted(
-        customer_data.items(),
-        key=lambda x: x[1]['total_spent'],
-        reverse=True
-    )
-
-    result = {}
-    for cid, data in sorted_customers:
-        avg_order = data['total_spent'] / data['purchase_count']
-        result[cid] = {
-            'total_spent': data['total_spent'],
-            'purchase_count': data['purchase_count'],
-            'avg_order_value': round(avg_order, 2),
-            'products_bought': list(data['products'])
-        }
+    if isinstance(transactions, TransactionTable):
+        return _aggregate_table(transactions, track_customer_products)
 
-    return result
+    return SalesAggregator(track_customer_products).add_all(transactions)
 
 
-def daily_sales_trend(transactions):
+def _aggregate_table(table, track_customer_products=True):
     """
-    Task 2.2 (a)
-    Analyzes sales trends by date
+    Fills a SalesAggregator from a TransactionTable with code-indexed
+    group-by sums instead of per-row dictionary lookups
     """
 
-    daily_data = {}
+    agg = SalesAggregator(track_customer_products)
+    amounts = table.amounts
+
+    total = 0.0
+    for amount in amounts:
+        total += amount
+    agg.total_revenue = total
+    agg.transaction_count = len(table)
+
+    regions = table.regions
+    names = table.product_names
+    customers = table.customer_ids
+    dates = table.dates
+
+    # Region totals
+    sales = bincount(regions.codes, len(regions.values), amounts)
+    counts = bincount(regions.codes, len(regions.values))
+    for code, region in enumerate(regions.values):
+        if counts[code]:
+            agg.regions[region] = [sales[code], counts[code]]
+
+    # Product totals
+    quantity = bincount(names.codes, len(names.values), table.quantities, zero=0)
+    revenue = bincount(names.codes, len(names.values), amounts)
+    counts = bincount(names.codes, len(names.values))
+    for code, name in enumerate(names.values):
+        if counts[code]:
+            agg.products[name] = [quantity[code], revenue[code]]
+
+    # Customer totals and distinct products per customer
+    spent = bincount(customers.codes, len(customers.values), amounts)
+    counts = bincount(customers.codes, len(customers.values))
+    product_sets = [None] * len(customers.values)
+    if track_customer_products:
+        product_sets = [set() for _ in customers.values]
+        for cid_code, name_code in set(zip(customers.codes, names.codes)):
+            product_sets[cid_code].add(names.values[name_code])
+    for code, cid in enumerate(customers.values):
+        if counts[code]:
+            agg.customers[cid] = [spent[code], counts[code], product_sets[code]]
+
+    # Daily totals and distinct customers per day
+    revenue = bincount(dates.codes, len(dates.values), amounts)
+    counts = bincount(dates.codes, len(dates.values))
+    customer_sets = [set() for _ in dates.values]
+    for date_code, cid_code in set(zip(dates.codes, customers.codes)):
+        customer_sets[date_code].add(customers.values[cid_code])
+    for code, date in enumerate(dates.values):
+        if counts[code]:
+            agg.daily[date] = [revenue[code], counts[code], customer_sets[code]]
+
+    return agg
+
+
+@instrumented()
+def calculate_total_revenue(transactions):
+    """
+    Task 2.1 (a)
+    Calculates total revenue from all transactions
+    """
+    if isinstance(transactions, (SalesAggregator, SalesSketch, TransactionTable)):
+        return aggregate_sales(transactions).total_revenue
 
+    total = 0.0
     for tx in transactions:
-        date = tx['Date']
-        revenue = tx['Quantity'] * tx['UnitPrice']
-        customer = tx['CustomerID']
-
-        if date not in daily_data:
-            daily_data[date] = {
-                'revenue': 0.0,
-                'transaction_count': 0,
-                'customers': set()
-            }
+        total += tx['Quantity'] * tx['UnitPrice']
+    return total
 
-        daily_data[date]['revenue'] += revenue
-        daily_data[date]['transaction_count'] += 1
-        daily_data[date]['customers'].add(customer)
 
-    result = {}
-    for date in sorted(daily_data.keys()):
-        result[date] = {
-            'revenue': daily_data[date]['revenue'],
-            'transaction_count': daily_data[date]['transaction_count'],
-            'unique_customers': len(daily_data[date]['customers'])
-        }
+@instrumented()
+def region_wise_sales(transactions):
+    """
+    Task 2.1 (b)
+    Analyzes sales by region
+    """
 
-    return result
+    return aggregate_sales(transactions).region_wise_sales()
 
 
-def find_peak_sales_day(transactions):
+@instrumented()
+def top_selling_products(transactions, n=5):
     """
-    Task 2.2 (b)
-    Identifies the date with highest revenue
+    Task 2.1 (c)
+    Finds top n products by total quantity sold
     """
 
-    daily_data = {}
+    return aggregate_sales(transactions).top_selling_products(n)
 
-    for tx in transactions:
-        date = tx['Date']
-        revenue = tx['Quantity'] * tx['UnitPrice']
 
-        if date not in daily_data:
-            daily_data[date] = {
-                'revenue': 0.0,
-                'transaction_count': 0
-            }
+@instrumented()
+def customer_analysis(transactions, lazy=False):
+    """
+    Task 2.1 (d)
+    Analyzes customer purchase patterns
 
-        daily_data[date]['revenue'] += revenue
-        daily_data[date]['transaction_count'] += 1
+    lazy=True returns a LazyCustomerAnalysis instead of a dict: totals are
+    computed up front, but products_bought is only built for customers
+    that are actually read
+    """
 
-    peak_date = max(daily_data.items(), key=lambda x: x[1]['revenue'])
+    if not lazy or isinstance(transactions, SalesSketch):
+        return aggregate_sales(transactions).customer_analysis()
 
-    return (
-        peak_date[0],
-        peak_date[1]['revenue'],
-        peak_date[1]['transaction_count']
-    )
+    if isinstance(transactions, SalesAggregator):
+        return LazyCustomerAnalysis(transactions)
 
+    agg = aggregate_sales(transactions, track_customer_products=False)
+    return LazyCustomerAnalysis(agg, transactions)
 
-def low_performing_products(transactions, threshold=10):
+
+class LazyCustomerAnalysis(Mapping):
     """
-    Task 2.3 (a)
-    Identifies products with low sales
+    Read-only mapping with the same entries as customer_analysis()
+
+    Iteration follows total_spent descending. top(n) uses a bounded heap
+    and scans the transactions for its n customers only; any other lookup
+    builds products_bought for every customer not cached yet in one scan,
+    so items()/values() read the transactions at most once.
     """
 
-    product_data = {}
+    def __init__(self, aggregator, transactions=None):
+        self._agg = aggregator
+        self._transactions = transactions
+        self._products = {}
+        self._order = None
+
+    def __len__(self):
+        return len(self._agg.customers)
+
+    def __iter__(self):
+        if self._order is None:
+            self._order = [
+                cid for cid, _ in sorted(
+                    self._agg.customers.items(), key=lambda x: x[1][0], reverse=True
+                )
+            ]
+        return iter(self._order)
+
+    def __getitem__(self, cid):
+        data = self._agg.customers[cid]
+        if cid not in self._products:
+            self.prefetch(self._agg.customers)
+
+        entry = _customer_entry(data)
+        entry['products_bought'] = list(self._products[cid])
+        return entry
+
+    def top(self, n=5):
+        """
+        Returns: the first n (cid, entry) items, as customer_analysis() order
+        """
+
+        top = heapq.nlargest(n, self._agg.customers.items(), key=lambda x: x[1][0])
+        self.prefetch([cid for cid, _ in top])
+        return [(cid, self[cid]) for cid, _ in top]
+
+    def prefetch(self, cids):
+        """
+        Builds products_bought for several customers in a single scan
+        """
+
+        missing = set()
+        for cid in cids:
+            if cid in self._products:
+                continue
+            products = self._agg.customers[cid][2]
+            if products is not None:
+                self._products[cid] = products
+            else:
+                missing.add(cid)
+
+        if not missing:
+            return
+
+        if self._transactions is None:
+            raise ValueError("products_bought needs the transactions or a tracking aggregator")
+
+        found = {cid: set() for cid in missing}
+
+        if isinstance(self._transactions, TransactionTable):
+            table = self._transactions
+            codes = {table.customer_ids.code_of(cid): found[cid] for cid in missing}
+            names = table.product_names.values
+            for cid_code, name_code in set(zip(table.customer_ids.codes, table.product_names.codes)):
+                products = codes.get(cid_code)
+                if products is not None:
+                    products.add(names[name_code])
+        else:
+            for tx in self._transactions:
+                products = found.get(tx['CustomerID'])
+                if products is not None:
+                    products.add(tx['ProductName'])
+
+        self._products.update(found)
+
+
+@instrumented()
+def daily_sales_trend(transactions):
+    """
+    Task 2.2 (a)
+    Analyzes sales trends by date
+    """
 
-    for tx in transactions:
-        name = tx['ProductName']
-        qty = tx['Quantity']
-        revenue = qty * tx['UnitPrice']
+    return aggregate_sales(transactions).daily_sales_trend()
 
-        if name not in product_data:
-            product_data[name] = {
-                'quantity': 0,
-                'revenue': 0.0
-            }
 
-        product_data[name]['quantity'] += qty
-        product_data[name]['revenue'] += revenue
+@instrumented()
+def find_peak_sales_day(transactions):
+    """
+    Task 2.2 (b)
+    Identifies the date with highest revenue
+    """
+
+    return aggregate_sales(transactions).find_peak_sales_day()
 
-    low_products = [
-        (name, data['quantity'], data['revenue'])
-        for name, data in product_data.items()
-        if data['quantity'] < threshold
-    ]
 
-    low_products.sort(key=lambda x: x[1])
+@instrumented()
+def low_performing_products(transactions, threshold=10):
+    """
+    Task 2.3 (a)
+    Identifies products with low sales
+    """
 
-    return low_products
+    return aggregate_sales(transactions).low_performing_products(threshold)
@@ -0,0 +1,329 @@
+import mmap
+import sys
+from array import array
+
+from utils.instrumentation import instrumented
+from utils.storage import atomic_write, read_header, write_blocks
+from utils.transaction_table import EncodedColumn, TransactionTable
+
+
+BASE_FIELDS = (
+    'TransactionID', 'Date', 'ProductID', 'ProductName',
+    'Quantity', 'UnitPrice', 'CustomerID', 'Region'
+)
+API_FIELDS = ('API_Category', 'API_Brand', 'API_Rating', 'API_Match')
+ENRICHED_FIELDS = BASE_FIELDS + API_FIELDS
+
+BATCH_ROWS = 10000
+WRITE_BUFFER = 1 << 20
+
+COLUMNAR_MAGIC = b'SACOL1\n\0'
+
+
+@instrumented()
+def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data.txt'):
+    """
+    Saves enriched transactions back to file
+
+    Rows are formatted in batches and written with one large write per
+    batch through a 1 MB buffer. For an EnrichedTransactions view the API
+    columns are formatted once per distinct ProductID.
+    """
+
+    header = '|'.join(ENRICHED_FIELDS) + '\n'
+
+    with open(filename, 'w', encoding='utf-8', buffering=WRITE_BUFFER) as file:
+        file.write(header)
+
+        for batch in _iter_text_batches(enriched_transactions):
+            file.write(''.join(batch))
+
+
+def _iter_text_batches(enriched_transactions):
+    """
+    Yields: lists of up to BATCH_ROWS formatted lines
+    """
+
+    join_index = getattr(enriched_transactions, 'join_index', None)
+
+    if join_index is None:
+        rows = (
+            '|'.join([str(tx.get(field, '')) for field in ENRICHED_FIELDS]) + '\n'
+            for tx in enriched_transactions
+        )
+    elif isinstance(enriched_transactions.transactions, TransactionTable):
+        rows = _table_text_rows(enriched_transactions.transactions, join_index)
+    else:
+        suffixes = {pid: _api_suffix(fields) for pid, fields in join_index.items()}
+        rows = (
+            '|'.join([str(tx.get(field, '')) for field in BASE_FIELDS])
+            + suffixes[tx.get('ProductID', '')]
+            for tx in enriched_transactions.transactions
+        )
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_ROWS:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def _api_suffix(fields):
+    return '|' + '|'.join([str(fields[field]) for field in API_FIELDS]) + '\n'
+
+
+def _table_text_rows(table, join_index):
+    """
+    Yields: formatted lines straight from the table columns
+    """
+
+    suffixes = [_api_suffix(join_index[pid]) for pid in table.product_ids.values]
+
+    dates = table.dates.values
+    product_ids = table.product_ids.values
+    names = table.product_names.values
+    customers = table.customer_ids.values
+    regions = table.regions.values
+
+    for tid, d, p, n, qty, price, c, r in zip(
+            table.transaction_ids, table.dates.codes, table.product_ids.codes,
+            table.product_names.codes, table.quantities, table.unit_prices,
+            table.customer_ids.codes, table.regions.codes):
+        yield (
+            f"{tid}|{dates[d]}|{product_ids[p]}|{names[n]}|{qty}|{price}|"
+            f"{customers[c]}|{regions[r]}{suffixes[p]}"
+        )
+
+
+# Binary columnar format
+@instrumented()
+def save_enriched_columnar(enriched_transactions, filename='data/enriched_sales_data.sacol'):
+    """
+    Saves enriched transactions in a compact binary columnar layout
+
+    File layout: magic, 8-byte header length, JSON header, then one
+    8-byte aligned block per column. Quantity and UnitPrice are raw int64 /
+    float64 arrays, text and API columns are int64 dictionary codes with
+    their values in the header, and TransactionID is a UTF-8 blob with
+    int64 offsets. load_enriched_columnar maps the file back without
+    parsing any rows. The file is replaced atomically, so a reader that
+    still maps the previous version is not affected.
+    """
+
+    table, api_columns = _enriched_columns(enriched_transactions)
+
+    blocks = []
+    columns = []
+
+    def add_block(data):
+        blocks.append(data)
+        return len(blocks) - 1
+
+    ids = [tid.encode('utf-8') for tid in table.transaction_ids]
+    offsets = array('q', [0])
+    for encoded in ids:
+        offsets.append(offsets[-1] + len(encoded))
+
+    columns.append({
+        'name': 'TransactionID', 'kind': 'utf8',
+        'offsets': add_block(offsets.tobytes()), 'data': add_block(b''.join(ids))
+    })
+
+    encoded_columns = {
+        'Date': table.dates,
+        'ProductID': table.product_ids,
+        'ProductName': table.product_names,
+        'CustomerID': table.customer_ids,
+        'Region': table.regions
+    }
+    encoded_columns.update(api_columns)
+
+    for name in ENRICHED_FIELDS[1:]:
+        if name == 'Quantity':
+            columns.append({'name': name, 'kind': 'i64', 'data': add_block(table.quantities.tobytes())})
+        elif name == 'UnitPrice':
+            columns.append({'name': name, 'kind': 'f64', 'data': add_block(table.unit_prices.tobytes())})
+        else:
+            column = encoded_columns[name]
+            columns.append({
+                'name': name, 'kind': 'dict', 'values': column.values,
+                'data': add_block(array('q', column.codes).tobytes())
+            })
+
+    header = {
+        'rows': len(table),
+        'byteorder': sys.byteorder,
+        'columns': columns
+    }
+
+    with atomic_write(filename, 'wb', buffering=WRITE_BUFFER) as file:
+        write_blocks(file, COLUMNAR_MAGIC, header, blocks)
+
+
+def _enriched_columns(enriched_transactions):
+    """
+    Returns: (TransactionTable, dict of API field -> EncodedColumn)
+    """
+
+    join_index = getattr(enriched_transactions, 'join_index', None)
+
+    if join_index is None:
+        rows = list(enriched_transactions)
+        table = TransactionTable.from_dicts(rows)
+        api_columns = {field: EncodedColumn() for field in API_FIELDS}
+        for tx in rows:
+            for field in API_FIELDS:
+                api_columns[field].append(tx.get(field))
+        return table, api_columns
+
+    table = enriched_transactions.transactions
+    if not isinstance(table, TransactionTable):
+        table = TransactionTable.from_dicts(table)
+
+    # API values are per ProductID, so their codes are the ProductID codes
+    api_columns = {}
+    for field in API_FIELDS:
+        column = EncodedColumn()
+        column.codes = table.product_ids.codes
+        column.values = [join_index[pid][field] for pid in table.product_ids.values]
+        api_columns[field] = column
+
+    return table, api_columns
+
+
+class EnrichedColumnarFile:
+    """
+    Memory-mapped reader for save_enriched_columnar files
+
+    Numeric columns and dictionary codes are exposed as memoryviews over
+    the mapping, so nothing is parsed or copied until rows are read. They
+    are released by close(); use them (or copy them) while the file is open.
+    """
+
+    def __init__(self, filename):
+        self._views = []
+        self._cache = {}
+        self._file = open(filename, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+        layout = read_header(self._map, COLUMNAR_MAGIC)
+        if layout is None:
+            self.close()
+            raise ValueError(f"{filename} is not an enriched columnar file")
+
+        self.header, self.data_start = layout
+        if self.header['byteorder'] != sys.byteorder:
+            self.close()
+            raise ValueError("columnar file was written with a different byte order")
+
+        self.rows = self.header['rows']
+        self._columns = {column['name']: column for column in self.header['columns']}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.rows
+
+    def close(self):
+        """
+        Releases every column view handed out and unmaps the file; calling
+        it again does nothing. A view the caller derived from a column (a
+        slice or cast of it) keeps the mapping alive until it is dropped.
+        """
+
+        if self._map is None:
+            return
+
+        self._cache.clear()
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._view.release()
+
+        try:
+            self._map.close()
+        except BufferError:
+            # Unmapped once the caller's derived views are gone
+            pass
+
+        self._map = None
+        self._file.close()
+
+    def _block(self, index, fmt=None):
+        position, length = self.header['blocks'][index]
+        position += self.data_start
+        block = self._view[position:position + length]
+        self._views.append(block)
+
+        if fmt:
+            block = block.cast(fmt)
+            self._views.append(block)
+        return block
+
+    def column(self, name):
+        """
+        Returns: memoryview for Quantity/UnitPrice, memoryview of codes for
+        dictionary columns, list of strings for TransactionID
+        """
+
+        if name not in self._cache:
+            column = self._columns[name]
+            kind = column['kind']
+
+            if kind == 'i64':
+                self._cache[name] = self._block(column['data'], 'q')
+            elif kind == 'f64':
+                self._cache[name] = self._block(column['data'], 'd')
+            elif kind == 'dict':
+                self._cache[name] = self._block(column['data'], 'q')
+            else:
+                offsets = self._block(column['offsets'], 'q')
+                data = self._block(column['data'])
+                self._cache[name] = [
+                    str(data[offsets[i]:offsets[i + 1]], 'utf-8') for i in range(self.rows)
+                ]
+
+        return self._cache[name]
+
+    def values(self, name):
+        """
+        Returns: dictionary values of an encoded column
+        """
+
+        return self._columns[name]['values']
+
+    def row(self, row):
+        tx = {}
+        for name in ENRICHED_FIELDS:
+            column = self.column(name)
+            if self._columns[name]['kind'] == 'dict':
+                tx[name] = self._columns[name]['values'][column[row]]
+            else:
+                tx[name] = column[row]
+        return tx
+
+    def __iter__(self):
+        for row in range(self.rows):
+            yield self.row(row)
+
+    def to_dicts(self):
+        return list(self)
+
+
+def load_enriched_columnar(filename='data/enriched_sales_data.sacol'):
+    """
+    Opens a file written by save_enriched_columnar
+
+    Returns: EnrichedColumnarFile (use as a context manager or close() it)
+    """
+
+    return EnrichedColumnarFile(filename)
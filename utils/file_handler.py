@@ -1,172 +1,561 @@
-# Task 1.1 
-def read_sales_data(filename):
-    """
-    Reads sales data from file handling encoding issues
-
-    Returns: list of raw lines (strings)
-    """
-
-    encodings = ['utf-8', 'latin-1', 'cp1252']
-    lines = []
-
-    for encoding in encodings:
-        try:
-            with open(filename, 'r', encoding=encoding) as file:
-                all_lines = file.readlines()
-
-                # Skip header and empty lines
-                for line in all_lines[1:]:
-                    line = line.strip()
-                    if line:
-                        lines.append(line)
-
-                return lines
-
-        except UnicodeDecodeError:
-            continue
-
-        except FileNotFoundError:
-            print(f"Error: File '{filename}' not found.")
-            return []
-
-    print("Error: Unable to read file with supported encodings.")
-    return []
-
-# Task 1.2
-def parse_transactions(raw_lines):
-    """
-    Parses raw lines into clean list of dictionaries
-
-    Returns: list of dictionaries with keys:
-    ['TransactionID', 'Date', 'ProductID', 'ProductName',
-     'Quantity', 'UnitPrice', 'CustomerID', 'Region']
-    """
-
-    transactions = []
-
-    for line in raw_lines:
-        parts = line.split('|')
-
-        # Skip rows with incorrect number of fields
-        if len(parts) != 8:
-            continue
-
-        try:
-            transaction_id = parts[0]
-            date = parts[1]
-            product_id = parts[2]
-
-            # Remove commas from ProductName
-            product_name = parts[3].replace(',', '').strip()
-
-            # Remove commas and convert numeric fields
-            quantity = int(parts[4].replace(',', '').strip())
-            unit_price = float(parts[5].replace(',', '').strip())
-
-            customer_id = parts[6]
-            region = parts[7]
-
-            transactions.append({
-                'TransactionID': transaction_id,
-                'Date': date,
-                'ProductID': product_id,
-                'ProductName': product_name,
-                'Quantity': quantity,
-                'UnitPrice': unit_price,
-                'CustomerID': customer_id,
-                'Region': region
-            })
-
-        except ValueError:
-            # Skip rows with conversion errors
-            continue
-
-    return transactions
-
-
-# Task 1.3
-def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
-    """
-    Validates transactions and applies optional filters
-
-    Returns:
-    (valid_transactions, invalid_count, filter_summary)
-    """
-
-    total_input = len(transactions)
-    invalid_count = 0
-    valid_transactions = []
-
-    # Validation 
-    for tx in transactions:
-        try:
-            if tx['Quantity'] <= 0:
-                raise ValueError
-            if tx['UnitPrice'] <= 0:
-                raise ValueError
-            if not tx['TransactionID'].startswith('T'):
-                raise ValueError
-            if not tx['ProductID'].startswith('P'):
-                raise ValueError
-            if not tx['CustomerID'].startswith('C'):
-                raise ValueError
-            if not tx['Region']:
-                raise ValueError
-
-            valid_transactions.append(tx)
-
-        except Exception:
-            invalid_count += 1
-
-    # Display available regions 
-    regions = sorted({tx['Region'] for tx in valid_transactions})
-    print("Available Regions:", regions)
-
-    # Display transaction amount range 
-    amounts = [tx['Quantity'] * tx['UnitPrice'] for tx in valid_transactions]
-    min_tx_amount = min(amounts)
-    max_tx_amount = max(amounts)
-    print(f"Transaction Amount Range: {min_tx_amount} - {max_tx_amount}")
-
-    filtered_by_region = 0
-    filtered_by_amount = 0
-
-    # Region filter
-    if region:
-        before = len(valid_transactions)
-        valid_transactions = [
-            tx for tx in valid_transactions if tx['Region'] == region
-        ]
-        filtered_by_region = before - len(valid_transactions)
-        print(f"Records after region filter: {len(valid_transactions)}")
-
-    # Amount filter
-    if min_amount is not None or max_amount is not None:
-        before = len(valid_transactions)
-        filtered = []
-
-        for tx in valid_transactions:
-            amount = tx['Quantity'] * tx['UnitPrice']
-
-            if min_amount is not None and amount < min_amount:
-                continue
-            if max_amount is not None and amount > max_amount:
-                continue
-
-            filtered.append(tx)
-
-        valid_transactions = filtered
-        filtered_by_amount = before - len(valid_transactions)
-        print(f"Records after amount filter: {len(valid_transactions)}")
-
-    # Summary
-    filter_summary = {
-        'total_input': total_input,
-        'invalid': invalid_count,
-        'filtered_by_region': filtered_by_region,
-        'filtered_by_amount': filtered_by_amount,
-        'final_count': len(valid_transactions)
-    }
-
-    return valid_transactions, invalid_count, filter_summary
-
+from itertools import compress
+
+from utils.id_index import TransactionIDIndex
+from utils.instrumentation import instrumented
+from utils.mmap_reader import ENCODINGS, detect_encoding, sample_file, split_lines
+from utils.transaction_table import INT64_MAX, INT64_MIN, TransactionTable
+
+
+TRANSACTION_FIELDS = (
+    'TransactionID', 'Date', 'ProductID', 'ProductName',
+    'Quantity', 'UnitPrice', 'CustomerID', 'Region'
+)
+
+# Bumped whenever the validation or duplicate rules change, so results
+# persisted from validated rows (the rollup cube) are not reused
+VALIDATION_VERSION = 2
+
+# validate_and_filter deduplicates with a plain set below this many IDs;
+# TransactionIDIndex is much slower per ID and only its smaller footprint
+# (about 20 bytes less per ID) pays off for inputs this large
+DEDUP_INDEX_THRESHOLD = 1_000_000
+
+
+# Task 1.1 
+@instrumented()
+def read_sales_data(filename):
+    """
+    Reads sales data from file handling encoding issues
+
+    Returns: list of raw lines (strings)
+    """
+
+    encodings = ['utf-8', 'latin-1', 'cp1252']
+    lines = []
+
+    # Detect the encoding once from a sample so the full read normally
+    # happens a single time; later encodings remain as a fallback
+    try:
+        detected = detect_encoding(sample_file(filename), encodings)
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        return []
+
+    if detected is not None:
+        encodings = encodings[encodings.index(detected):]
+
+    for encoding in encodings:
+        try:
+            with open(filename, 'r', encoding=encoding) as file:
+                all_lines = file.readlines()
+
+                # Skip header and empty lines
+                for line in all_lines[1:]:
+                    line = line.strip()
+                    if line:
+                        lines.append(line)
+
+                return lines
+
+        except UnicodeDecodeError:
+            continue
+
+        except FileNotFoundError:
+            print(f"Error: File '{filename}' not found.")
+            return []
+
+    print("Error: Unable to read file with supported encodings.")
+    return []
+
+# Task 1.2
+@instrumented()
+def parse_transactions(raw_lines, columnar=False):
+    """
+    Parses raw lines into clean list of dictionaries
+
+    Returns: list of dictionaries with keys:
+    ['TransactionID', 'Date', 'ProductID', 'ProductName',
+     'Quantity', 'UnitPrice', 'CustomerID', 'Region']
+    or a TransactionTable with the same rows when columnar=True
+    """
+
+    if columnar:
+        # Whole columns are encoded at once, faster than appending rows
+        rows = []
+        for line in raw_lines:
+            fields = _parse_fields(line)
+            if fields is not None:
+                rows.append(fields)
+        return TransactionTable.from_columns(*zip(*rows)) if rows else TransactionTable()
+
+    transactions = []
+
+    for line in raw_lines:
+        tx = _parse_line(line)
+        if tx is not None:
+            transactions.append(tx)
+
+    return transactions
+
+
+def _parse_line(line):
+    """
+    Parses a single raw line
+
+    Returns: transaction dictionary, or None for rows with an incorrect
+    number of fields or conversion errors
+    """
+
+    fields = _parse_fields(line)
+    if fields is None:
+        return None
+
+    return dict(zip(TRANSACTION_FIELDS, fields))
+
+
+def _parse_fields(line):
+    """
+    Splits and converts a single raw line
+
+    Returns: tuple of field values in TRANSACTION_FIELDS order, or None
+    """
+
+    parts = line.split('|')
+
+    # Skip rows with incorrect number of fields
+    if len(parts) != 8:
+        return None
+
+    try:
+        # Remove commas from ProductName
+        product_name = parts[3].replace(',', '').strip()
+
+        # Remove commas and convert numeric fields
+        quantity = int(parts[4].replace(',', '').strip())
+        unit_price = float(parts[5].replace(',', '').strip())
+
+    except ValueError:
+        # Skip rows with conversion errors
+        return None
+
+    # Quantities must fit the int64 columns of TransactionTable and the
+    # columnar files
+    if not INT64_MIN <= quantity <= INT64_MAX:
+        return None
+
+    return (
+        parts[0], parts[1], parts[2], product_name,
+        quantity, unit_price, parts[6], parts[7]
+    )
+
+
+# Task 1.3
+@instrumented()
+def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None,
+                        amount_index=None, dedup=True):
+    """
+    Validates transactions and applies optional filters
+
+    amount_index: optional AmountIndex built for these transactions; when
+    given, the amount range and the min/max filters come from the index
+
+    dedup: drop valid rows whose TransactionID was already seen, keeping
+    the first one (True), or not (False); a TransactionIDIndex also counts
+    IDs seen in earlier calls or runs as duplicates
+
+    Returns:
+    (valid_transactions, invalid_count, filter_summary)
+    A TransactionTable input gives a TransactionTable of valid rows
+    """
+
+    if isinstance(transactions, TransactionTable):
+        return _validate_and_filter_table(transactions, region, min_amount, max_amount,
+                                          amount_index, dedup)
+
+    total_input = len(transactions)
+
+    # Validation 
+    valid_rows = [row for row, tx in enumerate(transactions) if _is_valid(tx)]
+    invalid_count = total_input - len(valid_rows)
+
+    # Duplicate TransactionIDs
+    duplicates = 0
+    if dedup is not False:
+        before = len(valid_rows)
+        transaction_ids = [transactions[row]['TransactionID'] for row in valid_rows]
+        valid_rows = _first_occurrences(valid_rows, transaction_ids, dedup)
+        duplicates = before - len(valid_rows)
+        if duplicates:
+            print(f"Duplicate TransactionIDs removed: {duplicates}")
+
+    # Display available regions 
+    regions = sorted({transactions[row]['Region'] for row in valid_rows})
+    print("Available Regions:", regions)
+
+    # Amounts are computed once and shared by the range display and filter
+    if amount_index is not None:
+        amounts = amount_index.amounts
+    else:
+        amounts = [None] * total_input
+        for row in valid_rows:
+            tx = transactions[row]
+            amounts[row] = tx['Quantity'] * tx['UnitPrice']
+
+    # Display transaction amount range 
+    min_tx_amount, max_tx_amount = _amount_range(valid_rows, amounts, amount_index)
+    print(f"Transaction Amount Range: {min_tx_amount} - {max_tx_amount}")
+
+    filtered_by_region = 0
+    filtered_by_amount = 0
+
+    # Region filter
+    if region:
+        before = len(valid_rows)
+        valid_rows = [
+            row for row in valid_rows if transactions[row]['Region'] == region
+        ]
+        filtered_by_region = before - len(valid_rows)
+        print(f"Records after region filter: {len(valid_rows)}")
+
+    # Amount filter
+    if min_amount is not None or max_amount is not None:
+        before = len(valid_rows)
+        valid_rows = _filter_amount_rows(valid_rows, amounts, amount_index, min_amount, max_amount)
+        filtered_by_amount = before - len(valid_rows)
+        print(f"Records after amount filter: {len(valid_rows)}")
+
+    valid_transactions = [transactions[row] for row in valid_rows]
+
+    # Summary
+    filter_summary = {
+        'total_input': total_input,
+        'invalid': invalid_count,
+        'duplicates': duplicates,
+        'filtered_by_region': filtered_by_region,
+        'filtered_by_amount': filtered_by_amount,
+        'final_count': len(valid_transactions)
+    }
+
+    return valid_transactions, invalid_count, filter_summary
+
+
+def _amount_range(rows, amounts, amount_index=None):
+    """
+    Returns: (min, max) amount over the given rows
+    """
+
+    if amount_index is not None:
+        mask = bytearray(len(amounts))
+        for row in rows:
+            mask[row] = 1
+        return amount_index.min_max(mask)
+
+    row_amounts = [amounts[row] for row in rows]
+    return min(row_amounts), max(row_amounts)
+
+
+def _filter_amount_rows(rows, amounts, amount_index, min_amount, max_amount):
+    """
+    Keeps the rows with min_amount <= amount <= max_amount, in row order
+
+    With an index, the in-range rows are a bisect and a slice; they are
+    intersected with rows when that slice is the smaller side.
+    """
+
+    if amount_index is not None:
+        in_range = amount_index.range_rows(min_amount, max_amount)
+
+        if len(in_range) < len(rows):
+            keep = bytearray(len(amounts))
+            for row in rows:
+                keep[row] = 1
+            return sorted(row for row in in_range if keep[row])
+
+    return [
+        row for row in rows
+        if not (min_amount is not None and amounts[row] < min_amount)
+        and not (max_amount is not None and amounts[row] > max_amount)
+    ]
+
+
+def _first_occurrences(rows, transaction_ids, dedup):
+    """
+    Keeps the rows whose TransactionID (transaction_ids[i] for rows[i])
+    has not been seen before, in row order
+
+    dedup: True for a set, or a fresh TransactionIDIndex sized for these
+    IDs from DEDUP_INDEX_THRESHOLD IDs on, or a TransactionIDIndex that
+    remembers them across calls
+    """
+
+    if dedup is True and len(transaction_ids) < DEDUP_INDEX_THRESHOLD:
+        seen = set()
+        new = [not (tid in seen or seen.add(tid)) for tid in transaction_ids]
+    else:
+        id_index = TransactionIDIndex(len(transaction_ids)) if dedup is True else dedup
+        new = id_index.add_many(transaction_ids)
+
+    if all(new):
+        return rows
+    return list(compress(rows, new))
+
+
+def _is_valid(tx):
+    """
+    Checks a parsed transaction against the validation rules
+    """
+
+    try:
+        if tx['Quantity'] <= 0:
+            raise ValueError
+        if tx['UnitPrice'] <= 0:
+            raise ValueError
+        if not tx['TransactionID'].startswith('T'):
+            raise ValueError
+        if not tx['ProductID'].startswith('P'):
+            raise ValueError
+        if not tx['CustomerID'].startswith('C'):
+            raise ValueError
+        if not tx['Region']:
+            raise ValueError
+
+    except Exception:
+        return False
+
+    return True
+
+
+def _validate_and_filter_table(table, region=None, min_amount=None, max_amount=None,
+                               amount_index=None, dedup=True):
+    """
+    validate_and_filter for a TransactionTable
+
+    The prefix checks on ProductID and CustomerID and the Region check run
+    once per distinct value instead of once per row
+    """
+
+    total_input = len(table)
+
+    valid_product = [p.startswith('P') for p in table.product_ids.values]
+    valid_customer = [c.startswith('C') for c in table.customer_ids.values]
+    valid_region = [bool(r) for r in table.regions.values]
+
+    product_codes = table.product_ids.codes
+    customer_codes = table.customer_ids.codes
+    region_codes = table.regions.codes
+    quantities = table.quantities
+    unit_prices = table.unit_prices
+    amounts = table.amounts
+
+    valid_rows = [
+        row for row, tid in enumerate(table.transaction_ids)
+        if quantities[row] > 0
+        and unit_prices[row] > 0
+        and tid.startswith('T')
+        and valid_product[product_codes[row]]
+        and valid_customer[customer_codes[row]]
+        and valid_region[region_codes[row]]
+    ]
+    invalid_count = total_input - len(valid_rows)
+
+    # Duplicate TransactionIDs
+    duplicates = 0
+    if dedup is not False:
+        before = len(valid_rows)
+        transaction_ids = table.transaction_ids
+        valid_rows = _first_occurrences(valid_rows, [transaction_ids[row] for row in valid_rows], dedup)
+        duplicates = before - len(valid_rows)
+        if duplicates:
+            print(f"Duplicate TransactionIDs removed: {duplicates}")
+
+    # Display available regions 
+    regions = sorted({table.regions.values[region_codes[row]] for row in valid_rows})
+    print("Available Regions:", regions)
+
+    # Display transaction amount range 
+    min_tx_amount, max_tx_amount = _amount_range(valid_rows, amounts, amount_index)
+    print(f"Transaction Amount Range: {min_tx_amount} - {max_tx_amount}")
+
+    filtered_by_region = 0
+    filtered_by_amount = 0
+
+    # Region filter
+    if region:
+        before = len(valid_rows)
+        code = table.regions.code_of(region)
+        valid_rows = [row for row in valid_rows if region_codes[row] == code]
+        filtered_by_region = before - len(valid_rows)
+        print(f"Records after region filter: {len(valid_rows)}")
+
+    # Amount filter
+    if min_amount is not None or max_amount is not None:
+        before = len(valid_rows)
+        valid_rows = _filter_amount_rows(valid_rows, amounts, amount_index, min_amount, max_amount)
+        filtered_by_amount = before - len(valid_rows)
+        print(f"Records after amount filter: {len(valid_rows)}")
+
+    filter_summary = {
+        'total_input': total_input,
+        'invalid': invalid_count,
+        'duplicates': duplicates,
+        'filtered_by_region': filtered_by_region,
+        'filtered_by_amount': filtered_by_amount,
+        'final_count': len(valid_rows)
+    }
+
+    return table.take(valid_rows), invalid_count, filter_summary
+
+
+# Streaming mode
+STREAM_CHUNK = 1 << 20
+
+
+def iter_sales_data(filename, chunk_size=STREAM_CHUNK):
+    """
+    Streaming counterpart of read_sales_data
+
+    The file is read once, in binary chunks cut after their last newline,
+    and each chunk is decoded with the encoding detected from a sample.
+    A chunk that does not decode falls back to the next encoding, which
+    is then kept for the rest of the file; lines already yielded keep
+    the encoding they were read with.
+
+    Yields: raw lines (strings), header and empty lines skipped
+    """
+
+    try:
+        encoding = detect_encoding(sample_file(filename))
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        return
+
+    encodings = list(ENCODINGS[ENCODINGS.index(encoding):]) if encoding else []
+    header = True
+
+    with open(filename, 'rb') as file:
+        pending = b''
+
+        while True:
+            chunk = file.read(chunk_size)
+            data = pending + chunk
+            end = len(data) if not chunk else data.rfind(b'\n') + 1
+            data, pending = data[:end], data[end:]
+            if not data:
+                if chunk:
+                    continue
+                return
+
+            text = None
+            while encodings and text is None:
+                try:
+                    text = data.decode(encodings[0])
+                except UnicodeDecodeError:
+                    encodings.pop(0)
+
+            if text is None:
+                print("Error: Unable to read file with supported encodings.")
+                return
+
+            lines = split_lines(text)
+            if header:
+                # Skip header
+                lines = lines[1:]
+                header = False
+
+            for line in lines:
+                line = line.strip()
+                if line:
+                    yield line
+
+
+def iter_transactions(raw_lines):
+    """
+    Streaming counterpart of parse_transactions
+
+    Yields: transaction dictionaries, rows that fail to parse skipped
+    """
+
+    for line in raw_lines:
+        tx = _parse_line(line)
+        if tx is not None:
+            yield tx
+
+
+def iter_valid_transactions(transactions, filter_summary, region=None, min_amount=None, max_amount=None,
+                            dedup=True):
+    """
+    Streaming counterpart of validate_and_filter
+
+    filter_summary is updated in place as rows go through, so its counts
+    are complete once the generator is exhausted
+
+    dedup: True keeps the TransactionIDs seen so far in a compact
+    TransactionIDIndex (integer keys, not strings); pass an index to share
+    it across streams or runs, or False to keep duplicates
+
+    Yields: transactions that pass validation and the optional filters
+    """
+
+    id_index = None
+    if dedup is True:
+        id_index = TransactionIDIndex()
+    elif dedup is not False:
+        id_index = dedup
+
+    filter_summary.update({
+        'total_input': 0,
+        'invalid': 0,
+        'duplicates': 0,
+        'filtered_by_region': 0,
+        'filtered_by_amount': 0,
+        'final_count': 0
+    })
+    check_amount = min_amount is not None or max_amount is not None
+
+    for tx in transactions:
+        filter_summary['total_input'] += 1
+
+        if not _is_valid(tx):
+            filter_summary['invalid'] += 1
+            continue
+
+        if id_index is not None and not id_index.add(tx['TransactionID']):
+            filter_summary['duplicates'] += 1
+            continue
+
+        if region and tx['Region'] != region:
+            filter_summary['filtered_by_region'] += 1
+            continue
+
+        if check_amount:
+            amount = tx['Quantity'] * tx['UnitPrice']
+
+            if (min_amount is not None and amount < min_amount) or \
+                    (max_amount is not None and amount > max_amount):
+                filter_summary['filtered_by_amount'] += 1
+                continue
+
+        filter_summary['final_count'] += 1
+        yield tx
+
+
+def stream_transactions(filename, region=None, min_amount=None, max_amount=None, dedup=True):
+    """
+    Chains iter_sales_data, iter_transactions and iter_valid_transactions
+    so rows flow one at a time from the file into the aggregators
+
+    Returns: (generator of valid transactions, filter_summary)
+    filter_summary is filled in as the generator is consumed
+    """
+
+    filter_summary = {}
+    valid = iter_valid_transactions(
+        iter_transactions(iter_sales_data(filename)),
+        filter_summary,
+        region=region,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        dedup=dedup
+    )
+
+    return valid, filter_summary
@@ -0,0 +1,495 @@
+import math
+import mmap
+import os
+import sys
+from array import array
+
+from utils.storage import atomic_write, read_header, write_blocks
+
+
+MASK64 = (1 << 64) - 1
+# Multipliers for Fibonacci hashing / the second Bloom hash
+GOLDEN = 0x9E3779B97F4A7C15
+SECOND = 0xC2B2AE3D27D4EB4F
+
+# 'T' + up to 17 digits fits in a positive int64 together with the digit count
+MAX_DIGITS = 17
+MIN_BITS = 10
+
+# Scalable Bloom filter: first filter size and growth of each next one
+BLOOM_START = 1 << 20
+BLOOM_GROWTH = 4
+
+INDEX_MAGIC = b'SAIDX1\n\0'
+
+
+def encode_transaction_id(transaction_id):
+    """
+    Packs a TransactionID of the form 'T' + ASCII digits into one
+    positive integer: the number shifted left by 5 bits plus the digit
+    count, so 'T7', 'T07' and 'T007' stay distinct
+
+    Returns: integer key, or None for IDs of any other form
+    """
+
+    digits = transaction_id[1:]
+    if transaction_id[:1] != 'T' or not 0 < len(digits) <= MAX_DIGITS:
+        return None
+    if not (digits.isascii() and digits.isdigit()):
+        return None
+    return int(digits) << 5 | len(digits)
+
+
+def decode_transaction_id(key):
+    """
+    Returns: the TransactionID encode_transaction_id() packed into key
+    """
+
+    return f"T{key >> 5:0{key & 31}d}"
+
+
+def _slot(key, shift):
+    return ((key * GOLDEN) & MASK64) >> shift
+
+
+def _find(slots, key, shift, mask):
+    """
+    Linear probe for key in an open-addressing table
+
+    Returns: (slot, True) where key is stored, or (first empty slot, False)
+    """
+
+    slot = _slot(key, shift)
+    while True:
+        current = slots[slot]
+        if current == key:
+            return slot, True
+        if not current:
+            return slot, False
+        slot = (slot + 1) & mask
+
+
+class IntHashSet:
+    """
+    Open-addressing hash set of positive 64-bit integers
+
+    All keys live in one array('q') of 2**bits slots (0 marks an empty
+    slot) kept at most 3/4 full, i.e. 11-21 bytes per key against roughly
+    60-90 for a Python set of ints. Slots are found by Fibonacci hashing
+    and linear probing. The slot array is also the on-disk form, see
+    TransactionIDIndex.save.
+    """
+
+    def __init__(self, capacity=0):
+        bits = MIN_BITS
+        while (3 << bits) // 4 < capacity:
+            bits += 1
+        self._allocate(bits)
+        self.count = 0
+
+    def _allocate(self, bits):
+        self.bits = bits
+        self.shift = 64 - bits
+        self.mask = (1 << bits) - 1
+        self.limit = (3 << bits) // 4
+        self.slots = array('q', bytes(8 << bits))
+
+    @classmethod
+    def from_slots(cls, slots, count):
+        """
+        Wraps an existing slot table (an array('q'), or a read-only
+        memoryview for lookups only) holding count keys
+        """
+
+        table = cls.__new__(cls)
+        table.bits = len(slots).bit_length() - 1
+        table.shift = 64 - table.bits
+        table.mask = len(slots) - 1
+        table.limit = (3 << table.bits) // 4
+        table.slots = slots
+        table.count = count
+        return table
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key):
+        return _find(self.slots, key, self.shift, self.mask)[1]
+
+    def __iter__(self):
+        return (key for key in self.slots if key)
+
+    def add(self, key):
+        """
+        Returns: True if key was added, False if it was already present
+        """
+
+        slot, found = _find(self.slots, key, self.shift, self.mask)
+        if found:
+            return False
+
+        self.slots[slot] = key
+        self.count += 1
+        if self.count > self.limit:
+            self._grow()
+        return True
+
+    def _grow(self):
+        old = self.slots
+        self._allocate(self.bits + 1)
+
+        slots, shift, mask = self.slots, self.shift, self.mask
+        for key in old:
+            if key:
+                slot = _slot(key, shift)
+                while slots[slot]:
+                    slot = (slot + 1) & mask
+                slots[slot] = key
+
+    def memory_bytes(self):
+        return len(self.slots) * 8
+
+
+class BloomFilter:
+    """
+    Bloom filter over positive integer keys
+
+    Sized for capacity keys at the given false positive rate; the bit
+    positions come from two multiplicative hashes (double hashing).
+    """
+
+    def __init__(self, capacity, error=0.01, size=None, hashes=None, bits=None, count=0):
+        self.capacity = max(int(capacity), 1)
+        self.error = error
+        self.size = size or max(8, math.ceil(-self.capacity * math.log(error) / math.log(2) ** 2))
+        self.hashes = hashes or max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.size + 7) // 8)
+        self.count = count
+
+    def add(self, key):
+        """
+        Returns: True if key was certainly not in the filter before
+        """
+
+        bits, size = self.bits, self.size
+        position = (key * GOLDEN) & MASK64
+        step = ((key * SECOND) & MASK64) | 1
+
+        new = False
+        for _ in range(self.hashes):
+            bit = position % size
+            byte, mask = bit >> 3, 1 << (bit & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                new = True
+            position = (position + step) & MASK64
+
+        self.count += new
+        return new
+
+    def __contains__(self, key):
+        bits, size = self.bits, self.size
+        position = (key * GOLDEN) & MASK64
+        step = ((key * SECOND) & MASK64) | 1
+
+        for _ in range(self.hashes):
+            bit = position % size
+            if not bits[bit >> 3] & (1 << (bit & 7)):
+                return False
+            position = (position + step) & MASK64
+        return True
+
+    def memory_bytes(self):
+        return len(self.bits)
+
+
+class TransactionIDIndex:
+    """
+    Set of the TransactionIDs seen so far, for duplicate detection
+
+    - 'T' + digits IDs are stored as integer keys in an IntHashSet; IDs
+      of any other form fall back to a set of strings
+    - an index loaded with mapped=True keeps the saved keys in the
+      memory-mapped file and only holds new keys in memory
+    - bloom_error adds a Bloom filter in front: an ID it has never seen
+      is new without probing the saved keys. It never changes the answer,
+      only how often the (possibly mapped, cold) table is touched. When
+      a filter fills up, a larger one with half the error rate is added
+      (a scalable Bloom filter), so the filter is never rebuilt and the
+      overall false positive rate stays below 2 * bloom_error
+
+    expected: number of IDs to size the table and the first Bloom filter
+    for up front; both grow as needed either way
+
+    save() writes a file load() can restore for the next incremental run.
+    """
+
+    def __init__(self, expected=0, bloom_error=None):
+        self.keys = IntHashSet(expected)
+        self.others = set()
+        self.history = None
+        self.blooms = [BloomFilter(max(expected, BLOOM_START), bloom_error)] if bloom_error else None
+
+        self._file = None
+        self._map = None
+
+    def __len__(self):
+        return self._history_count() + len(self.keys) + len(self.others)
+
+    def __contains__(self, transaction_id):
+        key = encode_transaction_id(transaction_id)
+        if key is None:
+            return transaction_id in self.others
+        if self.history is not None and key in self.history:
+            return True
+        return key in self.keys
+
+    def add(self, transaction_id):
+        """
+        Records transaction_id
+
+        Returns: True the first time an ID is seen, False for a duplicate
+        """
+
+        key = encode_transaction_id(transaction_id)
+
+        if key is None:
+            if transaction_id in self.others:
+                return False
+            self.others.add(transaction_id)
+            return True
+
+        return self._add_key(key)
+
+    def add_many(self, transaction_ids):
+        """
+        Records every ID in order, as add() would one at a time
+
+        Returns: list of booleans, True where the ID was seen the first time
+        """
+
+        if self.blooms is not None or self.history is not None:
+            return list(map(self.add, transaction_ids))
+
+        # Plain in-memory table: encode and probe inline, without a call per ID
+        keys = self.keys
+        new = []
+        append = new.append
+
+        for transaction_id in transaction_ids:
+            digits = transaction_id[1:]
+            if transaction_id[:1] != 'T' or not 0 < len(digits) <= MAX_DIGITS or \
+                    not (digits.isascii() and digits.isdigit()):
+                append(self.add(transaction_id))
+                continue
+
+            key = int(digits) << 5 | len(digits)
+            slots, mask = keys.slots, keys.mask
+            slot = ((key * GOLDEN) & MASK64) >> keys.shift
+            while True:
+                current = slots[slot]
+                if current == key:
+                    append(False)
+                    break
+                if not current:
+                    slots[slot] = key
+                    keys.count += 1
+                    if keys.count > keys.limit:
+                        keys._grow()
+                    append(True)
+                    break
+                slot = (slot + 1) & mask
+
+        return new
+
+    def _add_key(self, key):
+        if self.blooms is None:
+            if self.history is not None and key in self.history:
+                return False
+            return self.keys.add(key)
+
+        if self._bloom_add(key):
+            # Certainly new: no lookup in the saved keys
+            self.keys.add(key)
+            return True
+
+        if self.history is not None and key in self.history:
+            return False
+        return self.keys.add(key)
+
+    def update(self, other):
+        """
+        Records every ID held by another index (saved and new keys)
+
+        Returns: list of the IDs of other that were already recorded here
+        """
+
+        held = []
+        for keys in (other.history, other.keys):
+            for key in keys or ():
+                if not self._add_key(key):
+                    held.append(decode_transaction_id(key))
+
+        for transaction_id in other.others:
+            if not self.add(transaction_id):
+                held.append(transaction_id)
+        return held
+
+    def _history_count(self):
+        return len(self.history) if self.history is not None else 0
+
+    def _bloom_add(self, key):
+        """
+        Returns: True if no Bloom filter has seen key (it is then added to
+        the newest one)
+        """
+
+        blooms = self.blooms
+        for bloom in blooms[:-1]:
+            if key in bloom:
+                return False
+
+        newest = blooms[-1]
+        if not newest.add(key):
+            return False
+
+        if newest.count >= newest.capacity:
+            blooms.append(BloomFilter(newest.capacity * BLOOM_GROWTH, newest.error / 2))
+        return True
+
+    def memory_bytes(self):
+        """
+        Returns: bytes held in memory by the index structures (a mapped
+        history is paged in by the operating system and not counted)
+        """
+
+        total = self.keys.memory_bytes() + sum(sys.getsizeof(tid) for tid in self.others)
+        for bloom in self.blooms or ():
+            total += bloom.memory_bytes()
+        return total
+
+    def _merged_keys(self):
+        """
+        Returns: one IntHashSet holding the saved and the new keys
+        """
+
+        if self.history is None:
+            return self.keys
+
+        merged = IntHashSet.from_slots(_copy_slots(self.history.slots), len(self.history))
+        for key in self.keys:
+            merged.add(key)
+        return merged
+
+    def save(self, filename):
+        """
+        Writes the index atomically: magic, 8-byte header length, JSON
+        header, then the slot table and the bits of each Bloom filter as
+        8-byte aligned blocks
+        """
+
+        keys = self._merged_keys()
+
+        blocks = [keys.slots]
+        header = {
+            'byteorder': sys.byteorder,
+            'count': len(keys),
+            'others': sorted(self.others),
+            'blooms': None
+        }
+        if self.blooms is not None:
+            header['blooms'] = [
+                {
+                    'capacity': bloom.capacity, 'error': bloom.error,
+                    'size': bloom.size, 'hashes': bloom.hashes, 'count': bloom.count
+                }
+                for bloom in self.blooms
+            ]
+            blocks.extend(bloom.bits for bloom in self.blooms)
+
+        with atomic_write(filename, 'wb') as file:
+            write_blocks(file, INDEX_MAGIC, header, blocks)
+
+    @classmethod
+    def load(cls, filename, mapped=False):
+        """
+        Restores an index written by save()
+
+        mapped: keep the saved keys in the memory-mapped file instead of
+        copying them into memory; new keys are held in memory until the
+        next save()
+
+        Returns: TransactionIDIndex, or None if the file is missing or not
+        a usable index
+        """
+
+        try:
+            file = open(filename, 'rb')
+        except OSError:
+            return None
+
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(file.fileno()).st_size else b''
+
+        try:
+            layout = read_header(data, INDEX_MAGIC)
+            if layout is None:
+                return None
+
+            header, data_start = layout
+            if header['byteorder'] != sys.byteorder:
+                return None
+
+            index = cls()
+            index.others = set(header['others'])
+
+            if header['blooms'] is not None:
+                index.blooms = []
+                for options, (position, length) in zip(header['blooms'], header['blocks'][1:]):
+                    bits = bytearray(data[data_start + position:data_start + position + length])
+                    index.blooms.append(BloomFilter(
+                        options['capacity'], options['error'], options['size'], options['hashes'],
+                        bits, options['count']
+                    ))
+
+            position, length = header['blocks'][0]
+            view = memoryview(data)[data_start + position:data_start + position + length].cast('q')
+
+            if mapped:
+                index.history = IntHashSet.from_slots(view, header['count'])
+                index._file, index._map = file, data
+                file = data = None
+            else:
+                index.keys = IntHashSet.from_slots(_copy_slots(view), header['count'])
+                view.release()
+
+            return index
+
+        except (ValueError, KeyError, IndexError, TypeError):
+            return None
+
+        finally:
+            if data is not None and isinstance(data, mmap.mmap):
+                data.close()
+            if file is not None:
+                file.close()
+
+    def close(self):
+        """
+        Releases the memory-mapped file of an index loaded with mapped=True;
+        save() first, the saved keys are no longer available afterwards
+        """
+
+        if self.history is not None:
+            self.history.slots.release()
+            self.history = None
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = self._file = None
+
+
+def _copy_slots(view):
+    # One block copy instead of converting slot by slot
+    slots = array('q')
+    slots.frombytes(view.cast('B'))
+    return slots
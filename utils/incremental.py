@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+
+from utils.data_processor import SalesAggregator
+from utils.file_handler import iter_transactions, iter_valid_transactions
+from utils.id_index import TransactionIDIndex
+from utils.mmap_reader import ENCODINGS, MappedSalesFile
+from utils.storage import atomic_write
+
+
+CHECKPOINT_VERSION = 3
+FINGERPRINT_BYTES = 4096
+
+SUMMARY_KEYS = (
+    'total_input', 'invalid', 'duplicates', 'filtered_by_region', 'filtered_by_amount', 'final_count'
+)
+
+
+def process_incremental(filename, checkpoint_file='data/sales_checkpoint.json',
+                        region=None, min_amount=None, max_amount=None):
+    """
+    Processes only the lines appended to filename since the last run
+
+    The checkpoint stores the byte offset reached, a fingerprint of the
+    bytes before it, the filters used and the running aggregates. New
+    complete lines are validated, filtered and added to the restored
+    aggregates. A missing or unusable checkpoint (file truncated or
+    rewritten, different filters or encoding) triggers a full rebuild.
+
+    The TransactionIDs seen so far are kept in a TransactionIDIndex file
+    next to the checkpoint, so rows replayed in a later append are still
+    rejected as duplicates.
+
+    Returns: (SalesAggregator, filter_summary, rows_processed, product_rows)
+    where rows_processed counts the lines read on this run and
+    product_rows is {ProductID: {ProductName: rows}} of every valid row
+    so far (enough for the report's enrichment section)
+    """
+
+    filters = {'region': region, 'min_amount': min_amount, 'max_amount': max_amount}
+    checkpoint = load_checkpoint(checkpoint_file)
+    id_index_file = _id_index_file(checkpoint_file)
+
+    try:
+        mapped = MappedSalesFile(filename)
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        return SalesAggregator(), dict.fromkeys(SUMMARY_KEYS, 0), 0, {}
+
+    with mapped:
+        encodings = list(ENCODINGS[ENCODINGS.index(mapped.encoding):]) if mapped.encoding else []
+
+        for encoding in encodings:
+            mapped.encoding = encoding
+            resume = _can_resume(checkpoint, mapped, filters)
+
+            id_index = None
+            if resume:
+                # The saved keys stay in the mapped file; only new IDs are held in memory
+                id_index = TransactionIDIndex.load(id_index_file, mapped=True)
+                if id_index is None or len(id_index) != checkpoint['id_count']:
+                    resume = False
+
+            if resume:
+                start = checkpoint['offset']
+                agg = SalesAggregator.from_state(checkpoint['aggregates'])
+                filter_summary = dict(checkpoint['filter_summary'])
+                product_rows = checkpoint['product_rows']
+            else:
+                start = mapped.data_start
+                agg = SalesAggregator()
+                filter_summary = dict.fromkeys(SUMMARY_KEYS, 0)
+                product_rows = {}
+                if id_index is not None:
+                    id_index.close()
+                id_index = TransactionIDIndex()
+
+            end = _complete_lines_end(mapped, start)
+
+            run_summary = {}
+            lines = mapped.iter_lines(start, end)
+            valid = iter_valid_transactions(iter_transactions(lines), run_summary, dedup=id_index, **filters)
+
+            try:
+                agg.add_all(_count_products(valid, product_rows))
+            except UnicodeDecodeError:
+                # The sampled encoding does not fit the whole file
+                checkpoint = None
+                id_index.close()
+                continue
+
+            for key in SUMMARY_KEYS:
+                filter_summary[key] += run_summary[key]
+
+            # The index is written first: a checkpoint never points at IDs
+            # that were not saved, and a count mismatch forces a rebuild
+            id_index.save(id_index_file)
+            id_count = len(id_index)
+            id_index.close()
+
+            save_checkpoint(checkpoint_file, {
+                'version': CHECKPOINT_VERSION,
+                'offset': end,
+                'fingerprint': _fingerprint(mapped, end),
+                'encoding': encoding,
+                'filters': filters,
+                'filter_summary': filter_summary,
+                'id_count': id_count,
+                'aggregates': agg.to_state(),
+                'product_rows': product_rows
+            })
+
+            return agg, filter_summary, run_summary['total_input'], product_rows
+
+    print("Error: Unable to read file with supported encodings.")
+    return SalesAggregator(), dict.fromkeys(SUMMARY_KEYS, 0), 0, {}
+
+
+def _count_products(transactions, product_rows):
+    """
+    Yields: the transactions, counting rows per ProductID and ProductName
+    into product_rows
+    """
+
+    for tx in transactions:
+        names = product_rows.get(tx['ProductID'])
+        if names is None:
+            names = product_rows[tx['ProductID']] = {}
+        names[tx['ProductName']] = names.get(tx['ProductName'], 0) + 1
+        yield tx
+
+
+def load_checkpoint(checkpoint_file):
+    """
+    Returns: checkpoint dictionary, or None if missing or unreadable
+    """
+
+    try:
+        with open(checkpoint_file, 'r', encoding='utf-8') as file:
+            checkpoint = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if checkpoint.get('version') != CHECKPOINT_VERSION:
+        return None
+
+    return checkpoint
+
+
+def save_checkpoint(checkpoint_file, checkpoint):
+    """
+    Writes the checkpoint atomically so an interrupted run cannot leave
+    a half-written file behind
+    """
+
+    with atomic_write(checkpoint_file, encoding='utf-8') as file:
+        json.dump(checkpoint, file)
+
+
+def _id_index_file(checkpoint_file):
+    return os.path.splitext(checkpoint_file)[0] + '.ids'
+
+
+def _can_resume(checkpoint, mapped, filters):
+    if not checkpoint:
+        return False
+
+    offset = checkpoint['offset']
+
+    return (
+        checkpoint['filters'] == filters
+        and checkpoint['encoding'] == mapped.encoding
+        and mapped.data_start <= offset <= mapped.size
+        and checkpoint['fingerprint'] == _fingerprint(mapped, offset)
+    )
+
+
+def _fingerprint(mapped, offset):
+    """
+    Hashes the start of the file and the bytes just before offset, which
+    catches truncation, rewrites and edits near the resume point
+    """
+
+    head = hashlib.sha256(mapped.raw(0, min(offset, FINGERPRINT_BYTES))).hexdigest()
+    tail = hashlib.sha256(mapped.raw(max(0, offset - FINGERPRINT_BYTES), offset)).hexdigest()
+
+    return {'head': head, 'tail': tail}
+
+
+def _complete_lines_end(mapped, start):
+    """
+    Offset just past the last line terminator, so a line that is still
+    being appended is left for the next run
+    """
+
+    end = max(mapped.rfind(b'\n', start), mapped.rfind(b'\r', start))
+
+    return max(end + 1, start)
@@ -0,0 +1,424 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Unix only; peak RSS is not reported elsewhere (e.g. Windows)
+    resource = None
+
+
+class StageRecord:
+    """
+    Measurements for one run of one stage
+    """
+
+    FIELDS = (
+        'stage', 'parent', 'depth', 'thread', 'started_at', 'wall_seconds', 'cpu_seconds',
+        'rows_in', 'rows_out', 'max_rss_bytes', 'peak_traced_bytes', 'error'
+    )
+
+    def __init__(self, stage, parent=None, depth=0, rows_in=None):
+        self.stage = stage
+        self.parent = parent
+        self.depth = depth
+        self.thread = None
+        # Seconds from the collector's start, so runs on other threads line up
+        self.started_at = None
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.max_rss_bytes = None
+        self.peak_traced_bytes = None
+        self.error = None
+
+        # Highest tracemalloc peak seen before the last reset_peak()
+        self._child_peak = 0
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+class Instrumentation:
+    """
+    Collects per-stage wall time, CPU time, rows in / out, peak RSS and
+    (with trace_memory) tracemalloc peaks
+
+    Stages nest: a stage opened inside another records its parent, and a
+    child's memory peak also counts toward its parent. profile_stage runs
+    cProfile around every call of that one stage and writes the combined
+    stats to profile_file.
+
+    Stages may run concurrently on other threads; started_at places every
+    record on one timeline. CPU time is for the whole process, so stages
+    that overlap include each other's CPU. The same goes for tracemalloc,
+    which traces the whole process: a stage's peak is the highest traced
+    memory while it was open, on any thread. Tracing stops when the last
+    traced stage on any thread exits.
+    """
+
+    def __init__(self, enabled=True, trace_memory=False, profile_stage=None, profile_file=None):
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.profile_stage = profile_stage
+        self.profile_file = profile_file or f"output/profile_{profile_stage}.prof"
+        self.records = []
+        self.started = time.perf_counter()
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._profiler = None
+        if profile_stage:
+            import cProfile
+            self._profiler = cProfile.Profile()
+        self._started_tracemalloc = False
+        # Stages open on any thread while tracing memory
+        self._traced = set()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def stage(self, name, rows_in=None):
+        """
+        Context manager timing the enclosed block; set rows_in / rows_out
+        on the yielded StageRecord
+        """
+
+        return _StageContext(self, name, rows_in)
+
+    def current_stage(self):
+        stack = self._stack()
+        return stack[-1].stage if stack else None
+
+    def mark(self):
+        """
+        Returns: position of the next record, to pass to failed_stage()
+        """
+
+        with self._lock:
+            return len(self.records)
+
+    def failed_stage(self, since=0):
+        """
+        since: a mark() taken when the current run started; earlier runs'
+        errors are ignored
+
+        Returns: name of the innermost stage that raised, or None
+        """
+
+        with self._lock:
+            records = self.records[since:]
+
+        failed = [record for record in records if record.error]
+        return max(failed, key=lambda r: r.depth).stage if failed else None
+
+    def _enter(self, name, rows_in):
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        record = StageRecord(name, parent.stage if parent else None, len(stack), rows_in)
+        record.thread = threading.current_thread().name
+
+        if self.trace_memory:
+            with self._lock:
+                if not self._traced and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._started_tracemalloc = True
+                # The peak is shared: keep it for every open stage before the reset
+                peak = tracemalloc.get_traced_memory()[1]
+                for open_record in self._traced:
+                    open_record._child_peak = max(open_record._child_peak, peak)
+                tracemalloc.reset_peak()
+                self._traced.add(record)
+
+        if self._profiler is not None and name == self.profile_stage:
+            self._profiler.enable()
+
+        # Records are kept in start order, so children follow their parent
+        with self._lock:
+            self.records.append(record)
+        stack.append(record)
+        record._started = (time.perf_counter(), time.process_time())
+        record.started_at = record._started[0] - self.started
+        return record
+
+    def _exit(self, record, error):
+        wall, cpu = record._started
+        record.wall_seconds = time.perf_counter() - wall
+        record.cpu_seconds = time.process_time() - cpu
+        record.max_rss_bytes = peak_rss_bytes()
+
+        if error is not None:
+            record.error = f"{type(error).__name__}: {error}"
+
+        if self._profiler is not None and record.stage == self.profile_stage:
+            self._profiler.disable()
+            _ensure_directory(self.profile_file)
+            self._profiler.dump_stats(self.profile_file)
+
+        stack = self._stack()
+        stack.pop()
+
+        if self.trace_memory:
+            with self._lock:
+                self._traced.discard(record)
+                if tracemalloc.is_tracing():
+                    record.peak_traced_bytes = max(record._child_peak, tracemalloc.get_traced_memory()[1])
+                if not self._traced and self._started_tracemalloc:
+                    tracemalloc.stop()
+                    self._started_tracemalloc = False
+
+    def finished(self):
+        return [record for record in self.records if record.wall_seconds is not None]
+
+    def totals(self):
+        """
+        Returns: {stage: summed measurements over every call of the stage}
+        """
+
+        totals = {}
+        for record in self.finished():
+            total = totals.get(record.stage)
+            if total is None:
+                total = totals[record.stage] = {
+                    'calls': 0, 'errors': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0,
+                    'rows_in': 0, 'rows_out': 0, 'max_rss_bytes': 0, 'peak_traced_bytes': 0
+                }
+            total['calls'] += 1
+            total['errors'] += record.error is not None
+            total['wall_seconds'] += record.wall_seconds
+            total['cpu_seconds'] += record.cpu_seconds
+            total['rows_in'] += record.rows_in or 0
+            total['rows_out'] += record.rows_out or 0
+            total['max_rss_bytes'] = max(total['max_rss_bytes'], record.max_rss_bytes or 0)
+            total['peak_traced_bytes'] = max(total['peak_traced_bytes'], record.peak_traced_bytes or 0)
+        return totals
+
+    def to_dict(self):
+        return {
+            'stages': [record.to_dict() for record in self.finished()],
+            'totals': self.totals()
+        }
+
+    def export_json(self, filename):
+        _ensure_directory(filename)
+        with open(filename, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def export_prometheus(self, filename):
+        """
+        Writes the per-stage totals in the Prometheus text exposition
+        format, e.g. for the node_exporter textfile collector
+        """
+
+        metrics = (
+            ('wall_seconds', 'Wall-clock time spent in the stage'),
+            ('cpu_seconds', 'CPU time spent in the stage'),
+            ('calls', 'Number of times the stage ran'),
+            ('errors', 'Number of stage runs that raised'),
+            ('rows_in', 'Rows passed into the stage'),
+            ('rows_out', 'Rows produced by the stage'),
+            ('max_rss_bytes', 'Process peak resident set size after the stage'),
+            ('peak_traced_bytes', 'Peak tracemalloc usage during the stage')
+        )
+        totals = self.totals()
+
+        lines = []
+        for key, help_text in metrics:
+            name = f"sales_stage_{key}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {'counter' if key in ('calls', 'errors') else 'gauge'}")
+            for stage, total in totals.items():
+                lines.append(f'{name}{{stage="{_escape_label(stage)}"}} {total[key]}')
+
+        _ensure_directory(filename)
+        with open(filename, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+
+    def export(self, filename):
+        """
+        Exports as Prometheus text for .prom files, JSON otherwise
+        """
+
+        if filename.endswith('.prom'):
+            self.export_prometheus(filename)
+        else:
+            self.export_json(filename)
+
+    def summary(self, max_depth=0):
+        """
+        Returns: a printable table of the stages up to max_depth
+        """
+
+        lines = [f"{'Stage':<30}{'Wall (s)':>10}{'CPU (s)':>10}{'Rows in':>12}{'Rows out':>12}{'RSS (MB)':>10}"]
+        for record in self.finished():
+            if record.depth > max_depth:
+                continue
+            rows_in = '' if record.rows_in is None else f"{record.rows_in:,}"
+            rows_out = '' if record.rows_out is None else f"{record.rows_out:,}"
+            rss = '' if record.max_rss_bytes is None else f"{record.max_rss_bytes / 2**20:.1f}"
+            lines.append(
+                f"{'  ' * record.depth + record.stage:<30}{record.wall_seconds:>10.3f}"
+                f"{record.cpu_seconds:>10.3f}{rows_in:>12}{rows_out:>12}"
+                f"{rss:>10}"
+            )
+        return '\n'.join(lines)
+
+    def timeline(self, max_depth=0, width=40):
+        """
+        Returns: a printable chart of when each stage ran; stages run on
+        other threads (e.g. the catalog fetch) show up overlapping the
+        main thread's stages
+        """
+
+        records = [record for record in self.finished() if record.depth <= max_depth]
+        if not records:
+            return ''
+
+        origin = min(record.started_at for record in records)
+        span = max(record.started_at + record.wall_seconds for record in records) - origin
+        scale = width / span if span > 0 else 0
+
+        lines = [f"{'Stage':<30}{'Start (s)':>10}{'End (s)':>10}  {'Thread':<16}Timeline"]
+        for record in records:
+            start = record.started_at - origin
+            end = start + record.wall_seconds
+            first = min(int(start * scale), width - 1)
+            last = max(first + 1, round(end * scale))
+            bar = ' ' * first + '█' * (last - first)
+            lines.append(
+                f"{'  ' * record.depth + record.stage:<30}{start:>10.3f}{end:>10.3f}  "
+                f"{record.thread[:15]:<16}|{bar:<{width}}|"
+            )
+        return '\n'.join(lines)
+
+
+class _StageContext:
+    def __init__(self, instrumentation, name, rows_in):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.rows_in = rows_in
+        self.record = None
+
+    def __enter__(self):
+        if self.instrumentation.enabled:
+            self.record = self.instrumentation._enter(self.name, self.rows_in)
+            return self.record
+        return StageRecord(self.name, rows_in=self.rows_in)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.record is not None:
+            self.instrumentation._exit(self.record, exc)
+        return False
+
+
+def peak_rss_bytes():
+    """
+    Returns: the process peak resident set size in bytes, or None where
+    the resource module is missing
+    """
+
+    if resource is None:
+        return None
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _ensure_directory(filename):
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Active collector; disabled until enable_instrumentation() is called, so
+# instrumented functions cost one attribute check when nobody is measuring
+_active = Instrumentation(enabled=False)
+
+
+def enable_instrumentation(trace_memory=False, profile_stage=None, profile_file=None):
+    """
+    Starts a fresh collector used by stage() and @instrumented
+
+    Returns: the Instrumentation
+    """
+
+    global _active
+    _active = Instrumentation(True, trace_memory, profile_stage, profile_file)
+    return _active
+
+
+def disable_instrumentation():
+    global _active
+    _active = Instrumentation(enabled=False)
+
+
+def get_instrumentation():
+    return _active
+
+
+def stage(name, rows_in=None):
+    """
+    Times a block against the active collector:
+
+        with stage('load_catalog') as s:
+            ...
+            s.rows_out = len(mapping)
+    """
+
+    return _active.stage(name, rows_in)
+
+
+def count_rows(value):
+    """
+    Row count for a stage input or output: len() of sized containers,
+    the first element of a (rows, ...) tuple, None for anything else
+    """
+
+    if isinstance(value, tuple):
+        value = value[0] if value else None
+    if isinstance(value, (str, bytes)) or not hasattr(value, '__len__'):
+        return None
+    return len(value)
+
+
+def instrumented(name=None, rows_in=count_rows, rows_out=count_rows):
+    """
+    Decorator recording every call of a function as a stage
+
+    rows_in is applied to the first argument and rows_out to the return
+    value; pass None to skip either.
+    """
+
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            instrumentation = _active
+            if not instrumentation.enabled:
+                return func(*args, **kwargs)
+
+            count_in = rows_in(args[0]) if rows_in and args else None
+            with instrumentation.stage(stage_name, count_in) as record:
+                result = func(*args, **kwargs)
+                if rows_out:
+                    record.rows_out = rows_out(result)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,103 @@
+import importlib.util
+import sys
+import threading
+import types
+
+
+# One lock per lazy module, so its code runs once and a thread touching
+# it meanwhile waits instead of seeing it half-initialized
+_load_locks = {}
+_load_locks_lock = threading.Lock()
+# Names of lazy modules whose code is running
+_executing = set()
+
+
+def lazy_import(name):
+    """
+    Returns a module object whose code only runs on first attribute access
+
+    Used for heavy or optional dependencies (requests, and any future
+    numpy/pyarrow backends) so runs that never reach the stage needing
+    them do not pay their import time. A module that is already loaded
+    is returned as is. A missing optional dependency raises ImportError
+    on first use instead of at import time. Loading is thread-safe:
+    importlib's LazyLoader takes no lock on Python 3.11, so the module
+    is executed here under a per-module lock instead.
+    """
+
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    try:
+        spec = importlib.util.find_spec(name)
+    except ImportError:
+        spec = None
+
+    if spec is None:
+        return _MissingModule(name)
+
+    module = importlib.util.module_from_spec(spec)
+    with _load_locks_lock:
+        _load_locks[name] = threading.RLock()
+    module.__class__ = _LazyModule
+    sys.modules[name] = module
+
+    # Make the lazy submodule reachable from an already imported parent
+    parent, _, child = name.rpartition('.')
+    if parent and parent in sys.modules:
+        setattr(sys.modules[parent], child, module)
+
+    return module
+
+
+def load(module):
+    """
+    Runs a lazy module's code now, e.g. before several threads share it
+
+    Returns: module
+    """
+
+    module.__dict__
+    return module
+
+
+def is_loaded(name):
+    """
+    Returns: True once the module's code has actually run
+    """
+
+    module = sys.modules.get(name)
+    if module is None:
+        return False
+    # The module class is swapped back to ModuleType once loaded
+    return not isinstance(module, _LazyModule)
+
+
+class _LazyModule(types.ModuleType):
+    """
+    Module whose code runs on its first attribute access
+    """
+
+    def __getattribute__(self, attribute):
+        name = object.__getattribute__(self, '__name__')
+        with _load_locks[name]:
+            # Re-entered by the loading thread while the code runs (the
+            # lock is reentrant): fall through to the partial module
+            if type(self) is _LazyModule and name not in _executing:
+                _executing.add(name)
+                try:
+                    spec = object.__getattribute__(self, '__spec__')
+                    spec.loader.exec_module(self)
+                    self.__class__ = types.ModuleType
+                finally:
+                    _executing.discard(name)
+
+        return object.__getattribute__(self, attribute)
+
+
+class _MissingModule(types.ModuleType):
+    def __getattr__(self, attribute):
+        raise ImportError(
+            f"'{self.__name__}' is required for this stage but is not installed"
+        )
@@ -1,51 +1,117 @@
-from utils.file_handler import (
-    read_sales_data,
-    parse_transactions,
-    validate_and_filter
-)
-
-from utils.data_processor import (
-    calculate_total_revenue,
-    region_wise_sales,
-    top_selling_products,
-    customer_analysis,
-    daily_sales_trend,
-    find_peak_sales_day,
-    low_performing_products
-)
-
-from utils.api_handler import (
-    fetch_all_products,
-    create_product_mapping,
-    enrich_sales_data
-)
-
-from utils.report_generator import generate_sales_report
-
-
-def main():
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.file_handler import validate_and_filter
+from utils.fast_parser import read_sales_data_fast, parse_transactions_fast
+
+from utils.amount_index import build_amount_index
+
+from utils.data_processor import aggregate_sales
+from utils.rollup_cube import RollupCube
+
+from utils.report_generator import generate_sales_report, enrichment_summary
+
+from utils.instrumentation import enable_instrumentation, stage
+
+from utils.lazy_imports import lazy_import, load
+
+# Loaded on first use: the API stage pulls in requests, and the process
+# pool / writers / incremental mode are not needed by every run
+api_handler = lazy_import('utils.api_handler')
+enriched_writer = lazy_import('utils.enriched_writer')
+parallel_parser = lazy_import('utils.parallel_parser')
+incremental = lazy_import('utils.incremental')
+sharded_ingest = lazy_import('utils.sharded_ingest')
+
+
+DEFAULT_INPUT = "data/sales_data.txt"
+DEFAULT_CUBE = "data/sales_cube.json"
+DEFAULT_ENRICHED = "data/enriched_sales_data.txt"
+DEFAULT_REPORT = "output/sales_report.txt"
+DEFAULT_CHECKPOINT = "data/checkpoints/{input}_{name}.json"
+
+DEFAULT_CONFIG = {
+    'inputs': [DEFAULT_INPUT],
+    'filters': [{}],
+    'workers': 1,
+    'cache_file': 'data/product_cache.json',
+    'cache_ttl': 3600,
+    'api_url': None,
+    'background_refresh': True,
+    'offline': False,
+    'product_lookup': False,
+    'save_format': 'text',
+    'enriched_output': DEFAULT_ENRICHED,
+    'report_output': DEFAULT_REPORT,
+    'report_formats': ['text'],
+    'metrics_file': None,
+    'trace_memory': False,
+    'profile_stage': None,
+    'rollup_cube': False,
+    'incremental': False,
+    'checkpoint': DEFAULT_CHECKPOINT
+}
+
+FILTER_KEYS = ('region', 'min_amount', 'max_amount')
+
+
+def main(save_format='text', metrics_file=None, trace_memory=False, profile_stage=None,
+         rollup_cube=False):
+    """
+    Runs the full pipeline
+
+    save_format: 'text' (data/enriched_sales_data.txt), 'columnar'
+    (data/enriched_sales_data.sacol), 'both', or None to skip saving
+
+    rollup_cube: answer region-only filters from the persisted rollup cube
+    (see analyze_sales)
+
+    Every step is timed; metrics_file exports the per-stage measurements
+    (Prometheus text for a .prom name, JSON otherwise). trace_memory adds
+    tracemalloc peaks, and profile_stage (e.g. 'parse_transactions_fast') runs
+    cProfile around that stage, writing output/profile_<stage>.prof.
+
+    The product catalog is fetched on a worker thread from the start, so
+    the API round trip overlaps steps 1-5 (and the filter prompt);
+    enrichment is the first step that waits for it. The timeline printed
+    at the end shows the overlap.
+    """
+
+    instrumentation = enable_instrumentation(trace_memory, profile_stage)
+
     try:
+        # The lambda leaves the lazy api_handler (and requests) to be
+        # imported on the worker thread too
+        catalog = start_catalog_fetch(lambda: api_handler.load_product_catalog())
+
         print("=" * 50)
         print("SALES ANALYTICS SYSTEM")
         print("=" * 50)
 
         # [1/10] Read sales data
         print("\n[1/10] Reading sales data...")
-        raw_lines = read_sales_data("data/sales_data.txt")
+        with stage('main.read'):
+            raw_lines = read_sales_data_fast("data/sales_data.txt")
         print(f"✓ Successfully read {len(raw_lines)} transactions")
 
         # [2/10] Parse and clean
         print("\n[2/10] Parsing and cleaning data...")
-        parsed_transactions = parse_transactions(raw_lines)
+        with stage('main.parse', len(raw_lines)) as step:
+            parsed_transactions = parse_transactions_fast(raw_lines, columnar=True)
+            step.rows_out = len(parsed_transactions)
         print(f"✓ Parsed {len(parsed_transactions)} records")
 
         # [3/10] Display filter options
         print("\n[3/10] Filter Options Available:")
-        regions = sorted({tx['Region'] for tx in parsed_transactions if tx.get('Region')})
-        amounts = [tx['Quantity'] * tx['UnitPrice'] for tx in parsed_transactions]
+        with stage('main.filter_options', len(parsed_transactions)):
+            regions = sorted(region for region in parsed_transactions.regions.values if region)
+            amount_index = build_amount_index(parsed_transactions)
 
         print("Regions:", ", ".join(regions))
-        print(f"Amount Range: ₹{min(amounts):,.0f} - ₹{max(amounts):,.0f}")
+        print(f"Amount Range: ₹{amount_index.min():,.0f} - ₹{amount_index.max():,.0f}")
 
         choice = input("\nDo you want to filter data? (y/n): ").strip().lower()
 
@@ -64,45 +130,54 @@ def main():
 
         # [4/10] Validate & filter
         print("\n[4/10] Validating transactions...")
-        valid_transactions, invalid_count, summary = validate_and_filter(
-            parsed_transactions,
-            region=region,
-            min_amount=min_amount,
-            max_amount=max_amount
-        )
+        with stage('main.validate', len(parsed_transactions)) as step:
+            valid_transactions, invalid_count, summary = validate_and_filter(
+                parsed_transactions,
+                region=region,
+                min_amount=min_amount,
+                max_amount=max_amount,
+                amount_index=amount_index
+            )
+            step.rows_out = len(valid_transactions)
         print(f"✓ Valid: {len(valid_transactions)}  Invalid: {invalid_count}")
 
         # [5/10] Analyze sales data
         print("\n[5/10] Analyzing sales data...")
-        calculate_total_revenue(valid_transactions)
-        region_wise_sales(valid_transactions)
-        top_selling_products(valid_transactions)
-        customer_analysis(valid_transactions)
-        daily_sales_trend(valid_transactions)
-        find_peak_sales_day(valid_transactions)
-        low_performing_products(valid_transactions)
+        with stage('main.analyze', len(valid_transactions)):
+            metrics = analyze_sales(
+                valid_transactions, region, min_amount, max_amount, use_cube=rollup_cube
+            )
         print("✓ Analysis complete")
 
-        # [6/10] Fetch API products
+        # [6/10] Fetch API products (started at the beginning of the run)
         print("\n[6/10] Fetching product data from API...")
-        api_products = fetch_all_products()
-        print(f"✓ Fetched {len(api_products)} products")
+        product_mapping = wait_for_catalog(catalog)
+        print(f"✓ Fetched {len(product_mapping)} products")
 
         # [7/10] Enrich sales data
         print("\n[7/10] Enriching sales data...")
-        product_mapping = create_product_mapping(api_products)
-        enriched_transactions = enrich_sales_data(valid_transactions, product_mapping)
-        enriched_count = sum(1 for tx in enriched_transactions if tx.get('API_Match'))
-        success_rate = (enriched_count / len(enriched_transactions)) * 100 if enriched_transactions else 0
+        with stage('main.enrich', len(valid_transactions)) as step:
+            enriched_transactions = api_handler.enrich_sales_data(valid_transactions, product_mapping)
+            enriched_count, success_rate, _ = enrichment_summary(enriched_transactions)
+            step.rows_out = enriched_count
         print(f"✓ Enriched {enriched_count}/{len(enriched_transactions)} transactions ({success_rate:.1f}%)")
 
-        # [8/10] Save enriched data (already done in enrich function)
+        # [8/10] Save enriched data
         print("\n[8/10] Saving enriched data...")
-        print("✓ Saved to: data/enriched_sales_data.txt")
+        with stage('main.save', len(enriched_transactions)):
+            if save_format in ('text', 'both'):
+                enriched_writer.save_enriched_data(enriched_transactions, 'data/enriched_sales_data.txt')
+                print("✓ Saved to: data/enriched_sales_data.txt")
+            if save_format in ('columnar', 'both'):
+                enriched_writer.save_enriched_columnar(enriched_transactions, 'data/enriched_sales_data.sacol')
+                print("✓ Saved to: data/enriched_sales_data.sacol")
+        if not save_format:
+            print("✓ Skipped")
 
         # [9/10] Generate report
         print("\n[9/10] Generating report...")
-        generate_sales_report(valid_transactions, enriched_transactions)
+        with stage('main.report', len(valid_transactions)):
+            generate_sales_report(valid_transactions, enriched_transactions, metrics=metrics)
         print("✓ Report saved to: output/sales_report.txt")
 
         # [10/10] Complete
@@ -111,8 +186,539 @@ def main():
 
     except Exception as e:
         print("\n❌ An error occurred during execution.")
-        print("Details:", str(e))
+        failed = instrumentation.failed_stage()
+        if failed:
+            print("Stage:", failed)
+        print("Details:", f"{type(e).__name__}: {e}")
+
+    finish_catalog_refresh()
+
+    print("\nStage timings:")
+    print(instrumentation.summary())
+    print("\nTimeline:")
+    print(instrumentation.timeline())
+
+    if metrics_file:
+        instrumentation.export(metrics_file)
+        print(f"Metrics written to: {metrics_file}")
+
+
+def start_catalog_fetch(load_catalog):
+    """
+    Starts load_catalog() on a worker thread, timed as the
+    'main.fetch_catalog' stage, so the API round trip runs while the
+    sales data is read and analyzed
+
+    api_handler is loaded on the calling thread first, so the worker
+    and the main thread never share a module that is still running.
+
+    Returns: Future for the product mapping
+    """
+
+    load(api_handler)
+
+    def fetch():
+        with stage('main.fetch_catalog') as step:
+            product_mapping = load_catalog()
+            step.rows_out = len(product_mapping)
+        return product_mapping
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='catalog')
+    catalog = executor.submit(fetch)
+    executor.shutdown(wait=False)
+    return catalog
+
+
+def finish_catalog_refresh():
+    """
+    Waits for a stale product catalog that is being revalidated in the
+    background, so the refreshed cache is written before the run ends
+
+    Runs after the results are written, so an error here is reported
+    rather than raised
+    """
+
+    with stage('main.catalog_refresh'):
+        try:
+            api_handler.wait_for_revalidation()
+        except Exception as e:
+            print(f"⚠ Catalog refresh not finished: {type(e).__name__}: {e}")
+
+
+def lookup_products(lookup, product_ids):
+    """
+    Returns: product mapping for only the given numeric API IDs, fetched
+    through a ProductLookup; the 'main.lookup_products' stage times it
+    """
+
+    with stage('main.lookup_products', len(product_ids)) as step:
+        product_mapping = lookup.get_many(product_ids)
+        step.rows_out = len(product_mapping)
+    return product_mapping
+
+
+def wait_for_catalog(catalog):
+    """
+    Returns: the product mapping from start_catalog_fetch, re-raising its
+    error; the 'main.wait_catalog' stage is the time still spent waiting
+    """
+
+    with stage('main.wait_catalog') as step:
+        product_mapping = catalog.result()
+        step.rows_out = len(product_mapping)
+    return product_mapping
+
+
+def analyze_sales(valid_transactions, region=None, min_amount=None, max_amount=None,
+                  source=DEFAULT_INPUT, cube_file=DEFAULT_CUBE, use_cube=False):
+    """
+    Returns: SalesAggregator for the validated transactions
+
+    use_cube: answer region-only filters from the persisted rollup cube
+    for source; an unfiltered run (re)builds and saves the cube and
+    answers from it. Only worth it when many rows share a (region, date,
+    product, customer) cell, otherwise aggregating the rows directly is
+    faster.
+    """
+
+    cube = None
+    if use_cube and min_amount is None and max_amount is None:
+        cube = RollupCube.load(cube_file, source=source)
+        if cube is None and region is None:
+            cube = RollupCube.build(valid_transactions)
+            _save_cube(cube, cube_file, source)
+
+    if cube is not None:
+        return cube.aggregate(region)
+
+    return aggregate_sales(valid_transactions)
+
+
+# Batch mode
+def run_batch(config):
+    """
+    Runs the pipeline without prompting, for every input file and every
+    filter set in config (see DEFAULT_CONFIG)
+
+    Each input is parsed once and shared by all of its filter sets, and
+    the product catalog is loaded once for the whole batch, on a worker
+    thread started before the first input is read. With product_lookup
+    (and not offline) the catalog is not downloaded: each run fetches
+    only the products its transactions reference, through one
+    ProductLookup cached next to cache_file. With incremental, each
+    filter set reads only the lines appended since its checkpoint (see
+    utils.incremental) and writes the report; no rows are kept, so the
+    enriched data is not saved. Output and checkpoint paths
+    may use {input} (input file name without extension) and {name} (the
+    filter set name); without them, several runs get both appended.
+
+    Returns: number of runs that failed
+    """
+
+    instrumentation = enable_instrumentation(config['trace_memory'], config['profile_stage'])
+    inputs = config['inputs']
+    filter_sets = [_filter_set(filters, i) for i, filters in enumerate(config['filters'])]
+    several = len(inputs) * len(filter_sets) > 1
+
+    failures = 0
+    if config['product_lookup'] and not config['offline']:
+        catalog = _product_lookup(config)
+    else:
+        catalog = start_catalog_fetch(lambda: _load_catalog(config))
+    cubes = {}
+
+    for filename in inputs:
+        label = os.path.splitext(os.path.basename(filename))[0]
+        print("=" * 50)
+        print(f"INPUT: {filename}")
+        print("=" * 50)
+
+        if not config['incremental']:
+            try:
+                transactions = _load_input(filename, config['workers'])
+                amount_index = build_amount_index(transactions)
+            except Exception as e:
+                print(f"❌ Could not load {filename}: {type(e).__name__}: {e}")
+                failures += len(filter_sets)
+                continue
+
+        for filters in filter_sets:
+            name = filters['name']
+            print(f"\n--- Filter set: {name} ---")
+
+            run_start = instrumentation.mark()
+            try:
+                with stage(f"run:{label}:{name}"):
+                    if config['incremental']:
+                        _run_incremental(config, filename, label, filters, catalog, several)
+                    else:
+                        _run_filter_set(
+                            config, filename, label, transactions, amount_index,
+                            filters, catalog, cubes, several
+                        )
+            except Exception as e:
+                failures += 1
+                print("❌ Run failed.")
+                failed = instrumentation.failed_stage(run_start)
+                if failed:
+                    print("Stage:", failed)
+                print("Details:", f"{type(e).__name__}: {e}")
+
+    finish_catalog_refresh()
+
+    print("\nStage timings:")
+    print(instrumentation.summary(max_depth=1))
+    print("\nTimeline:")
+    print(instrumentation.timeline())
+
+    if config['metrics_file']:
+        instrumentation.export(config['metrics_file'])
+        print(f"Metrics written to: {config['metrics_file']}")
+
+    return failures
+
+
+def _load_input(filename, workers):
+    """
+    Returns: TransactionTable for one input file
+    """
+
+    # The readers only print a missing file; a batch run reports it as failed
+    if not os.path.isfile(filename):
+        raise FileNotFoundError(f"File '{filename}' not found")
+
+    if workers and workers > 1:
+        with stage('main.parse') as step:
+            transactions, parse_summary = parallel_parser.parse_sales_file_parallel(filename, workers)
+            step.rows_in = parse_summary['total_lines']
+            step.rows_out = len(transactions)
+        print(f"✓ Parsed {len(transactions)} records with {workers} workers")
+        return transactions
+
+    with stage('main.read'):
+        raw_lines = read_sales_data_fast(filename)
+    with stage('main.parse', len(raw_lines)) as step:
+        transactions = parse_transactions_fast(raw_lines, columnar=True)
+        step.rows_out = len(transactions)
+    print(f"✓ Parsed {len(transactions)} records")
+    return transactions
+
+
+def _load_catalog(config):
+    if config['offline']:
+        return api_handler.read_cached_product_catalog(config['cache_file'])
+
+    options = {
+        'cache_file': config['cache_file'],
+        'ttl': config['cache_ttl'],
+        'background': config['background_refresh']
+    }
+    if config['api_url']:
+        options['url'] = config['api_url']
+    return api_handler.load_product_catalog(**options)
+
+
+def _product_lookup(config):
+    options = {
+        'cache_file': os.path.splitext(config['cache_file'])[0] + '_lookup.json',
+        'ttl': config['cache_ttl']
+    }
+    if config['api_url']:
+        options['base_url'] = config['api_url']
+    return api_handler.ProductLookup(**options)
+
+
+def _product_mapping(catalog, product_ids):
+    """
+    Returns: product mapping for enrichment, looked up for product_ids
+    when catalog is a ProductLookup, else the catalog fetch's result
+    """
+
+    if isinstance(catalog, api_handler.ProductLookup):
+        return lookup_products(catalog, product_ids)
+    return wait_for_catalog(catalog)
+
+
+def _run_filter_set(config, filename, label, transactions, amount_index, filters,
+                    catalog, cubes, several):
+    region = filters['region']
+    min_amount = filters['min_amount']
+    max_amount = filters['max_amount']
+
+    with stage('main.validate', len(transactions)) as step:
+        valid_transactions, invalid_count, _ = validate_and_filter(
+            transactions,
+            region=region,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            amount_index=amount_index
+        )
+        step.rows_out = len(valid_transactions)
+    print(f"✓ Valid: {len(valid_transactions)}  Invalid: {invalid_count}")
+
+    with stage('main.analyze', len(valid_transactions)):
+        if config['rollup_cube'] and min_amount is None and max_amount is None:
+            # Every region-only set of this input shares one rollup cube
+            cube = cubes.get(filename)
+            if cube is None:
+                cube = RollupCube.load(_cube_file(filename), source=filename)
+            if cube is None:
+                all_valid = valid_transactions
+                if region is not None:
+                    all_valid, _, _ = validate_and_filter(transactions, amount_index=amount_index)
+                cube = RollupCube.build(all_valid)
+                _save_cube(cube, _cube_file(filename), filename)
+            cubes[filename] = cube
+            metrics = cube.aggregate(region)
+        else:
+            metrics = aggregate_sales(valid_transactions)
+
+    # Enrichment is the first step that needs the catalog
+    product_mapping = _product_mapping(catalog, api_handler.distinct_product_ids(valid_transactions))
+    print(f"✓ Product catalog: {len(product_mapping)} products")
+
+    with stage('main.enrich', len(valid_transactions)) as step:
+        enriched_transactions = api_handler.enrich_sales_data(valid_transactions, product_mapping)
+        enriched_count, success_rate, _ = enrichment_summary(enriched_transactions)
+        step.rows_out = enriched_count
+    print(f"✓ Enriched {enriched_count}/{len(enriched_transactions)} transactions ({success_rate:.1f}%)")
+
+    save_format = config['save_format']
+    enriched_file = _output_path(config['enriched_output'], label, filters['name'], several)
+    with stage('main.save', len(enriched_transactions)):
+        if save_format in ('text', 'both'):
+            _make_parent(enriched_file)
+            enriched_writer.save_enriched_data(enriched_transactions, enriched_file)
+            print(f"✓ Saved to: {enriched_file}")
+        if save_format in ('columnar', 'both'):
+            columnar_file = os.path.splitext(enriched_file)[0] + '.sacol'
+            _make_parent(columnar_file)
+            enriched_writer.save_enriched_columnar(enriched_transactions, columnar_file)
+            print(f"✓ Saved to: {columnar_file}")
+
+    report_file = _output_path(config['report_output'], label, filters['name'], several)
+    with stage('main.report', len(valid_transactions)):
+        _make_parent(report_file)
+        written = generate_sales_report(
+            valid_transactions, enriched_transactions, report_file,
+            metrics=metrics, formats=config['report_formats']
+        )
+    print(f"✓ Report saved to: {', '.join(written.values())}")
+
+
+def _run_incremental(config, filename, label, filters, catalog, several):
+    if not os.path.isfile(filename):
+        raise FileNotFoundError(f"File '{filename}' not found")
+
+    checkpoint_file = _output_path(config['checkpoint'], label, filters['name'], several)
+    with stage('main.incremental') as step:
+        metrics, filter_summary, rows_read, product_rows = incremental.process_incremental(
+            filename, checkpoint_file,
+            region=filters['region'],
+            min_amount=filters['min_amount'],
+            max_amount=filters['max_amount']
+        )
+        step.rows_in = rows_read
+        step.rows_out = metrics.transaction_count
+    print(f"✓ Read {rows_read} new lines  Valid so far: {metrics.transaction_count}  "
+          f"Invalid so far: {filter_summary['invalid']}")
+
+    product_ids = {api_handler.extract_numeric_id(pid) for pid in product_rows}
+    product_ids.discard(None)
+    product_mapping = _product_mapping(catalog, product_ids)
+    print(f"✓ Product catalog: {len(product_mapping)} products")
+
+    with stage('main.enrich', metrics.transaction_count) as step:
+        enriched = sharded_ingest.ShardedEnrichment(product_rows, product_mapping)
+        enriched_count, success_rate, _ = enrichment_summary(enriched)
+        step.rows_out = enriched_count
+    print(f"✓ Enriched {enriched_count}/{len(enriched)} transactions ({success_rate:.1f}%)")
+
+    report_file = _output_path(config['report_output'], label, filters['name'], several)
+    with stage('main.report', metrics.transaction_count):
+        _make_parent(report_file)
+        written = generate_sales_report(
+            None, enriched, report_file, metrics=metrics, formats=config['report_formats']
+        )
+    print(f"✓ Report saved to: {', '.join(written.values())}")
+
+
+def _filter_set(filters, position):
+    unknown = set(filters) - set(FILTER_KEYS) - {'name'}
+    if unknown:
+        raise ValueError(f"Unknown filter keys: {', '.join(sorted(unknown))}")
+
+    result = {key: filters.get(key) for key in FILTER_KEYS}
+    for key in ('min_amount', 'max_amount'):
+        if result[key] is not None:
+            result[key] = float(result[key])
+
+    if filters.get('name'):
+        result['name'] = filters['name']
+    elif all(value is None for value in result.values()):
+        result['name'] = 'all'
+    else:
+        result['name'] = f"filter{position + 1}"
+    return result
+
+
+def _save_cube(cube, cube_file, source):
+    # The cube is only a cache: a read-only directory just means no caching
+    try:
+        cube.save(cube_file, source=source)
+    except OSError as e:
+        print(f"⚠ Rollup cube not cached ({cube_file}): {e}")
+
+
+def _cube_file(filename):
+    if os.path.normpath(filename) == os.path.normpath(DEFAULT_INPUT):
+        return DEFAULT_CUBE
+    return os.path.splitext(filename)[0] + '_cube.json'
+
+
+def _output_path(template, label, name, several):
+    path = template.format(input=label, name=name)
+    if several and path == template:
+        root, ext = os.path.splitext(template)
+        path = f"{root}_{label}_{name}{ext}"
+    return path
+
+
+def _make_parent(filename):
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+# Command line
+def parse_filter(text):
+    """
+    Parses a --filter value: 'name:key=value,key=value' or 'key=value,...'
+    with keys region, min_amount and max_amount
+    """
+
+    filters = {}
+    if ':' in text.split('=')[0]:
+        filters['name'], text = text.split(':', 1)
+
+    for item in filter(None, text.split(',')):
+        key, sep, value = item.partition('=')
+        key = key.strip().replace('-', '_')
+        if not sep or key not in FILTER_KEYS:
+            raise argparse.ArgumentTypeError(f"invalid filter item '{item}'")
+        filters[key] = value.strip()
+
+    return filters
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m utils.main',
+        description="Sales analytics pipeline. Without arguments it runs interactively; "
+                    "with any argument it runs in batch mode without prompting."
+    )
+    parser.add_argument('inputs', nargs='*', help=f"sales data files (default {DEFAULT_INPUT})")
+    parser.add_argument('--config', help="JSON file with any of the settings below (flags override it)")
+
+    filters = parser.add_argument_group('filters')
+    filters.add_argument('--region')
+    filters.add_argument('--min-amount', type=float)
+    filters.add_argument('--max-amount', type=float)
+    filters.add_argument('--filter', dest='filters', action='append', type=parse_filter,
+                         metavar='[NAME:]KEY=VALUE,...',
+                         help="add a filter set (repeatable), e.g. north:region=North,min_amount=1000")
+
+    processing = parser.add_argument_group('processing')
+    processing.add_argument('--workers', type=int, help="parse each input with this many processes")
+    processing.add_argument('--rollup-cube', action='store_true', default=None,
+                            help="answer region-only filter sets from a rollup cube cached next to "
+                                 "the input (faster only when many rows share a cell)")
+    processing.add_argument('--incremental', action='store_true', default=None,
+                            help="process only the lines appended since the last run and write "
+                                 "the report (the enriched data is not saved)")
+    processing.add_argument('--checkpoint',
+                            help=f"incremental checkpoint, may use {{input}} and {{name}} "
+                                 f"(default {DEFAULT_CHECKPOINT})")
+
+    catalog = parser.add_argument_group('product catalog')
+    catalog.add_argument('--cache-file')
+    catalog.add_argument('--cache-ttl', type=float, help="seconds before the cached catalog is revalidated")
+    catalog.add_argument('--api-url', help="products endpoint (default DummyJSON)")
+    catalog.add_argument('--no-background-refresh', dest='background_refresh',
+                         action='store_false', default=None,
+                         help="revalidate a stale catalog before continuing")
+    catalog.add_argument('--offline', action='store_true', default=None,
+                         help="use the cached catalog only, never the network")
+    catalog.add_argument('--product-lookup', action='store_true', default=None,
+                         help="fetch only the products each run references, by ID, "
+                              "instead of the whole catalog")
+
+    outputs = parser.add_argument_group('outputs')
+    outputs.add_argument('--save-format', choices=('text', 'columnar', 'both', 'none'))
+    outputs.add_argument('--enriched-output', help="may use {input} and {name}")
+    outputs.add_argument('--report-output', help="may use {input} and {name}")
+    outputs.add_argument('--report-format', dest='report_formats', action='append',
+                         choices=('text', 'json', 'csv', 'html'),
+                         help="repeatable; json/csv/html go next to the text report path")
+    outputs.add_argument('--metrics-file', help="stage metrics, .prom for Prometheus text, else JSON")
+    outputs.add_argument('--trace-memory', action='store_true', default=None)
+    outputs.add_argument('--profile-stage', help="cProfile one stage, e.g. parse_transactions_fast")
+
+    return parser
+
+
+def load_config(argv=None):
+    """
+    Returns: batch configuration from DEFAULT_CONFIG, then the --config
+    file, then the command line flags
+    """
+
+    args = build_parser().parse_args(argv)
+    config = dict(DEFAULT_CONFIG)
+
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as file:
+            from_file = json.load(file)
+        unknown = set(from_file) - set(DEFAULT_CONFIG)
+        if unknown:
+            raise ValueError(f"Unknown config keys: {', '.join(sorted(unknown))}")
+        config.update(from_file)
+
+    if args.inputs:
+        config['inputs'] = args.inputs
+
+    single = {key: getattr(args, key) for key in FILTER_KEYS if getattr(args, key) is not None}
+    if args.filters or single:
+        config['filters'] = ([single] if single else []) + (args.filters or [])
+
+    for key in ('workers', 'cache_file', 'cache_ttl', 'api_url', 'background_refresh',
+                'offline', 'product_lookup', 'save_format', 'enriched_output', 'report_output',
+                'report_formats', 'metrics_file', 'trace_memory', 'profile_stage', 'rollup_cube',
+                'incremental', 'checkpoint'):
+        value = getattr(args, key)
+        if value is not None:
+            config[key] = value
+
+    if config['save_format'] == 'none':
+        config['save_format'] = None
+
+    return config
+
+
+def cli(argv=None):
+    """
+    Command line entry point
+
+    Returns: process exit status
+    """
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        main()
+        return 0
+
+    return 1 if run_batch(load_config(argv)) else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(cli())
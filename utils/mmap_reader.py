@@ -0,0 +1,148 @@
+import codecs
+import mmap
+import os
+
+
+ENCODINGS = ('utf-8', 'latin-1', 'cp1252')
+SAMPLE_SIZE = 1 << 16
+
+
+def detect_encoding(sample, encodings=ENCODINGS):
+    """
+    Picks the first encoding that decodes a byte sample; a multi-byte
+    character cut off at the end of the sample is not treated as an error
+
+    Returns: encoding name, or None if none fits
+    """
+
+    for encoding in encodings:
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+
+    return None
+
+
+def split_lines(text):
+    """
+    Splits text with the same universal-newline rules as text-mode files
+    """
+
+    return text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+
+
+def sample_file(filename, size=SAMPLE_SIZE):
+    """
+    Returns the first size bytes of a file
+    """
+
+    with open(filename, 'rb') as file:
+        return file.read(size)
+
+
+class MappedSalesFile:
+    """
+    Read-only memory-mapped view of a sales data file
+
+    Lines and '|' separators are located by scanning the raw bytes, and
+    only the byte ranges that are asked for get decoded. Several processes
+    mapping the same file share the operating system page cache.
+    """
+
+    def __init__(self, filename, encoding=None):
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+
+        if self.size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # Empty files cannot be mapped
+            self._map = b''
+        self._view = memoryview(self._map)
+
+        self.encoding = encoding or detect_encoding(self._map[:SAMPLE_SIZE])
+        self.data_start = self._header_end()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._view.release()
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def _header_end(self):
+        """
+        Offset just past the header line (universal newlines)
+        """
+
+        newline = self._map.find(b'\n')
+        carriage = self._map.find(b'\r')
+
+        if carriage != -1 and (newline == -1 or carriage < newline):
+            if carriage + 1 == newline:
+                return newline + 1
+            return carriage + 1
+
+        return newline + 1 if newline != -1 else self.size
+
+    def find(self, sub, start=0, end=None):
+        return self._map.find(sub, start, self.size if end is None else end)
+
+    def rfind(self, sub, start=0, end=None):
+        return self._map.rfind(sub, start, self.size if end is None else end)
+
+    def raw(self, start, end):
+        """
+        Returns the undecoded bytes in [start, end) as a memoryview
+        """
+
+        return self._view[start:end]
+
+    def decode(self, start, end):
+        """
+        Decodes the bytes in [start, end) straight from the mapping
+        """
+
+        return str(self._view[start:end], self.encoding)
+
+    def iter_line_spans(self, start=None, end=None):
+        """
+        Yields: (line_start, line_end) byte offsets of each line after the
+        header, line_end excluding the newline
+        """
+
+        mm = self._map
+        pos = self.data_start if start is None else start
+        end = self.size if end is None else end
+
+        while pos < end:
+            newline = mm.find(b'\n', pos, end)
+            if newline == -1:
+                yield pos, end
+                return
+
+            yield pos, newline
+            pos = newline + 1
+
+    def iter_lines(self, start=None, end=None):
+        """
+        Yields: decoded lines, stripped, with empty lines skipped, exactly
+        as read_sales_data returns them
+        """
+
+        for line_start, line_end in self.iter_line_spans(start, end):
+            text = self.decode(line_start, line_end)
+
+            # A lone '\r' also ends a line in text mode
+            for line in text.split('\r') if '\r' in text else (text,):
+                line = line.strip()
+                if line:
+                    yield line
@@ -0,0 +1,110 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.fast_parser import parse_columns
+from utils.mmap_reader import ENCODINGS, MappedSalesFile, split_lines
+from utils.transaction_table import TransactionTable
+
+
+def parse_sales_file_parallel(filename, workers=None, chunks_per_worker=4):
+    """
+    Parses a sales file in a process pool
+
+    The file is split into byte ranges aligned on newlines; each worker
+    maps the file, decodes and parses its range into a TransactionTable
+    chunk and the chunks are merged in file order, so the result matches
+    parse_transactions(read_sales_data(filename), columnar=True)
+
+    workers: number of processes (defaults to os.cpu_count())
+
+    Returns: (TransactionTable, parse_summary) where parse_summary has
+    'total_lines', 'parsed' and 'skipped' counts
+    """
+
+    workers = workers or os.cpu_count() or 1
+
+    try:
+        with MappedSalesFile(filename) as mapped:
+            encoding = mapped.encoding
+            ranges = chunk_ranges(mapped, workers * chunks_per_worker)
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        return TransactionTable(), _parse_summary(0, 0)
+
+    # The encoding comes from a sample; if a chunk later fails to decode,
+    # the whole file is parsed again with the next fallback encoding
+    encodings = list(ENCODINGS[ENCODINGS.index(encoding):]) if encoding else []
+
+    for encoding in encodings:
+        tasks = [(filename, encoding, start, end) for start, end in ranges]
+
+        try:
+            if workers == 1 or len(tasks) == 1:
+                results = [_parse_chunk(task) for task in tasks]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(_parse_chunk, tasks))
+        except UnicodeDecodeError:
+            continue
+
+        table = TransactionTable()
+        total_lines = 0
+
+        for chunk, line_count in results:
+            table.extend(chunk)
+            total_lines += line_count
+
+        return table, _parse_summary(total_lines, len(table))
+
+    print("Error: Unable to read file with supported encodings.")
+    return TransactionTable(), _parse_summary(0, 0)
+
+
+def chunk_ranges(mapped, chunk_count):
+    """
+    Splits the data lines of a MappedSalesFile into roughly equal byte
+    ranges that end just after a newline, so no line is cut between chunks
+
+    Returns: list of (start, end) byte offsets
+    """
+
+    size = mapped.size
+    start = mapped.data_start
+    step = max(1, (size - start) // max(1, chunk_count))
+
+    ranges = []
+
+    while start < size:
+        newline = mapped.find(b'\n', min(start + step, size) - 1)
+        end = size if newline == -1 else newline + 1
+        ranges.append((start, end))
+        start = end
+
+    return ranges or [(start, start)]
+
+
+def _parse_chunk(task):
+    """
+    Worker: parses one byte range into a TransactionTable
+
+    Returns: (TransactionTable, number of non-empty data lines)
+    """
+
+    filename, encoding, start, end = task
+
+    with MappedSalesFile(filename, encoding) as mapped:
+        text = mapped.decode(start, end)
+
+    lines = [line for line in map(str.strip, split_lines(text)) if line]
+    columns = parse_columns(lines)
+    table = TransactionTable() if columns is None else TransactionTable.from_columns(*columns)
+
+    return table, len(lines)
+
+
+def _parse_summary(total_lines, parsed):
+    return {
+        'total_lines': total_lines,
+        'parsed': parsed,
+        'skipped': total_lines - parsed
+    }
@@ -1,135 +1,388 @@
+import csv
+import io
+import json
+import os
 from datetime import datetime
-from utils.data_processor import (
-    calculate_total_revenue,
-    region_wise_sales,
-    top_selling_products,
-    customer_analysis,
-    daily_sales_trend,
-    find_peak_sales_day,
-    low_performing_products
-)
+from html import escape
+from string import Template
 
+from utils.data_processor import aggregate_sales
+from utils.instrumentation import instrumented
 
-def generate_sales_report(transactions, enriched_transactions, output_file='output/sales_report.txt'):
+
+# Output formats: renderer name -> file extension used next to the text report
+REPORT_FORMATS = {'text': '.txt', 'json': '.json', 'csv': '.csv', 'html': '.html'}
+
+
+@instrumented()
+def generate_sales_report(transactions, enriched_transactions, output_file='output/sales_report.txt',
+                          metrics=None, formats=('text',)):
     """
     Task 4.1
     Generates a comprehensive formatted text report
+
+    metrics: optional SalesAggregator already computed for transactions,
+    so the report does not walk the data again
+
+    formats: any of 'text', 'json', 'csv', 'html'. Every format is
+    rendered from the same report data; text goes to output_file and the
+    others to output_file with the format's extension. Each file is
+    built in memory and written with a single write.
+
+    Returns: {format: file written}
     """
 
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    total_records = len(transactions)
+    report = build_report_data(transactions, enriched_transactions, metrics)
+    return write_report(report, output_file, formats)
+
+
+def build_report_data(transactions, enriched_transactions, metrics=None):
+    """
+    Computes everything the report shows, once, for all renderers
+
+    Returns: dictionary of report sections
+    """
+
+    if metrics is None:
+        metrics = aggregate_sales(transactions)
+
+    total_records = metrics.transaction_count
+    total_revenue = metrics.calculate_total_revenue()
+    dates = metrics.daily.keys()
+    enriched_count, success_rate, failed_products = enrichment_summary(enriched_transactions)
+
+    return {
+        'generated': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'records': total_records,
+        'total_revenue': total_revenue,
+        'avg_order_value': total_revenue / total_records if total_records else 0,
+        'date_range': (min(dates), max(dates)),
+        'regions': metrics.region_wise_sales(),
+        'top_products': metrics.top_selling_products(5),
+        'top_customers': metrics.top_customers(5),
+        'daily_trends': metrics.daily_sales_trend(),
+        'peak_day': metrics.find_peak_sales_day(),
+        'low_products': metrics.low_performing_products(),
+        'enrichment': {
+            'enriched_count': enriched_count,
+            'success_rate': success_rate,
+            'failed_products': failed_products
+        }
+    }
+
 
-    # ---------- OVERALL SUMMARY ----------
-    total_revenue = calculate_total_revenue(transactions)
-    avg_order_value = total_revenue / total_records if total_records else 0
+def write_report(report, output_file, formats=('text',)):
+    """
+    Renders report in each format and writes each with one write call
+
+    Returns: {format: file written}
+    """
 
-    dates = [tx['Date'] for tx in transactions]
-    date_range = f"{min(dates)} to {max(dates)}"
+    unknown = set(formats) - set(REPORT_FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown report formats: {', '.join(sorted(unknown))}")
 
-    # ---------- REGION PERFORMANCE ----------
-    region_stats = region_wise_sales(transactions)
+    written = {}
+    for report_format in formats:
+        filename = output_file
+        if report_format != 'text':
+            filename = os.path.splitext(output_file)[0] + REPORT_FORMATS[report_format]
 
-    # ---------- TOP PRODUCTS & CUSTOMERS ----------
-    top_products = top_selling_products(transactions, 5)
-    customers = customer_analysis(transactions)
-    top_customers = list(customers.items())[:5]
+        content = RENDERERS[report_format](report)
+        # csv output carries its own \r\n line endings
+        newline = '' if report_format == 'csv' else None
+        with open(filename, 'w', encoding='utf-8', newline=newline) as f:
+            f.write(content)
+        written[report_format] = filename
 
-    # ---------- DAILY TRENDS ----------
-    daily_trends = daily_sales_trend(transactions)
-    peak_day = find_peak_sales_day(transactions)
+    return written
 
-    # ---------- PRODUCT PERFORMANCE ----------
-    low_products = low_performing_products(transactions)
 
-    # ---------- API ENRICHMENT SUMMARY ----------
-    enriched_count = sum(1 for tx in enriched_transactions if tx.get('API_Match'))
-    success_rate = (enriched_count / len(enriched_transactions)) * 100 if enriched_transactions else 0
-    failed_products = sorted({
-        tx['ProductName']
-        for tx in enriched_transactions
-        if not tx.get('API_Match')
-    })
+# Renderers
+def render_text(report):
+    """
+    The original fixed-width text layout
+    """
 
-    # ---------- WRITE REPORT ----------
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write("=" * 50 + "\n")
-        f.write("SALES ANALYTICS REPORT\n")
-        f.write(f"Generated: {now}\n")
-        f.write(f"Records Processed: {total_records}\n")
-        f.write("=" * 50 + "\n\n")
+    rule = "-" * 40 + "\n"
+    parts = [
+        "=" * 50 + "\n",
+        "SALES ANALYTICS REPORT\n",
+        f"Generated: {report['generated']}\n",
+        f"Records Processed: {report['records']}\n",
+        "=" * 50 + "\n\n",
 
         # 1. OVERALL SUMMARY
-        f.write("OVERALL SUMMARY\n")
-        f.write("-" * 40 + "\n")
-        f.write(f"Total Revenue: ₹{total_revenue:,.2f}\n")
-        f.write(f"Total Transactions: {total_records}\n")
-        f.write(f"Average Order Value: ₹{avg_order_value:,.2f}\n")
-        f.write(f"Date Range: {date_range}\n\n")
+        "OVERALL SUMMARY\n",
+        rule,
+        f"Total Revenue: ₹{report['total_revenue']:,.2f}\n",
+        f"Total Transactions: {report['records']}\n",
+        f"Average Order Value: ₹{report['avg_order_value']:,.2f}\n",
+        f"Date Range: {report['date_range'][0]} to {report['date_range'][1]}\n\n",
 
         # 2. REGION-WISE PERFORMANCE
-        f.write("REGION-WISE PERFORMANCE\n")
-        f.write("-" * 40 + "\n")
-        f.write(f"{'Region':<10}{'Sales':<15}{'% of Total':<12}{'Transactions'}\n")
-        for region, data in region_stats.items():
-            f.write(
-                f"{region:<10}"
-                f"₹{data['total_sales']:,.2f}  "
-                f"{data['percentage']:<12}%"
-                f"{data['transaction_count']}\n"
-            )
-        f.write("\n")
-
-        # 3. TOP 5 PRODUCTS
-        f.write("TOP 5 PRODUCTS\n")
-        f.write("-" * 40 + "\n")
-        f.write(f"{'Rank':<6}{'Product':<20}{'Qty Sold':<12}{'Revenue'}\n")
-        for i, (name, qty, rev) in enumerate(top_products, 1):
-            f.write(f"{i:<6}{name:<20}{qty:<12}₹{rev:,.2f}\n")
-        f.write("\n")
-
-        # 4. TOP 5 CUSTOMERS
-        f.write("TOP 5 CUSTOMERS\n")
-        f.write("-" * 40 + "\n")
-        f.write(f"{'Rank':<6}{'Customer':<12}{'Total Spent':<15}{'Orders'}\n")
-        for i, (cid, data) in enumerate(top_customers, 1):
-            f.write(
-                f"{i:<6}{cid:<12}"
-                f"₹{data['total_spent']:,.2f}  "
-                f"{data['purchase_count']}\n"
-            )
-        f.write("\n")
-
-        # 5. DAILY SALES TREND
-        f.write("DAILY SALES TREND\n")
-        f.write("-" * 40 + "\n")
-        f.write(f"{'Date':<12}{'Revenue':<15}{'Txns':<8}{'Customers'}\n")
-        for date, data in daily_trends.items():
-            f.write(
-                f"{date:<12}"
-                f"₹{data['revenue']:,.2f}  "
-                f"{data['transaction_count']:<8}"
-                f"{data['unique_customers']}\n"
-            )
-        f.write("\n")
-
-        # 6. PRODUCT PERFORMANCE ANALYSIS
-        f.write("PRODUCT PERFORMANCE ANALYSIS\n")
-        f.write("-" * 40 + "\n")
-        f.write(f"Best Selling Day: {peak_day[0]} (₹{peak_day[1]:,.2f}, {peak_day[2]} transactions)\n")
-
-        if low_products:
-            f.write("Low Performing Products:\n")
-            for name, qty, rev in low_products:
-                f.write(f"- {name}: Qty {qty}, Revenue ₹{rev:,.2f}\n")
-        else:
-            f.write("No low performing products found\n")
-        f.write("\n")
-
-        # 7. API ENRICHMENT SUMMARY
-        f.write("API ENRICHMENT SUMMARY\n")
-        f.write("-" * 40 + "\n")
-        f.write(f"Total Products Enriched: {enriched_count}\n")
-        f.write(f"Success Rate: {success_rate:.2f}%\n")
-        f.write("Products Not Enriched:\n")
-        for p in failed_products:
-            f.write(f"- {p}\n")
+        "REGION-WISE PERFORMANCE\n",
+        rule,
+        f"{'Region':<10}{'Sales':<15}{'% of Total':<12}{'Transactions'}\n"
+    ]
+    for region, data in report['regions'].items():
+        parts.append(
+            f"{region:<10}"
+            f"₹{data['total_sales']:,.2f}  "
+            f"{data['percentage']:<12}%"
+            f"{data['transaction_count']}\n"
+        )
+    parts.append("\n")
+
+    # 3. TOP 5 PRODUCTS
+    parts += ["TOP 5 PRODUCTS\n", rule, f"{'Rank':<6}{'Product':<20}{'Qty Sold':<12}{'Revenue'}\n"]
+    for i, (name, qty, rev) in enumerate(report['top_products'], 1):
+        parts.append(f"{i:<6}{name:<20}{qty:<12}₹{rev:,.2f}\n")
+    parts.append("\n")
+
+    # 4. TOP 5 CUSTOMERS
+    parts += ["TOP 5 CUSTOMERS\n", rule, f"{'Rank':<6}{'Customer':<12}{'Total Spent':<15}{'Orders'}\n"]
+    for i, (cid, data) in enumerate(report['top_customers'], 1):
+        parts.append(
+            f"{i:<6}{cid:<12}"
+            f"₹{data['total_spent']:,.2f}  "
+            f"{data['purchase_count']}\n"
+        )
+    parts.append("\n")
+
+    # 5. DAILY SALES TREND
+    parts += ["DAILY SALES TREND\n", rule, f"{'Date':<12}{'Revenue':<15}{'Txns':<8}{'Customers'}\n"]
+    for date, data in report['daily_trends'].items():
+        parts.append(
+            f"{date:<12}"
+            f"₹{data['revenue']:,.2f}  "
+            f"{data['transaction_count']:<8}"
+            f"{data['unique_customers']}\n"
+        )
+    parts.append("\n")
+
+    # 6. PRODUCT PERFORMANCE ANALYSIS
+    peak_day = report['peak_day']
+    parts += [
+        "PRODUCT PERFORMANCE ANALYSIS\n",
+        rule,
+        f"Best Selling Day: {peak_day[0]} (₹{peak_day[1]:,.2f}, {peak_day[2]} transactions)\n"
+    ]
+    if report['low_products']:
+        parts.append("Low Performing Products:\n")
+        for name, qty, rev in report['low_products']:
+            parts.append(f"- {name}: Qty {qty}, Revenue ₹{rev:,.2f}\n")
+    else:
+        parts.append("No low performing products found\n")
+    parts.append("\n")
+
+    # 7. API ENRICHMENT SUMMARY
+    enrichment = report['enrichment']
+    parts += [
+        "API ENRICHMENT SUMMARY\n",
+        rule,
+        f"Total Products Enriched: {enrichment['enriched_count']}\n",
+        f"Success Rate: {enrichment['success_rate']:.2f}%\n",
+        "Products Not Enriched:\n"
+    ]
+    for p in enrichment['failed_products']:
+        parts.append(f"- {p}\n")
+
+    return ''.join(parts)
+
+
+def render_json(report):
+    """
+    Unformatted numbers, for dashboards
+    """
+
+    peak_date, peak_revenue, peak_count = report['peak_day']
+    data = {
+        'generated': report['generated'],
+        'records': report['records'],
+        'summary': {
+            'total_revenue': report['total_revenue'],
+            'total_transactions': report['records'],
+            'avg_order_value': report['avg_order_value'],
+            'date_from': report['date_range'][0],
+            'date_to': report['date_range'][1]
+        },
+        'regions': report['regions'],
+        'top_products': [
+            {'rank': i, 'product': name, 'quantity': qty, 'revenue': rev}
+            for i, (name, qty, rev) in enumerate(report['top_products'], 1)
+        ],
+        'top_customers': [
+            {'rank': i, 'customer': cid, 'total_spent': entry['total_spent'],
+             'orders': entry['purchase_count']}
+            for i, (cid, entry) in enumerate(report['top_customers'], 1)
+        ],
+        'daily_trends': report['daily_trends'],
+        'peak_day': {'date': peak_date, 'revenue': peak_revenue, 'transaction_count': peak_count},
+        'low_performing_products': [
+            {'product': name, 'quantity': qty, 'revenue': rev}
+            for name, qty, rev in report['low_products']
+        ],
+        'enrichment': report['enrichment']
+    }
+    return json.dumps(data, indent=2, ensure_ascii=False) + "\n"
+
+
+def render_csv(report):
+    """
+    One long table: section, key, metric, value
+    """
+
+    rows = [
+        ('summary', '', 'generated', report['generated']),
+        ('summary', '', 'total_revenue', report['total_revenue']),
+        ('summary', '', 'total_transactions', report['records']),
+        ('summary', '', 'avg_order_value', report['avg_order_value']),
+        ('summary', '', 'date_from', report['date_range'][0]),
+        ('summary', '', 'date_to', report['date_range'][1])
+    ]
+    for region, data in report['regions'].items():
+        rows += [('region', region, metric, value) for metric, value in data.items()]
+    for i, (name, qty, rev) in enumerate(report['top_products'], 1):
+        rows += [('top_product', name, 'rank', i), ('top_product', name, 'quantity', qty),
+                 ('top_product', name, 'revenue', rev)]
+    for i, (cid, entry) in enumerate(report['top_customers'], 1):
+        rows += [('top_customer', cid, 'rank', i), ('top_customer', cid, 'total_spent', entry['total_spent']),
+                 ('top_customer', cid, 'orders', entry['purchase_count'])]
+    for date, data in report['daily_trends'].items():
+        rows += [('daily', date, metric, value) for metric, value in data.items()]
+    peak_date, peak_revenue, peak_count = report['peak_day']
+    rows += [('peak_day', peak_date, 'revenue', peak_revenue),
+             ('peak_day', peak_date, 'transaction_count', peak_count)]
+    for name, qty, rev in report['low_products']:
+        rows += [('low_product', name, 'quantity', qty), ('low_product', name, 'revenue', rev)]
+    enrichment = report['enrichment']
+    rows += [('enrichment', '', 'enriched_count', enrichment['enriched_count']),
+             ('enrichment', '', 'success_rate', enrichment['success_rate'])]
+    rows += [('enrichment', name, 'not_enriched', 1) for name in enrichment['failed_products']]
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(('section', 'key', 'metric', 'value'))
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+HTML_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Sales Analytics Report</title>
+<style>
+body { font-family: sans-serif; margin: 2em; }
+table { border-collapse: collapse; margin-bottom: 1.5em; }
+th, td { border: 1px solid #ccc; padding: 4px 10px; text-align: left; }
+td.num { text-align: right; }
+</style>
+</head>
+<body>
+<h1>Sales Analytics Report</h1>
+<p>Generated: $generated &middot; Records Processed: $records</p>
+$sections
+</body>
+</html>
+""")
+
+
+def render_html(report):
+    """
+    Standalone HTML page with one table per section
+    """
+
+    enrichment = report['enrichment']
+    peak_date, peak_revenue, peak_count = report['peak_day']
+
+    sections = [
+        _html_table('Overall Summary', ('Metric', 'Value'), [
+            ('Total Revenue', _money(report['total_revenue'])),
+            ('Total Transactions', report['records']),
+            ('Average Order Value', _money(report['avg_order_value'])),
+            ('Date Range', f"{report['date_range'][0]} to {report['date_range'][1]}")
+        ]),
+        _html_table('Region-wise Performance', ('Region', 'Sales', '% of Total', 'Transactions'), [
+            (region, _money(data['total_sales']), f"{data['percentage']}%", data['transaction_count'])
+            for region, data in report['regions'].items()
+        ]),
+        _html_table('Top 5 Products', ('Rank', 'Product', 'Qty Sold', 'Revenue'), [
+            (i, name, qty, _money(rev)) for i, (name, qty, rev) in enumerate(report['top_products'], 1)
+        ]),
+        _html_table('Top 5 Customers', ('Rank', 'Customer', 'Total Spent', 'Orders'), [
+            (i, cid, _money(entry['total_spent']), entry['purchase_count'])
+            for i, (cid, entry) in enumerate(report['top_customers'], 1)
+        ]),
+        _html_table('Daily Sales Trend', ('Date', 'Revenue', 'Txns', 'Customers'), [
+            (date, _money(data['revenue']), data['transaction_count'], data['unique_customers'])
+            for date, data in report['daily_trends'].items()
+        ]),
+        _html_table('Product Performance Analysis', ('Product', 'Qty', 'Revenue'), [
+            (name, qty, _money(rev)) for name, qty, rev in report['low_products']
+        ], f"Best Selling Day: {escape(peak_date)} ({_money(peak_revenue)}, {peak_count} transactions)"),
+        _html_table('API Enrichment Summary', ('Products Not Enriched',), [
+            (name,) for name in enrichment['failed_products']
+        ], f"Total Products Enriched: {enrichment['enriched_count']} &middot; "
+           f"Success Rate: {enrichment['success_rate']:.2f}%")
+    ]
+
+    return HTML_TEMPLATE.substitute(
+        generated=escape(report['generated']),
+        records=report['records'],
+        sections='\n'.join(sections)
+    )
+
+
+def _money(value):
+    return f"₹{value:,.2f}"
+
+
+def _html_table(title, headers, rows, note=None):
+    parts = [f"<h2>{escape(title)}</h2>"]
+    if note:
+        # Notes are built from formatted numbers and escaped values only
+        parts.append(f"<p>{note}</p>")
+    parts.append("<table>")
+    parts.append("<tr>" + "".join(f"<th>{escape(h)}</th>" for h in headers) + "</tr>")
+    for row in rows:
+        cells = []
+        for value in row:
+            css = ' class="num"' if isinstance(value, (int, float)) else ''
+            cells.append(f"<td{css}>{escape(str(value))}</td>")
+        parts.append("<tr>" + "".join(cells) + "</tr>")
+    parts.append("</table>")
+    return '\n'.join(parts)
+
+
+RENDERERS = {
+    'text': render_text,
+    'json': render_json,
+    'csv': render_csv,
+    'html': render_html
+}
+
+
+def enrichment_summary(enriched_transactions):
+    """
+    Returns: (enriched_count, success_rate, failed_products) for a list of
+    enriched dictionaries or an EnrichedTransactions view
+    """
+
+    total = len(enriched_transactions)
+
+    if hasattr(enriched_transactions, 'match_count'):
+        enriched_count = enriched_transactions.match_count()
+        failed_products = enriched_transactions.unmatched_product_names()
+    else:
+        enriched_count = sum(1 for tx in enriched_transactions if tx.get('API_Match'))
+        failed_products = sorted({
+            tx['ProductName']
+            for tx in enriched_transactions
+            if not tx.get('API_Match')
+        })
+
+    success_rate = (enriched_count / total) * 100 if total else 0
+
+    return enriched_count, success_rate, failed_products
@@ -0,0 +1,173 @@
+import json
+import os
+
+from utils.data_processor import SalesAggregator
+from utils.file_handler import VALIDATION_VERSION
+from utils.storage import atomic_write
+from utils.transaction_table import TransactionTable
+
+
+# Bumped whenever the cube file layout changes
+CUBE_VERSION = 2
+
+
+class RollupCube:
+    """
+    Revenue, quantity and transaction count rolled up by
+    (Region, Date, ProductName, CustomerID)
+
+    Region-filtered analysis is answered from the cells of one region
+    instead of revalidating and rescanning raw rows. Amount filters work
+    on individual transactions and cannot be answered from the cube.
+    Sums are equal to the raw-row results up to floating-point rounding.
+
+    The cube only pays off when many rows share a cell; with about one
+    cell per row, loading it is slower than aggregating the rows again,
+    which is why the pipeline only uses it when asked to.
+    """
+
+    def __init__(self):
+        # region -> {(date, product name, customer id): [revenue, quantity, count]}
+        self.regions = {}
+        self._aggregates = {}
+
+    @classmethod
+    def build(cls, transactions):
+        """
+        Builds the cube from transaction dictionaries or a TransactionTable
+        """
+
+        cube = cls()
+
+        if isinstance(transactions, TransactionTable):
+            cube._add_table(transactions)
+        else:
+            for tx in transactions:
+                qty = tx['Quantity']
+                cube._add_cell(
+                    tx['Region'], (tx['Date'], tx['ProductName'], tx['CustomerID']),
+                    qty * tx['UnitPrice'], qty, 1
+                )
+
+        return cube
+
+    def _add_table(self, table):
+        cells = {}
+
+        for key, amount, qty in zip(
+                zip(table.regions.codes, table.dates.codes,
+                    table.product_names.codes, table.customer_ids.codes),
+                table.amounts, table.quantities):
+            cell = cells.get(key)
+            if cell is None:
+                cell = cells[key] = [0.0, 0, 0]
+            cell[0] += amount
+            cell[1] += qty
+            cell[2] += 1
+
+        regions = table.regions.values
+        dates = table.dates.values
+        names = table.product_names.values
+        customers = table.customer_ids.values
+
+        for (r, d, n, c), (revenue, qty, count) in cells.items():
+            self._add_cell(regions[r], (dates[d], names[n], customers[c]), revenue, qty, count)
+
+    def _add_cell(self, region, key, revenue, quantity, count):
+        cells = self.regions.setdefault(region, {})
+        cell = cells.get(key)
+        if cell is None:
+            cell = cells[key] = [0.0, 0, 0]
+        cell[0] += revenue
+        cell[1] += quantity
+        cell[2] += count
+        self._aggregates.clear()
+
+    def __len__(self):
+        return sum(len(cells) for cells in self.regions.values())
+
+    def aggregate(self, region=None):
+        """
+        Returns: SalesAggregator for one region (or all regions), built from
+        the cube cells and cached for repeated queries
+        """
+
+        if region not in self._aggregates:
+            agg = SalesAggregator()
+            regions = [region] if region else list(self.regions)
+
+            for name in regions:
+                for (date, product, cid), (revenue, qty, count) in self.regions.get(name, {}).items():
+                    agg.add_group(name, date, product, cid, revenue, qty, count)
+
+            self._aggregates[region] = agg
+
+        return self._aggregates[region]
+
+    def region_wise_sales(self, region=None):
+        return self.aggregate(region).region_wise_sales()
+
+    def top_selling_products(self, n=5, region=None):
+        return self.aggregate(region).top_selling_products(n)
+
+    def daily_sales_trend(self, region=None):
+        return self.aggregate(region).daily_sales_trend()
+
+    def save(self, filename, source=None):
+        """
+        Persists the cube as JSON; source (a data file path) is
+        fingerprinted so load() can tell whether the cube is still current,
+        and the file format and validation rules versions are stamped so a
+        cube built under other rules is not reused
+        """
+
+        cells = [
+            [region, date, product, cid, revenue, qty, count]
+            for region, region_cells in self.regions.items()
+            for (date, product, cid), (revenue, qty, count) in region_cells.items()
+        ]
+
+        data = {
+            'version': CUBE_VERSION,
+            'validation': VALIDATION_VERSION,
+            'source': _source_fingerprint(source) if source else None,
+            'cells': cells
+        }
+
+        with atomic_write(filename, encoding='utf-8') as file:
+            json.dump(data, file)
+
+    @classmethod
+    def load(cls, filename, source=None):
+        """
+        Returns: the persisted cube, or None if it is missing, unreadable,
+        from another format or validation rules version, or was built from
+        a different version of source
+        """
+
+        try:
+            with open(filename, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(data, dict) or data.get('version') != CUBE_VERSION \
+                or data.get('validation') != VALIDATION_VERSION:
+            return None
+
+        if source and data.get('source') != _source_fingerprint(source):
+            return None
+
+        cube = cls()
+        for region, date, product, cid, revenue, qty, count in data['cells']:
+            cube._add_cell(region, (date, product, cid), revenue, qty, count)
+        return cube
+
+
+def _source_fingerprint(source):
+    try:
+        stat = os.stat(source)
+    except OSError:
+        return None
+
+    return {'path': os.path.abspath(source), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
@@ -0,0 +1,209 @@
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.api_handler import build_join_index
+from utils.data_processor import SalesAggregator
+from utils.file_handler import stream_transactions
+from utils.id_index import TransactionIDIndex
+from utils.incremental import SUMMARY_KEYS
+from utils.instrumentation import instrumented
+from utils.report_generator import generate_sales_report
+from utils.sketches import SalesSketch
+
+
+def resolve_shards(source, pattern='*.txt'):
+    """
+    Expands a directory (files matching pattern), a glob or a list of
+    paths into a sorted list of shard files
+
+    Returns: list of filenames
+    """
+
+    if isinstance(source, (list, tuple)):
+        shards = []
+        for item in source:
+            shards.extend(resolve_shards(item, pattern))
+        return shards
+
+    if os.path.isdir(source):
+        return sorted(
+            path for path in glob.glob(os.path.join(source, pattern)) if os.path.isfile(path)
+        )
+
+    if glob.has_magic(source):
+        return sorted(path for path in glob.glob(source) if os.path.isfile(path))
+
+    return [source]
+
+
+class ShardPartial:
+    """
+    Mergeable result of one or more shards
+
+    aggregator: SalesAggregator (or SalesSketch in approximate mode)
+    filter_summary: validate_and_filter style counts
+    product_rows: {ProductID: {ProductName: rows}} of the valid rows,
+    enough for the report's enrichment summary without keeping any rows
+    transaction_ids: TransactionIDIndex of every valid TransactionID seen
+    """
+
+    def __init__(self, aggregator, filter_summary=None, product_rows=None, shards=None,
+                 transaction_ids=None):
+        self.aggregator = aggregator
+        self.filter_summary = filter_summary or dict.fromkeys(SUMMARY_KEYS, 0)
+        self.product_rows = product_rows or {}
+        self.shards = shards or []
+        self.transaction_ids = transaction_ids if transaction_ids is not None else TransactionIDIndex()
+
+    def merge(self, other):
+        self.aggregator.merge(other.aggregator)
+
+        for key in SUMMARY_KEYS:
+            self.filter_summary[key] += other.filter_summary[key]
+
+        for pid, names in other.product_rows.items():
+            merged = self.product_rows.setdefault(pid, {})
+            for name, rows in names.items():
+                merged[name] = merged.get(name, 0) + rows
+
+        self.shards.extend(other.shards)
+        return self
+
+
+def process_shard(filename, region=None, min_amount=None, max_amount=None,
+                  approximate=False, sketch_options=None, seen_ids=()):
+    """
+    Streams one shard file through validation and the filters into a
+    fresh aggregator (runs in a worker process)
+
+    seen_ids: TransactionIDs already taken by earlier shards; their rows
+    here count as duplicates
+
+    Returns: ShardPartial for the file
+    """
+
+    if approximate:
+        aggregator = SalesSketch(**(sketch_options or {}))
+    else:
+        aggregator = SalesAggregator()
+
+    transaction_ids = TransactionIDIndex()
+    for transaction_id in seen_ids:
+        transaction_ids.add(transaction_id)
+
+    valid, filter_summary = stream_transactions(filename, region, min_amount, max_amount, dedup=transaction_ids)
+
+    product_rows = {}
+    for tx in valid:
+        aggregator.add(tx)
+        names = product_rows.get(tx['ProductID'])
+        if names is None:
+            names = product_rows[tx['ProductID']] = {}
+        names[tx['ProductName']] = names.get(tx['ProductName'], 0) + 1
+
+    # A missing file leaves the summary empty
+    filter_summary = {key: filter_summary.get(key, 0) for key in SUMMARY_KEYS}
+
+    shard = {'file': filename, 'rows': filter_summary['final_count']}
+    return ShardPartial(aggregator, filter_summary, product_rows, [shard], transaction_ids)
+
+
+def _process_shard_task(task):
+    return process_shard(*task)
+
+
+@instrumented(rows_in=None, rows_out=lambda partial: partial.filter_summary['final_count'])
+def ingest_shards(source, workers=None, region=None, min_amount=None, max_amount=None,
+                  approximate=False, pattern='*.txt', **sketch_options):
+    """
+    Processes every shard in source independently and reduces the partial
+    results into one
+
+    source: directory, glob or list of sales data files
+    workers: worker processes (defaults to os.cpu_count(); 1 runs in-process)
+    approximate: build SalesSketch partials (sketch_options as for
+    aggregate_sales) instead of exact aggregators
+
+    Partials are merged in shard order. The aggregator answers
+    region_wise_sales, customer_analysis and the other analysis functions
+    exactly as for one concatenated file (float totals may differ in the
+    last digits because they are summed per shard first).
+
+    Duplicate TransactionIDs are removed across shards too: the reduce
+    step merges each shard's ID index into the IDs of the shards before
+    it, and a shard repeating any of them is processed again (in this
+    process) with those IDs counted as duplicates. The first occurrence
+    in shard order is kept, as in one concatenated file.
+
+    Returns: ShardPartial (empty aggregator if there are no shards)
+    """
+
+    shards = resolve_shards(source, pattern)
+    tasks = [(shard, region, min_amount, max_amount, approximate, sketch_options) for shard in shards]
+    workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+
+    if workers <= 1:
+        partials = map(_process_shard_task, tasks)
+        return _reduce(partials, tasks, approximate, sketch_options)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return _reduce(executor.map(_process_shard_task, tasks), tasks, approximate, sketch_options)
+
+
+def _reduce(partials, tasks, approximate, sketch_options):
+    result = ShardPartial(SalesSketch(**sketch_options) if approximate else SalesAggregator())
+    seen = result.transaction_ids
+
+    for partial, task in zip(partials, tasks):
+        repeated = seen.update(partial.transaction_ids)
+        if repeated:
+            partial = process_shard(*task, seen_ids=repeated)
+        partial.transaction_ids = None
+        result.merge(partial)
+
+    return result
+
+
+class ShardedEnrichment:
+    """
+    Enrichment summary over sharded results
+
+    Supports the parts of EnrichedTransactions the report uses (len,
+    match_count, unmatched_product_names) from per-ProductID row counts.
+    """
+
+    def __init__(self, product_rows, product_mapping):
+        self.product_rows = product_rows
+        self.join_index = build_join_index(product_rows.keys(), product_mapping)
+
+    def __len__(self):
+        return sum(sum(names.values()) for names in self.product_rows.values())
+
+    def __bool__(self):
+        return bool(self.product_rows)
+
+    def match_count(self):
+        return sum(
+            sum(names.values()) for pid, names in self.product_rows.items()
+            if self.join_index[pid]['API_Match']
+        )
+
+    def unmatched_product_names(self):
+        return sorted({
+            name
+            for pid, names in self.product_rows.items() if not self.join_index[pid]['API_Match']
+            for name in names
+        })
+
+
+def generate_sharded_report(partial, product_mapping, output_file='output/sales_report.txt',
+                            formats=('text',)):
+    """
+    Writes the usual sales report from a reduced ShardPartial
+
+    Returns: {format: file written}
+    """
+
+    enriched = ShardedEnrichment(partial.product_rows, product_mapping)
+    return generate_sales_report(None, enriched, output_file, metrics=partial.aggregator, formats=formats)
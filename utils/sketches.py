@@ -0,0 +1,500 @@
+import hashlib
+import heapq
+import math
+from array import array
+
+from utils.transaction_table import TransactionTable, bincount
+
+
+def _hash128(item):
+    """
+    Stable 128-bit hash (the built-in hash() is salted per process, which
+    would stop sketches built in different workers from merging)
+    """
+
+    return int.from_bytes(hashlib.blake2b(str(item).encode('utf-8'), digest_size=16).digest(), 'little')
+
+
+def hash_item(item):
+    """
+    Returns: the 64-bit hash HyperLogLog.add_hash expects
+    """
+
+    return _hash128(item) & 0xFFFFFFFFFFFFFFFF
+
+
+class HyperLogLog:
+    """
+    Approximate distinct counter
+
+    error is the target relative standard error; the register count is
+    the smallest power of two with 1.04 / sqrt(m) <= error. Small sets are
+    kept as exact hashes until they would outgrow the registers, so low
+    cardinalities are counted exactly.
+    """
+
+    def __init__(self, error=0.02):
+        self.precision = min(18, max(4, math.ceil(math.log2((1.04 / error) ** 2))))
+        self.m = 1 << self.precision
+        self.registers = None
+        self._sparse = set()
+
+    def __len__(self):
+        return self.count()
+
+    def add(self, item):
+        self.add_hash(hash_item(item))
+
+    def add_hash(self, h):
+        """
+        Adds an item already hashed with hash_item(), so callers that see
+        the same key repeatedly can hash it once
+        """
+
+        if self.registers is None:
+            self._sparse.add(h)
+            if len(self._sparse) > self.m // 8:
+                self._densify()
+        else:
+            self._add_hash(h)
+
+    def _add_hash(self, h):
+        p = self.precision
+        index = h >> (64 - p)
+        rest = h & ((1 << (64 - p)) - 1)
+        rank = (64 - p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def _densify(self):
+        self.registers = bytearray(self.m)
+        for h in self._sparse:
+            self._add_hash(h)
+        self._sparse = set()
+
+    def count(self):
+        if self.registers is None:
+            return len(self._sparse)
+
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m) if m >= 128 else {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate in the small range
+            estimate = m * math.log(m / zeros)
+
+        return int(round(estimate))
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLogs with different precision")
+
+        if other.registers is None:
+            for h in other._sparse:
+                if self.registers is None:
+                    self._sparse.add(h)
+                else:
+                    self._add_hash(h)
+            if self.registers is None and len(self._sparse) > self.m // 8:
+                self._densify()
+        else:
+            if self.registers is None:
+                self._densify()
+            self.registers = bytearray(map(max, self.registers, other.registers))
+
+        return self
+
+    def memory_bytes(self):
+        if self.registers is None:
+            return len(self._sparse) * 8
+        return self.m
+
+
+class CountMinSketch:
+    """
+    Approximate per-key totals for non-negative weights
+
+    Estimates never undercount, and overcount by at most epsilon * total
+    weight with probability 1 - delta.
+    """
+
+    def __init__(self, epsilon=0.001, delta=0.01):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.table = array('d', bytes(8 * self.width * self.depth))
+        self.total = 0.0
+
+    def _cells(self, item):
+        h = _hash128(item)
+        h1 = h & 0xFFFFFFFFFFFFFFFF
+        h2 = (h >> 64) | 1
+        width = self.width
+        return [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+
+    def add(self, item, weight=1):
+        table = self.table
+        for cell in self._cells(item):
+            table[cell] += weight
+        self.total += weight
+
+    def estimate(self, item):
+        table = self.table
+        return min(table[cell] for cell in self._cells(item))
+
+    def merge(self, other):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("cannot merge Count-Min sketches with different dimensions")
+
+        self.table = array('d', map(float.__add__, self.table, other.table))
+        self.total += other.total
+        return self
+
+    def memory_bytes(self):
+        return self.table.itemsize * len(self.table)
+
+
+class SpaceSaving:
+    """
+    Heavy-hitter tracker keeping at most k weighted counters
+
+    Any key whose true total exceeds total weight / k is guaranteed to be
+    tracked; a tracked count overestimates the truth by at most its error.
+    """
+
+    def __init__(self, k=100):
+        self.k = k
+        # key -> [count, error]
+        self.counters = {}
+        self.total = 0.0
+        # (count, key) entries; stale ones are skipped when popping
+        self._heap = []
+
+    def add(self, item, weight=1):
+        self.total += weight
+        counter = self.counters.get(item)
+
+        if counter is not None:
+            counter[0] += weight
+        elif len(self.counters) < self.k:
+            counter = self.counters[item] = [weight, 0]
+        else:
+            floor, victim = self._pop_min()
+            del self.counters[victim]
+            counter = self.counters[item] = [floor + weight, floor]
+
+        heapq.heappush(self._heap, (counter[0], item))
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(c[0], key) for key, c in self.counters.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        heap = self._heap
+        counters = self.counters
+        while True:
+            count, item = heapq.heappop(heap)
+            counter = counters.get(item)
+            if counter is not None and counter[0] == count:
+                return count, item
+
+    def _floor(self):
+        if len(self.counters) < self.k:
+            return 0
+        return min(counter[0] for counter in self.counters.values())
+
+    def merge(self, other):
+        """
+        Mergeable summary merge: a key missing from one side is charged that
+        side's minimum count, then the k largest counters are kept
+        """
+
+        if other.k != self.k:
+            raise ValueError("cannot merge Space-Saving summaries with different k")
+
+        floor = self._floor()
+        other_floor = other._floor()
+
+        merged = {}
+        for key in self.counters.keys() | other.counters.keys():
+            count, error = self.counters.get(key, (floor, floor))
+            other_count, other_error = other.counters.get(key, (other_floor, other_floor))
+            merged[key] = [count + other_count, error + other_error]
+
+        kept = heapq.nlargest(self.k, merged.items(), key=lambda x: x[1][0])
+        self.counters = dict(kept)
+        self.total += other.total
+        self._heap = [(c[0], key) for key, c in self.counters.items()]
+        heapq.heapify(self._heap)
+        return self
+
+    def top(self, n):
+        """
+        Returns: [(key, estimated_count, max_overestimate)] largest first
+        """
+
+        top = heapq.nlargest(n, self.counters.items(), key=lambda x: x[1][0])
+        return [(key, count, error) for key, (count, error) in top]
+
+    def memory_bytes(self):
+        # Two numbers per counter plus the key reference
+        return len(self.counters) * 3 * 8
+
+
+class SalesSketch:
+    """
+    Approximate counterpart of SalesAggregator for high-cardinality data
+
+    Revenue totals per region and per date stay exact. Unique customers
+    per date use a HyperLogLog, and top products / customers come from
+    Space-Saving summaries with Count-Min sketches for the secondary
+    totals, so memory no longer grows with the number of customers.
+    Product names are kept as a set (bounded by the catalog, not the
+    data) so low_performing_products can check each one against a
+    Count-Min sketch of quantities.
+    Sketches built on separate chunks or processes combine with merge().
+    """
+
+    def __init__(self, hll_error=0.02, cms_epsilon=0.001, cms_delta=0.01, top_k=100):
+        self.options = {
+            'hll_error': hll_error, 'cms_epsilon': cms_epsilon,
+            'cms_delta': cms_delta, 'top_k': top_k
+        }
+
+        self.total_revenue = 0.0
+        self.transaction_count = 0
+
+        # region -> [total_sales, transaction_count]
+        self.regions = {}
+        # date -> [revenue, transaction_count, HyperLogLog of customers]
+        self.daily = {}
+
+        self.product_quantity = SpaceSaving(top_k)
+        self.product_revenue = CountMinSketch(cms_epsilon, cms_delta)
+        self.product_units = CountMinSketch(cms_epsilon, cms_delta)
+        self.product_names = set()
+        self.customer_spent = SpaceSaving(top_k)
+        self.customer_count = CountMinSketch(cms_epsilon, cms_delta)
+
+    def add_row(self, date, name, cid, region, qty, revenue):
+        self.total_revenue += revenue
+        self.transaction_count += 1
+
+        region_data = self.regions.get(region)
+        if region_data is None:
+            region_data = self.regions[region] = [0.0, 0]
+        region_data[0] += revenue
+        region_data[1] += 1
+
+        daily_data = self.daily.get(date)
+        if daily_data is None:
+            daily_data = self.daily[date] = [0.0, 0, HyperLogLog(self.options['hll_error'])]
+        daily_data[0] += revenue
+        daily_data[1] += 1
+        daily_data[2].add(cid)
+
+        self.product_quantity.add(name, qty)
+        self.product_revenue.add(name, revenue)
+        self.product_units.add(name, qty)
+        self.product_names.add(name)
+        self.customer_spent.add(cid, revenue)
+        self.customer_count.add(cid)
+
+    def add(self, tx):
+        qty = tx['Quantity']
+        self.add_row(
+            tx['Date'], tx['ProductName'], tx['CustomerID'], tx['Region'],
+            qty, qty * tx['UnitPrice']
+        )
+
+    def add_all(self, transactions):
+        if isinstance(transactions, TransactionTable):
+            self._add_table(transactions)
+        else:
+            for tx in transactions:
+                self.add(tx)
+        return self
+
+    def _add_table(self, table):
+        """
+        Pre-aggregates a table by code, so each sketch sees one weighted
+        update per distinct key and each customer is hashed once
+        """
+
+        amounts = table.amounts
+        self.transaction_count += len(table)
+        for amount in amounts:
+            self.total_revenue += amount
+
+        def group(column, weights=None, zero=0.0):
+            return bincount(column.codes, len(column.values), weights, zero)
+
+        regions = table.regions
+        for code, (sales, count) in enumerate(zip(group(regions, amounts), group(regions))):
+            if count:
+                region_data = self.regions.setdefault(regions.values[code], [0.0, 0])
+                region_data[0] += sales
+                region_data[1] += count
+
+        names = table.product_names
+        for name, qty, revenue, count in zip(
+                names.values, group(names, table.quantities, 0), group(names, amounts), group(names)):
+            if count:
+                self.product_quantity.add(name, qty)
+                self.product_revenue.add(name, revenue)
+                self.product_units.add(name, qty)
+                self.product_names.add(name)
+
+        customers = table.customer_ids
+        for cid, spent, count in zip(customers.values, group(customers, amounts), group(customers)):
+            if count:
+                self.customer_spent.add(cid, spent)
+                self.customer_count.add(cid, count)
+
+        dates = table.dates
+        day_sketches = []
+        for date, revenue, count in zip(dates.values, group(dates, amounts), group(dates)):
+            daily_data = self.daily.get(date)
+            if daily_data is None and count:
+                daily_data = self.daily[date] = [0.0, 0, HyperLogLog(self.options['hll_error'])]
+            if count:
+                daily_data[0] += revenue
+                daily_data[1] += count
+            day_sketches.append(daily_data[2] if count else None)
+
+        customer_hashes = [hash_item(cid) for cid in customers.values]
+        for d, c in zip(dates.codes, customers.codes):
+            day_sketches[d].add_hash(customer_hashes[c])
+
+    def merge(self, other):
+        """
+        Folds another SalesSketch built with the same options into this one
+        """
+
+        if other.options != self.options:
+            raise ValueError("cannot merge sketches built with different options")
+
+        self.total_revenue += other.total_revenue
+        self.transaction_count += other.transaction_count
+
+        for region, (sales, count) in other.regions.items():
+            region_data = self.regions.setdefault(region, [0.0, 0])
+            region_data[0] += sales
+            region_data[1] += count
+
+        for date, (revenue, count, customers) in other.daily.items():
+            daily_data = self.daily.get(date)
+            if daily_data is None:
+                daily_data = self.daily[date] = [0.0, 0, HyperLogLog(self.options['hll_error'])]
+            daily_data[0] += revenue
+            daily_data[1] += count
+            daily_data[2].merge(customers)
+
+        self.product_quantity.merge(other.product_quantity)
+        self.product_revenue.merge(other.product_revenue)
+        self.product_units.merge(other.product_units)
+        self.product_names |= other.product_names
+        self.customer_spent.merge(other.customer_spent)
+        self.customer_count.merge(other.customer_count)
+        return self
+
+    def calculate_total_revenue(self):
+        return self.total_revenue
+
+    def region_wise_sales(self):
+        sorted_regions = sorted(self.regions.items(), key=lambda x: x[1][0], reverse=True)
+
+        result = {}
+        for region, (total_sales, count) in sorted_regions:
+            percentage = (total_sales / self.total_revenue) * 100 if self.total_revenue else 0
+            result[region] = {
+                'total_sales': total_sales,
+                'transaction_count': count,
+                'percentage': round(percentage, 2)
+            }
+
+        return result
+
+    def top_selling_products(self, n=5):
+        """
+        Returns: [(name, estimated_quantity, estimated_revenue)]
+        """
+
+        return [
+            (name, qty, self.product_revenue.estimate(name))
+            for name, qty, _ in self.product_quantity.top(n)
+        ]
+
+    def top_customers(self, n=5):
+        result = []
+        for cid, spent, _ in self.customer_spent.top(n):
+            count = max(1, int(self.customer_count.estimate(cid)))
+            result.append((cid, {
+                'total_spent': spent,
+                'purchase_count': count,
+                'avg_order_value': round(spent / count, 2)
+            }))
+        return result
+
+    def customer_analysis(self):
+        """
+        Returns: customer_analysis() entries for the top_k tracked
+        customers only, without products_bought
+        """
+
+        return dict(self.top_customers(self.options['top_k']))
+
+    def daily_sales_trend(self):
+        result = {}
+        for date in sorted(self.daily.keys()):
+            revenue, count, customers = self.daily[date]
+            result[date] = {
+                'revenue': revenue,
+                'transaction_count': count,
+                'unique_customers': customers.count()
+            }
+
+        return result
+
+    def find_peak_sales_day(self):
+        peak_date = max(self.daily.items(), key=lambda x: x[1][0])
+
+        return (
+            peak_date[0],
+            peak_date[1][0],
+            peak_date[1][1]
+        )
+
+    def low_performing_products(self, threshold=10):
+        """
+        Count-Min estimates never undercount, so every product returned
+        really sold fewer than threshold units. A product is missed only
+        when its estimate is inflated past the threshold, i.e. it sold
+        within cms_epsilon * total units of it (with probability
+        1 - cms_delta the overcount is at most that).
+
+        Returns: [(name, estimated_quantity, estimated_revenue)] by quantity
+        """
+
+        low_products = []
+        for name in self.product_names:
+            qty = self.product_units.estimate(name)
+            if qty < threshold:
+                low_products.append((name, int(qty), self.product_revenue.estimate(name)))
+
+        low_products.sort(key=lambda x: (x[1], x[0]))
+        return low_products
+
+    def memory_bytes(self):
+        """
+        Approximate payload size of the sketches (excluding dict overhead)
+        """
+
+        return (
+            sum(customers.memory_bytes() for _, _, customers in self.daily.values())
+            + self.product_quantity.memory_bytes() + self.product_revenue.memory_bytes()
+            + self.product_units.memory_bytes()
+            + self.customer_spent.memory_bytes() + self.customer_count.memory_bytes()
+        )
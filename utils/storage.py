@@ -0,0 +1,89 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+
+# Block alignment of the binary files (int64 / float64 columns cast in place)
+ALIGNMENT = 8
+
+
+def align(position):
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+@contextmanager
+def atomic_write(filename, mode='w', encoding=None, buffering=-1):
+    """
+    Writes filename through a temporary file next to it, replacing
+    filename only once the block completes, so readers (including ones
+    that have the old file memory-mapped) never see a partial file
+
+    The parent directory is created if needed. The temporary name is
+    unique per process and thread; if the block raises, it is removed
+    and filename is left as it was.
+
+    Yields: the open temporary file
+    """
+
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_file = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_file, mode, encoding=encoding, buffering=buffering) as file:
+            yield file
+        os.replace(tmp_file, filename)
+    except BaseException:
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+        raise
+
+
+def write_blocks(file, magic, header, blocks):
+    """
+    Writes the binary layout shared by the columnar and ID index files:
+    magic, 8-byte little-endian header length, the JSON header, then each
+    block (bytes-like) 8-byte aligned
+
+    header['blocks'] is set to [offset, length] per block, with offsets
+    relative to the aligned end of the header
+    """
+
+    header['blocks'] = []
+    position = 0
+    for block in blocks:
+        length = memoryview(block).nbytes
+        header['blocks'].append([position, length])
+        position = align(position + length)
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = align(len(magic) + 8 + len(header_bytes))
+
+    file.write(magic)
+    file.write(len(header_bytes).to_bytes(8, 'little'))
+    file.write(header_bytes)
+
+    for block, (position, _) in zip(blocks, header['blocks']):
+        file.write(b'\0' * (data_start + position - file.tell()))
+        file.write(block)
+
+
+def read_header(data, magic):
+    """
+    Reads the header of a write_blocks() layout from data (e.g. an mmap)
+
+    Returns: (header, offset of the first block), or None if data does
+    not start with magic; a corrupt header raises ValueError
+    """
+
+    if data[:len(magic)] != magic:
+        return None
+
+    start = len(magic)
+    header_size = int.from_bytes(data[start:start + 8], 'little')
+    header = json.loads(bytes(data[start + 8:start + 8 + header_size]))
+    return header, align(start + 8 + header_size)
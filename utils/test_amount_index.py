@@ -0,0 +1,118 @@
+import random
+
+import pytest
+
+from utils.amount_index import build_amount_index
+from utils.file_handler import parse_transactions, read_sales_data, validate_and_filter
+from utils.transaction_table import TransactionTable
+
+
+def _transactions(count=400, seed=3):
+    """
+    Returns: transaction dictionaries with many repeated amounts; every
+    tenth row is invalid (no CustomerID) and carries an extreme amount
+    """
+
+    rng = random.Random(seed)
+    transactions = []
+    for i in range(count):
+        # Invalid rows: amounts 10 and 1,000,000 around the valid 100 - 5,000
+        invalid = i % 10 == 0
+        if invalid:
+            price = 0.01 if i % 20 else 1000.0
+        else:
+            price = float(rng.choice((100, 250, 400, 1000)))
+        transactions.append({
+            'TransactionID': f'T{i:04d}', 'Date': '2024-12-01', 'ProductID': 'P101',
+            'ProductName': 'Laptop',
+            'Quantity': 1000 if invalid else rng.randint(1, 5),
+            'UnitPrice': price,
+            'CustomerID': '' if invalid else f'C{i % 13:03d}',
+            'Region': ('North', 'South', 'East', 'West')[i % 4]
+        })
+    return transactions
+
+
+def _linear(rows, amounts, min_amount, max_amount):
+    return [
+        row for row in rows
+        if (min_amount is None or amounts[row] >= min_amount)
+        and (max_amount is None or amounts[row] <= max_amount)
+    ]
+
+
+BOUNDS = [
+    (None, None), (400.0, None), (None, 400.0), (400.0, 400.0), (250.0, 1000.0),
+    (100.0, 5000.0), (399.99, 400.01), (5000.0, 100.0), (0.0, 50.0)
+]
+
+
+# range_rows
+@pytest.mark.parametrize('min_amount, max_amount', BOUNDS)
+def test_range_rows_matches_linear_scan(min_amount, max_amount):
+    transactions = _transactions()
+    index = build_amount_index(transactions)
+    amounts = [tx['Quantity'] * tx['UnitPrice'] for tx in transactions]
+
+    # Bounds equal to stored amounts are inclusive on both sides
+    expected = _linear(range(len(amounts)), amounts, min_amount, max_amount)
+    assert sorted(index.range_rows(min_amount, max_amount)) == expected
+
+
+# Filters with and without the index
+@pytest.mark.parametrize('columnar', [False, True])
+@pytest.mark.parametrize('region', [None, 'North', 'Nowhere'])
+@pytest.mark.parametrize('min_amount, max_amount', BOUNDS)
+def test_indexed_filter_matches_scan(capsys, columnar, region, min_amount, max_amount):
+    transactions = _transactions()
+    if columnar:
+        transactions = TransactionTable.from_dicts(transactions)
+    index = build_amount_index(transactions)
+
+    expected = validate_and_filter(transactions, region, min_amount, max_amount)
+    expected_output = capsys.readouterr().out
+    result = validate_and_filter(transactions, region, min_amount, max_amount, amount_index=index)
+
+    assert list(result[0]) == list(expected[0])
+    assert result[1:] == expected[1:]
+    assert capsys.readouterr().out == expected_output
+
+
+def test_indexed_filter_on_sample_file(capsys):
+    transactions = parse_transactions(read_sales_data('data/sales_data.txt'))
+    index = build_amount_index(transactions)
+
+    for region in (None, 'East'):
+        for min_amount, max_amount in ((None, 5000.0), (1000.0, 60000.0), (45000.0, 45000.0)):
+            assert validate_and_filter(transactions, region, min_amount, max_amount, amount_index=index) \
+                == validate_and_filter(transactions, region, min_amount, max_amount)
+
+
+# Amount range display
+def test_range_display_ignores_invalid_rows(capsys):
+    transactions = _transactions()
+    valid = [tx for tx in transactions if tx['CustomerID']]
+    amounts = [tx['Quantity'] * tx['UnitPrice'] for tx in valid]
+
+    validate_and_filter(transactions, amount_index=build_amount_index(transactions))
+
+    # The invalid rows hold the largest and smallest amounts
+    assert f"Transaction Amount Range: {min(amounts)} - {max(amounts)}" in capsys.readouterr().out
+
+
+def test_min_max_under_mask():
+    transactions = _transactions()
+    index = build_amount_index(transactions)
+    amounts = [tx['Quantity'] * tx['UnitPrice'] for tx in transactions]
+    rng = random.Random(9)
+
+    for _ in range(20):
+        mask = bytearray(rng.random() < 0.1 for _ in amounts)
+        if not any(mask):
+            continue
+        selected = [amount for amount, keep in zip(amounts, mask) if keep]
+        assert index.min_max(mask) == (min(selected), max(selected))
+
+    assert index.min_max() == (min(amounts), max(amounts))
+    with pytest.raises(ValueError):
+        index.min_max(bytearray(len(amounts)))
@@ -0,0 +1,229 @@
+import json
+import threading
+import time
+
+import pytest
+
+from benchmarks.stub_server import StubProductServer, stub_product
+from utils import api_handler
+from utils.api_handler import (
+    EnrichedTransactions, create_session, fetch_all_products_paginated, get_with_retry,
+    load_product_catalog, read_cached_product_catalog, wait_for_revalidation
+)
+from utils.file_handler import parse_transactions, read_sales_data
+
+
+FAST = {'retries': 0, 'backoff': 0}
+
+
+@pytest.fixture
+def server():
+    with StubProductServer(total=150) as stub:
+        yield stub
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    return str(tmp_path / 'product_cache.json')
+
+
+def _age_cache(cache_file, seconds):
+    with open(cache_file, 'r', encoding='utf-8') as file:
+        cache = json.load(file)
+    cache['fetched_at'] -= seconds
+    with open(cache_file, 'w', encoding='utf-8') as file:
+        json.dump(cache, file)
+    return cache
+
+
+# Catalog cache (TTL and ETag revalidation)
+def test_cold_cache_fetches_whole_catalog(server, cache_file):
+    products = load_product_catalog(cache_file, url=server.base_url, **FAST)
+
+    assert len(products) == 150
+    assert products[7]['title'] == stub_product(7)['title']
+    assert read_cached_product_catalog(cache_file) == products
+
+
+def test_fresh_cache_makes_no_request(server, cache_file):
+    load_product_catalog(cache_file, url=server.base_url, **FAST)
+    requests_before = server.requests
+
+    products = load_product_catalog(cache_file, ttl=3600, url=server.base_url, **FAST)
+
+    assert len(products) == 150
+    assert server.requests == requests_before
+
+
+def test_stale_cache_revalidates_with_etag(server, cache_file):
+    load_product_catalog(cache_file, url=server.base_url, **FAST)
+    stale = _age_cache(cache_file, 7200)
+    requests_before = server.requests
+
+    products = load_product_catalog(cache_file, ttl=3600, url=server.base_url, background=False, **FAST)
+
+    # One conditional request answered 304; the cache is fresh again
+    assert len(products) == 150
+    assert server.requests == requests_before + 1
+    refreshed = api_handler._read_catalog_cache(cache_file)
+    assert refreshed['etag'] == stale['etag']
+    assert time.time() - refreshed['fetched_at'] < 60
+
+
+def test_stale_cache_refetches_changed_catalog(server, cache_file):
+    load_product_catalog(cache_file, url=server.base_url, **FAST)
+    _age_cache(cache_file, 7200)
+    server.total = 180
+
+    products = load_product_catalog(cache_file, ttl=3600, url=server.base_url, background=False, **FAST)
+
+    assert len(products) == 180
+    assert api_handler._read_catalog_cache(cache_file)['etag'] == '"catalog-180"'
+
+
+def test_background_revalidation_finishes_before_wait_returns(server, cache_file):
+    load_product_catalog(cache_file, url=server.base_url, **FAST)
+    _age_cache(cache_file, 7200)
+    server.total = 160
+
+    # The stale entries are served at once, the refresh lands afterwards
+    products = load_product_catalog(cache_file, ttl=3600, url=server.base_url, **FAST)
+    assert len(products) == 150
+
+    assert wait_for_revalidation(timeout=30)
+    assert len(read_cached_product_catalog(cache_file)) == 160
+
+
+def test_stale_cache_served_when_network_fails(server, cache_file):
+    load_product_catalog(cache_file, url=server.base_url, **FAST)
+    _age_cache(cache_file, 7200)
+    server.stop()
+
+    products = load_product_catalog(cache_file, ttl=3600, url=server.base_url, background=False, **FAST)
+
+    assert len(products) == 150
+
+
+def test_no_cache_and_no_network_gives_empty_catalog(server, cache_file):
+    server.stop()
+    assert load_product_catalog(cache_file, url=server.base_url, **FAST) == {}
+
+
+# Paginated fetching and retries
+@pytest.mark.parametrize('max_limit', [None, 30])
+def test_paginated_fetch_reads_every_page(max_limit):
+    with StubProductServer(total=250, max_limit=max_limit) as stub:
+        products = fetch_all_products_paginated(stub.base_url, page_size=100, **FAST)
+
+    # A capped page size is followed, so nothing past the first page is lost
+    assert [p['id'] for p in products] == list(range(1, 251))
+    assert stub.requests == (3 if max_limit is None else 9)
+
+
+def test_paginated_fetch_respects_host_limit():
+    with StubProductServer(total=200, delay=0.05, max_limit=10) as stub:
+        products = fetch_all_products_paginated(
+            stub.base_url, page_size=10, max_workers=8, host_limit=2, **FAST
+        )
+
+    assert len(products) == 200
+    assert stub.max_active == 2
+
+
+def test_host_limit_is_shared_by_callers_with_other_limits():
+    with StubProductServer(total=200, delay=0.05, max_limit=10) as stub:
+        # The first caller for the host sets its limit
+        session = create_session()
+        try:
+            get_with_retry(session, stub.base_url, host_limit=2, **FAST)
+        finally:
+            session.close()
+
+        results = []
+        fetches = [
+            threading.Thread(target=lambda limit=limit: results.append(fetch_all_products_paginated(
+                stub.base_url, page_size=10, max_workers=8, host_limit=limit, **FAST
+            )))
+            for limit in (2, 6)
+        ]
+        for fetch in fetches:
+            fetch.start()
+        for fetch in fetches:
+            fetch.join()
+
+    assert [len(products) for products in results] == [200, 200]
+    assert stub.max_active == 2
+
+
+def test_paginated_fetch_retries_transient_errors():
+    with StubProductServer(total=250, fail_next=3) as stub:
+        products = fetch_all_products_paginated(stub.base_url, page_size=100, retries=3, backoff=0)
+
+    assert len(products) == 250
+    assert stub.requests == 3 + 3
+
+
+def test_paginated_fetch_fails_as_a_whole(capsys):
+    with StubProductServer(total=250, fail_next=10) as stub:
+        assert fetch_all_products_paginated(stub.base_url, page_size=100, retries=1, backoff=0) == []
+
+    assert "Product fetch failed" in capsys.readouterr().out
+
+
+def test_get_with_retry_returns_last_retryable_response(server):
+    server.fail_next = 5
+    session = create_session()
+    try:
+        response = get_with_retry(session, server.base_url, retries=2, backoff=0)
+    finally:
+        session.close()
+
+    assert response.status_code == 503
+    assert server.requests == 3
+
+
+def test_get_with_retry_raises_when_host_unreachable(server):
+    server.stop()
+    session = create_session()
+    try:
+        with pytest.raises(api_handler.requests.ConnectionError):
+            get_with_retry(session, server.base_url, retries=1, backoff=0)
+    finally:
+        session.close()
+
+
+# EnrichedTransactions
+@pytest.fixture
+def sales_rows(capsys):
+    return parse_transactions(read_sales_data('data/sales_data.txt'))
+
+
+@pytest.fixture
+def partial_catalog():
+    return {pid: {'title': f'Product {pid}', 'category': 'c', 'brand': 'b', 'rating': 4.0}
+            for pid in (101, 102, 104, 107)}
+
+
+@pytest.mark.parametrize('columnar', [False, True])
+def test_enriched_slices_match_rows(sales_rows, partial_catalog, columnar):
+    transactions = parse_transactions(read_sales_data('data/sales_data.txt'), columnar=True) \
+        if columnar else sales_rows
+    enriched = EnrichedTransactions(transactions, partial_catalog)
+    rows = list(enriched)
+
+    for part in (slice(3, 11), slice(None, 5), slice(-6, None), slice(0, 40, 7)):
+        sliced = enriched[part]
+        assert isinstance(sliced, EnrichedTransactions)
+        assert list(sliced) == rows[part]
+        assert sliced.match_count() == sum(row['API_Match'] for row in rows[part])
+        assert sliced.unmatched_product_names() == sorted(
+            {row['ProductName'] for row in rows[part] if not row['API_Match']})
+
+
+def test_unmatched_product_names_same_for_table_and_list(sales_rows, partial_catalog):
+    table = parse_transactions(read_sales_data('data/sales_data.txt'), columnar=True)
+    names = EnrichedTransactions(sales_rows, partial_catalog).unmatched_product_names()
+
+    assert names
+    assert EnrichedTransactions(table, partial_catalog).unmatched_product_names() == names
+
@@ -0,0 +1,27 @@
+from benchmarks.data_generator import generate_sales_file
+from utils.file_handler import parse_transactions, read_sales_data
+
+
+def test_same_seed_gives_identical_file(tmp_path):
+    first = generate_sales_file(str(tmp_path / 'a.txt'), 2000, seed=4, noise=0.1)
+    second = generate_sales_file(str(tmp_path / 'b.txt'), 2000, seed=4, noise=0.1)
+
+    with open(first, 'rb') as a, open(second, 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_noise_includes_rows_with_wrong_field_count(tmp_path):
+    filename = generate_sales_file(str(tmp_path / 'sales.txt'), 2000, seed=4, noise=0.1)
+    lines = read_sales_data(filename)
+
+    bad = [line for line in lines if line.count('|') != 7]
+    assert bad
+    assert len(lines) - len(parse_transactions(lines)) == len(bad)
+
+
+def test_no_noise_gives_clean_rows(tmp_path):
+    filename = generate_sales_file(str(tmp_path / 'sales.txt'), 2000, seed=4, noise=0)
+    lines = read_sales_data(filename)
+
+    assert len(lines) == 2000
+    assert len(parse_transactions(lines)) == 2000
@@ -0,0 +1,212 @@
+import pytest
+
+from benchmarks.data_generator import generate_sales_file
+from utils import data_processor
+from utils.data_processor import LazyCustomerAnalysis, SalesAggregator, customer_analysis
+from utils.file_handler import parse_transactions, read_sales_data, validate_and_filter
+
+
+TRANSACTIONS = [
+    {'TransactionID': f'T{i:03d}', 'Date': '2024-12-01', 'ProductID': f'P{100 + i % 4}',
+     'ProductName': f'Product {i % 4}', 'Quantity': 1 + i % 3, 'UnitPrice': 100.0 * (1 + i % 5),
+     'CustomerID': f'C{i % 7:03d}', 'Region': 'North'}
+    for i in range(40)
+]
+
+
+# LazyCustomerAnalysis
+def test_lazy_items_scan_transactions_once(monkeypatch):
+    agg = SalesAggregator(track_customer_products=False).add_all(TRANSACTIONS)
+    lazy = LazyCustomerAnalysis(agg, TRANSACTIONS)
+
+    scans = []
+    prefetch = LazyCustomerAnalysis.prefetch
+    monkeypatch.setattr(LazyCustomerAnalysis, 'prefetch',
+                        lambda self, cids: scans.append(1) or prefetch(self, cids))
+
+    entries = dict(lazy.items())
+    expected = customer_analysis(TRANSACTIONS)
+
+    assert len(scans) == 1
+    assert list(entries) == list(expected)
+    for cid, entry in expected.items():
+        assert set(entries[cid].pop('products_bought')) == set(entry.pop('products_bought'))
+        assert entries[cid] == entry
+
+
+def test_untracked_aggregator_refuses_eager_customer_analysis():
+    agg = SalesAggregator(track_customer_products=False).add_all(TRANSACTIONS)
+
+    with pytest.raises(ValueError, match='track_customer_products'):
+        customer_analysis(agg)
+    with pytest.raises(ValueError, match='track_customer_products'):
+        agg.customer_analysis()
+
+    # Totals-only views still work
+    expected = customer_analysis(TRANSACTIONS)
+    assert [(cid, dict(entry, products_bought=expected[cid]['products_bought']))
+            for cid, entry in agg.top_customers(3)] == list(expected.items())[:3]
+
+    lazy = customer_analysis(TRANSACTIONS, lazy=True)
+    assert {cid: set(entry['products_bought']) for cid, entry in lazy.items()} \
+        == {cid: set(entry['products_bought']) for cid, entry in expected.items()}
+
+
+# Reference implementations: the per-function scans SalesAggregator replaced
+def reference_total_revenue(transactions):
+    total = 0.0
+    for tx in transactions:
+        total += tx['Quantity'] * tx['UnitPrice']
+    return total
+
+
+def reference_region_wise_sales(transactions):
+    regions = {}
+    for tx in transactions:
+        data = regions.setdefault(tx['Region'], {'total_sales': 0.0, 'transaction_count': 0})
+        data['total_sales'] += tx['Quantity'] * tx['UnitPrice']
+        data['transaction_count'] += 1
+
+    total = reference_total_revenue(transactions)
+    result = {}
+    for region, data in sorted(regions.items(), key=lambda x: x[1]['total_sales'], reverse=True):
+        percentage = data['total_sales'] / total * 100 if total else 0
+        result[region] = dict(data, percentage=round(percentage, 2))
+    return result
+
+
+def reference_products(transactions):
+    products = {}
+    for tx in transactions:
+        data = products.setdefault(tx['ProductName'], [0, 0.0])
+        data[0] += tx['Quantity']
+        data[1] += tx['Quantity'] * tx['UnitPrice']
+    return products
+
+
+def reference_top_selling_products(transactions, n=5):
+    products = sorted(reference_products(transactions).items(), key=lambda x: x[1][0], reverse=True)
+    return [(name, qty, revenue) for name, (qty, revenue) in products[:n]]
+
+
+def reference_customer_analysis(transactions):
+    customers = {}
+    for tx in transactions:
+        data = customers.setdefault(tx['CustomerID'], [0.0, 0, set()])
+        data[0] += tx['Quantity'] * tx['UnitPrice']
+        data[1] += 1
+        data[2].add(tx['ProductName'])
+
+    return {
+        cid: {
+            'total_spent': spent,
+            'purchase_count': count,
+            'avg_order_value': round(spent / count, 2),
+            'products_bought': list(products)
+        }
+        for cid, (spent, count, products) in sorted(customers.items(), key=lambda x: x[1][0], reverse=True)
+    }
+
+
+def reference_daily(transactions):
+    daily = {}
+    for tx in transactions:
+        data = daily.setdefault(tx['Date'], [0.0, 0, set()])
+        data[0] += tx['Quantity'] * tx['UnitPrice']
+        data[1] += 1
+        data[2].add(tx['CustomerID'])
+    return daily
+
+
+def reference_daily_sales_trend(transactions):
+    daily = reference_daily(transactions)
+    return {
+        date: {'revenue': daily[date][0], 'transaction_count': daily[date][1],
+               'unique_customers': len(daily[date][2])}
+        for date in sorted(daily)
+    }
+
+
+def reference_find_peak_sales_day(transactions):
+    date, (revenue, count, _) = max(reference_daily(transactions).items(), key=lambda x: x[1][0])
+    return date, revenue, count
+
+
+def reference_low_performing_products(transactions, threshold=10):
+    low = [(name, qty, revenue) for name, (qty, revenue) in reference_products(transactions).items()
+           if qty < threshold]
+    low.sort(key=lambda x: x[1])
+    return low
+
+
+# Wrappers against the reference implementations
+@pytest.fixture(scope='module')
+def sources(tmp_path_factory):
+    """
+    Returns: {name: filename} for the sample, a generated file and the
+    sample with repeated TransactionIDs (so dedup=False changes the rows)
+    """
+
+    directory = tmp_path_factory.mktemp('sales')
+    generated = str(directory / 'generated.txt')
+    generate_sales_file(generated, 3000, seed=7, noise=0.1)
+
+    with open('data/sales_data.txt', 'r', encoding='utf-8') as file:
+        lines = file.readlines()
+    duplicated = directory / 'duplicated.txt'
+    duplicated.write_text(''.join(lines + lines[3:15]), encoding='utf-8')
+
+    return {'sample': 'data/sales_data.txt', 'generated': generated, 'duplicated': str(duplicated)}
+
+
+def _products_as_sets(analysis):
+    return {cid: dict(entry, products_bought=set(entry['products_bought']))
+            for cid, entry in analysis.items()}
+
+
+@pytest.mark.parametrize('source', ['sample', 'generated', 'duplicated'])
+@pytest.mark.parametrize('columnar', [False, True])
+@pytest.mark.parametrize('filters', [
+    {},
+    {'region': 'North'},
+    {'min_amount': 1000, 'max_amount': 60000},
+    {'region': 'East', 'min_amount': 5000},
+    {'dedup': False}
+])
+def test_wrappers_match_reference(capsys, sources, source, columnar, filters):
+    transactions = parse_transactions(read_sales_data(sources[source]), columnar=columnar)
+    valid, _, _ = validate_and_filter(transactions, **filters)
+    rows = list(valid)
+    assert rows
+
+    assert data_processor.calculate_total_revenue(valid) == reference_total_revenue(rows)
+
+    regions = data_processor.region_wise_sales(valid)
+    assert list(regions.items()) == list(reference_region_wise_sales(rows).items())
+
+    for n in (1, 5, 100):
+        assert data_processor.top_selling_products(valid, n) == reference_top_selling_products(rows, n)
+
+    customers = data_processor.customer_analysis(valid)
+    expected = reference_customer_analysis(rows)
+    assert list(customers) == list(expected)
+    assert _products_as_sets(customers) == _products_as_sets(expected)
+
+    assert list(data_processor.daily_sales_trend(valid).items()) == \
+        list(reference_daily_sales_trend(rows).items())
+    assert data_processor.find_peak_sales_day(valid) == reference_find_peak_sales_day(rows)
+
+    for threshold in (10, 50, 10 ** 6):
+        assert data_processor.low_performing_products(valid, threshold) == \
+            reference_low_performing_products(rows, threshold)
+
+
+def test_duplicated_source_exercises_dedup(capsys, sources):
+    transactions = parse_transactions(read_sales_data(sources['duplicated']))
+
+    kept, _, summary = validate_and_filter(transactions)
+    everything, _, _ = validate_and_filter(transactions, dedup=False)
+
+    assert summary['duplicates'] > 0
+    assert len(everything) == len(kept) + summary['duplicates']
+
@@ -0,0 +1,39 @@
+import pytest
+
+from utils.api_handler import enrich_sales_data
+from utils.enriched_writer import load_enriched_columnar, save_enriched_columnar
+
+
+TRANSACTIONS = [
+    {'TransactionID': 'T001', 'Date': '2024-12-01', 'ProductID': 'P101', 'ProductName': 'Laptop',
+     'Quantity': 2, 'UnitPrice': 45000.0, 'CustomerID': 'C001', 'Region': 'North'},
+    {'TransactionID': 'T002', 'Date': '2024-12-02', 'ProductID': 'P999', 'ProductName': 'Cable',
+     'Quantity': 5, 'UnitPrice': 250.0, 'CustomerID': 'C002', 'Region': 'South'},
+]
+CATALOG = {101: {'title': 'Laptop Pro', 'category': 'laptops', 'brand': 'Acme', 'rating': 4.5}}
+
+
+@pytest.fixture
+def columnar_file(tmp_path):
+    filename = str(tmp_path / 'enriched.sacol')
+    save_enriched_columnar(enrich_sales_data(TRANSACTIONS, CATALOG), filename)
+    return filename
+
+
+# Column views and close()
+def test_close_releases_held_column_views(columnar_file):
+    with load_enriched_columnar(columnar_file) as reader:
+        quantities = reader.column('Quantity')
+        assert list(quantities) == [2, 5]
+
+    with pytest.raises(ValueError):
+        quantities[0]
+
+
+def test_close_with_caller_derived_view_is_safe(columnar_file):
+    reader = load_enriched_columnar(columnar_file)
+    prices = reader.column('UnitPrice')[0:1]
+
+    reader.close()
+    reader.close()
+    assert prices[0] == 45000.0
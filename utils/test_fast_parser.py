@@ -0,0 +1,131 @@
+import random
+
+import pytest
+
+from utils.fast_parser import parse_sales_file_fast, parse_transactions_fast, read_sales_data_fast
+from utils.file_handler import parse_transactions, read_sales_data
+
+
+# Differential corpus: edge-case lines and whole files the fast parser
+# must handle exactly like parse_transactions(read_sales_data(...)) -
+# wrong field counts, bad and unusual numbers, commas, whitespace, line
+# endings and encodings - plus random lines built from the same pieces
+HEADER = 'TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region'
+
+CORPUS_LINES = [
+    'T001|2024-12-01|P101|Laptop|2|45000|C001|North',
+    'T002|2024-12-01|P102|Mouse,Wireless|1|1,500|C002|South',
+    'T003|2024-12-02|P103|Keyboard|1,000|1,2,3|C003|East',
+    'T004|2024-12-02|P104|Monitor|0|18000|C004|West',
+    'T005|2024-12-03|P105|Webcam|-3|-2500.50|C005|North',
+    'X006|2024-12-03|P106|Headphones|1|3000|X006|',
+    'T007|2024-12-04|P107|USB Cable|3|500',
+    'T008|2024-12-04|P108|Laptop|1|45000|C008|North|extra',
+    '|||||||',
+    '||||||',
+    '',
+    'no pipes at all',
+    'T009|2024-12-05|P109|Mouse|two|300|C009|East',
+    'T010|2024-12-05|P110|Mouse|2|abc|C010|East',
+    'T011|2024-12-05|P110|Mouse|2.5|300|C011|East',
+    'T012|2024-12-06|P101|Laptop| 2 | 45000 |C012|South',
+    'T013|2024-12-06|P101| Laptop , Pro |2|1e3|C013|South',
+    'T014|2024-12-06|P101|Laptop|+2|.5|C014|South',
+    'T015|2024-12-06|P101|Laptop|1_000|1_0.5|C015|South',
+    'T016|2024-12-07|P101|Laptop|2|nan|C016|South',
+    'T017|2024-12-07|P101|Laptop|2|inf|C017|South',
+    'T018|2024-12-07|P101|Laptop|2|-Infinity|C018|South',
+    'T019|2024-12-07|P101|Laptop|,|,|C019|South',
+    'T020|2024-12-07|P101|Laptop||100|C020|South',
+    'T021|2024-12-07|P101|Laptop|2||C021|South',
+    'T022|2024-12-08|P101|Lap\ttop|2|100|C022|South',
+    ' T023|2024-12-08|P101|Laptop|2|100|C023|South ',
+    'T024|2024-12-08|P101|Laptop|٢|100|C024|South',
+    'T025|2024-12-08|P101|Café, Crème|2|100|C025|Nörth',
+    'T026|2024-12-08|P101|Laptop|2|100\x0c|C026|South',
+    'T027|2024-12-08|P101|Laptop|99999999999|1.7976931348623157e308|C027|South',
+    'T028|2024-12-08|P101|Laptop|2|100|C028|South\r',
+    'T029|2024-12-08|P101|Laptop|2\n|100|C029|South',
+    'T030|2024-12-08|P101|Laptop|99999999999999999999|100|C030|South',
+    'T031|2024-12-08|P101|Laptop|-9223372036854775808|100|C031|South',
+]
+
+FILE_CASES = [
+    ('lf', '\n'.join([HEADER] + CORPUS_LINES) + '\n', 'utf-8'),
+    ('crlf', '\r\n'.join([HEADER] + CORPUS_LINES), 'utf-8'),
+    ('cr', '\r'.join([HEADER] + CORPUS_LINES) + '\r', 'utf-8'),
+    ('blank and padded lines', '\n'.join([
+        HEADER, '', '   ', '\t' + CORPUS_LINES[0] + '  ', '', ' ' + CORPUS_LINES[1],
+        '\x0c' + CORPUS_LINES[3] + '\x0b', '  |||||||  '
+    ]), 'utf-8'),
+    ('latin-1', '\n'.join([HEADER] + CORPUS_LINES[:27] + CORPUS_LINES[28:]), 'latin-1'),
+    ('cp1252', '\n'.join([HEADER, 'T030|2024-12-09|P101|Laptop €|2|100|C030|South']), 'cp1252'),
+    ('bom', '\ufeff' + '\n'.join([HEADER] + CORPUS_LINES[:5]), 'utf-8'),
+    ('header only', HEADER + '\n', 'utf-8'),
+    ('no header newline', HEADER, 'utf-8'),
+    ('data on header line only', CORPUS_LINES[0], 'utf-8'),
+    ('empty', '', 'utf-8'),
+]
+
+PIECES = ['T1', 'P101', 'Laptop', '2', '1,500', '45000', 'C1', 'North', '', ' ', ',', 'x',
+          '1e3', '-1', '0', ' 3 ', '2,0,0', 'nan', '1.5', '|', 'Mouse, Wireless']
+
+
+def random_lines(count, seed=7):
+    """
+    Lines of 6-10 fields drawn from PIECES, mostly with eight fields
+    """
+
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        fields = rng.choices([8, 8, 8, 7, 9, 6, 10])[0]
+        lines.append('|'.join(rng.choice(PIECES) for _ in range(fields)).strip())
+    return lines
+
+
+def same_rows(actual, expected):
+    # repr keeps nan equal to nan and -0.0 apart from 0.0
+    return repr(actual) == repr(expected)
+
+
+def same_result(lines):
+    expected = parse_transactions(lines)
+    return (
+        same_rows(parse_transactions_fast(lines), expected)
+        and same_rows(parse_transactions_fast(lines, columnar=True).to_dicts(), expected)
+        and same_rows(parse_transactions(lines, columnar=True).to_dicts(), expected)
+    )
+
+
+@pytest.mark.parametrize('line', CORPUS_LINES)
+def test_corpus_line(line):
+    assert same_result([line])
+
+
+def test_whole_corpus_with_random_lines():
+    lines = CORPUS_LINES + random_lines(5000)
+    assert same_result(lines)
+    assert [line for line in lines if not same_result([line])] == []
+
+
+@pytest.mark.parametrize('name, text, encoding', FILE_CASES, ids=[case[0] for case in FILE_CASES])
+def test_file_case(tmp_path, capsys, name, text, encoding):
+    filename = str(tmp_path / 'sales.txt')
+    with open(filename, 'wb') as file:
+        file.write(text.encode(encoding))
+
+    expected_lines = read_sales_data(filename)
+    expected = parse_transactions(expected_lines)
+
+    assert read_sales_data_fast(filename) == expected_lines
+    assert same_rows(parse_sales_file_fast(filename), expected)
+    assert same_rows(parse_sales_file_fast(filename, columnar=True).to_dicts(), expected)
+
+
+def test_missing_file(tmp_path, capsys):
+    missing = str(tmp_path / 'missing.txt')
+
+    assert parse_sales_file_fast(missing) == parse_transactions(read_sales_data(missing)) == []
+    assert len(parse_sales_file_fast(missing, columnar=True)) == 0
+    assert "not found" in capsys.readouterr().out
@@ -0,0 +1,162 @@
+import pytest
+
+from utils import file_handler
+from utils.file_handler import (
+    iter_sales_data, parse_transactions, read_sales_data, stream_transactions, validate_and_filter
+)
+from utils.transaction_table import TransactionTable
+
+
+LINES = [
+    "T001|2024-12-01|P101|Laptop|2|45,000|C001|North",
+    "T002|2024-12-02|P102|Mouse|99999999999999999999|500|C002|South",
+    "T003|2024-12-03|P103|Key,board|3|1,200|C003|East",
+    "T004|2024-12-04|P104|Monitor|x|15000|C004|West",
+    "T005|2024-12-05|P105|Webcam|1|3000|C005",
+]
+
+
+# Parsing
+def test_columnar_parse_matches_dict_parse(capsys):
+    lines = read_sales_data('data/sales_data.txt')
+
+    assert parse_transactions(lines, columnar=True).to_dicts() == parse_transactions(lines)
+
+
+def test_quantity_beyond_int64_is_skipped_not_fatal():
+    table = parse_transactions(LINES, columnar=True)
+
+    assert table.transaction_ids == ['T001', 'T003']
+    assert table.to_dicts() == parse_transactions(LINES)
+    assert table[1]['ProductName'] == 'Keyboard'
+    assert table[1]['UnitPrice'] == 1200.0
+
+
+def test_parse_nothing_gives_empty_table():
+    table = parse_transactions(LINES[3:], columnar=True)
+
+    assert isinstance(table, TransactionTable)
+    assert len(table) == 0
+
+
+# TransactionTable
+def test_table_slices_return_tables(capsys):
+    table = parse_transactions(read_sales_data('data/sales_data.txt'), columnar=True)
+    rows = table.to_dicts()
+
+    for part in (slice(2, 7), slice(None, 3), slice(-4, None), slice(1, 20, 3), slice(9, 2, -2)):
+        sliced = table[part]
+        assert isinstance(sliced, TransactionTable)
+        assert sliced.to_dicts() == rows[part]
+
+    assert table[-1] == rows[-1]
+
+
+def test_append_that_overflows_leaves_table_consistent():
+    table = TransactionTable()
+    table.append('T001', '2024-12-01', 'P101', 'Laptop', 2, 45000.0, 'C001', 'North')
+
+    with pytest.raises(OverflowError):
+        table.append('T002', '2024-12-02', 'P102', 'Mouse', 1 << 63, 500.0, 'C002', 'South')
+
+    table.append('T003', '2024-12-03', 'P103', 'Keyboard', 3, 1200.0, 'C003', 'East')
+    assert [tx['TransactionID'] for tx in table] == ['T001', 'T003']
+    assert len(table.quantities) == len(table.dates) == len(table) == 2
+
+
+def test_validate_and_filter_table_matches_list(capsys):
+    lines = read_sales_data('data/sales_data.txt')
+    table_valid, table_invalid, table_summary = validate_and_filter(
+        parse_transactions(lines, columnar=True), region='North', min_amount=1000)
+    valid, invalid, summary = validate_and_filter(parse_transactions(lines), region='North', min_amount=1000)
+
+    assert table_valid.to_dicts() == valid
+    assert (table_invalid, table_summary) == (invalid, summary)
+
+
+# Duplicate detection
+@pytest.mark.parametrize('columnar', [False, True])
+def test_dedup_set_and_index_agree(capsys, monkeypatch, columnar):
+    lines = read_sales_data('data/sales_data.txt')
+    lines = lines + lines[5:40] + lines[:3]
+    transactions = parse_transactions(lines, columnar=columnar)
+
+    built = []
+    index_class = file_handler.TransactionIDIndex
+    monkeypatch.setattr(file_handler, 'TransactionIDIndex',
+                        lambda expected=0: built.append(expected) or index_class(expected))
+
+    with_set = validate_and_filter(transactions)
+    assert built == []
+
+    monkeypatch.setattr(file_handler, 'DEDUP_INDEX_THRESHOLD', 10)
+    with_index = validate_and_filter(transactions)
+    assert len(built) == 1
+
+    assert with_set[2]['duplicates'] > 0
+    assert list(with_set[0]) == list(with_index[0])
+    assert with_set[1:] == with_index[1:]
+
+
+# Streaming
+@pytest.fixture(params=['lf', 'crlf', 'cr', 'latin1_late', 'no_final_newline'])
+def stream_file(request, tmp_path):
+    with open('data/sales_data.txt', 'r', encoding='utf-8') as file:
+        lines = [line.rstrip('\n') for line in file]
+
+    # Repeated rows give duplicates, an extra row exercises latin-1
+    lines += lines[5:12] + ['T99999|2024-12-31|P101|Café Laptop|2|45000|C001|North']
+    newline = {'crlf': '\r\n', 'cr': '\r'}.get(request.param, '\n')
+    text = newline.join(lines) + ('' if request.param == 'no_final_newline' else newline)
+    encoding = 'latin-1' if request.param == 'latin1_late' else 'utf-8'
+
+    filename = tmp_path / f'{request.param}.txt'
+    filename.write_bytes(text.encode(encoding))
+    return str(filename)
+
+
+@pytest.mark.parametrize('chunk_size', [7, 100, 1 << 20])
+def test_stream_lines_match_read_sales_data(stream_file, chunk_size):
+    assert list(iter_sales_data(stream_file, chunk_size)) == read_sales_data(stream_file)
+
+
+def test_stream_falls_back_without_reading_ahead(tmp_path, monkeypatch):
+    # The bad byte sits past the detection sample; everything before it is
+    # yielded before the fallback, which then decodes the rest as latin-1
+    filename = tmp_path / 'late.txt'
+    rows = [f'T{i:05d}|2024-12-01|P101|Laptop|1|100|C001|North' for i in range(3000)]
+    filename.write_bytes(('header\n' + '\n'.join(rows) + '\nT99999|2024-12-31|P101|Café|1|1|C1|North\n')
+                         .encode('latin-1'))
+
+    reads = []
+    real_open = open
+
+    def counting_open(*args, **kwargs):
+        reads.append(args[0])
+        return real_open(*args, **kwargs)
+
+    monkeypatch.setattr('builtins.open', counting_open)
+    lines = list(iter_sales_data(str(filename), chunk_size=4096))
+    monkeypatch.undo()
+
+    assert lines[-1] == 'T99999|2024-12-31|P101|Café|1|1|C1|North'
+    assert lines[:-1] == rows
+    # The encoding sample, then a single pass over the file
+    assert reads.count(str(filename)) == 2
+
+
+@pytest.mark.parametrize('filters', [
+    {}, {'region': 'North'}, {'min_amount': 1000, 'max_amount': 50000}, {'dedup': False}
+])
+def test_stream_summary_matches_validate_and_filter(capsys, stream_file, filters):
+    valid, summary = stream_transactions(stream_file, **filters)
+    rows = list(valid)
+
+    expected_rows, expected_invalid, expected_summary = validate_and_filter(
+        parse_transactions(read_sales_data(stream_file)), **filters
+    )
+
+    assert rows == expected_rows
+    assert summary == expected_summary
+    assert summary['invalid'] == expected_invalid
+
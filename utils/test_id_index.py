@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from utils.id_index import TransactionIDIndex, decode_transaction_id, encode_transaction_id
+
+
+def _ids(count, seed=5):
+    rng = random.Random(seed)
+    forms = [lambda: f"T{rng.randrange(count):09d}", lambda: f"T{rng.randrange(50)}",
+             lambda: f"X{rng.randrange(20)}", lambda: "T", lambda: "T" + "9" * 20]
+    return [rng.choice(forms)() for _ in range(count)]
+
+
+def test_encoding_keeps_leading_zeros_apart():
+    keys = [encode_transaction_id(tid) for tid in ('T7', 'T07', 'T007')]
+
+    assert len(set(keys)) == 3
+    assert [decode_transaction_id(key) for key in keys] == ['T7', 'T07', 'T007']
+    assert encode_transaction_id('X7') is None
+    assert encode_transaction_id('T' + '1' * 18) is None
+
+
+@pytest.mark.parametrize('bloom_error', [None, 0.01])
+def test_add_many_matches_add(bloom_error):
+    ids = _ids(20000)
+    one_by_one = TransactionIDIndex(bloom_error=bloom_error)
+    bulk = TransactionIDIndex(bloom_error=bloom_error)
+
+    assert bulk.add_many(ids) == [one_by_one.add(tid) for tid in ids]
+    assert len(bulk) == len(one_by_one) == len(set(ids))
+
+
+@pytest.mark.parametrize('mapped', [False, True])
+@pytest.mark.parametrize('bloom_error', [None, 0.01])
+def test_saved_index_remembers_ids(tmp_path, mapped, bloom_error):
+    filename = str(tmp_path / 'ids.idx')
+    first, later = _ids(5000, seed=1), _ids(5000, seed=2)
+
+    index = TransactionIDIndex(bloom_error=bloom_error)
+    index.add_many(first)
+    index.save(filename)
+
+    loaded = TransactionIDIndex.load(filename, mapped=mapped)
+    expected = TransactionIDIndex(bloom_error=bloom_error)
+    expected.add_many(first)
+
+    assert len(loaded) == len(set(first))
+    assert [loaded.add(tid) for tid in later] == [expected.add(tid) for tid in later]
+
+    # Saving again (over the mapped file) keeps the old and the new IDs
+    loaded.save(filename)
+    loaded.close()
+    reloaded = TransactionIDIndex.load(filename)
+    assert len(reloaded) == len(set(first + later))
+    assert all(tid in reloaded for tid in first + later)
+
+
+def test_load_rejects_other_files(tmp_path):
+    other = tmp_path / 'other.bin'
+    other.write_bytes(b'not an index at all')
+    empty = tmp_path / 'empty.bin'
+    empty.write_bytes(b'')
+
+    assert TransactionIDIndex.load(str(other)) is None
+    assert TransactionIDIndex.load(str(empty)) is None
+    assert TransactionIDIndex.load(str(tmp_path / 'missing.idx')) is None
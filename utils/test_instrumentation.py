@@ -0,0 +1,77 @@
+import threading
+import tracemalloc
+from contextlib import ExitStack
+
+from utils import instrumentation
+from utils.instrumentation import Instrumentation
+
+
+# tracemalloc across threads
+def test_memory_tracing_spans_threads():
+    instrumentation = Instrumentation(trace_memory=True)
+    worker_started = threading.Event()
+    main_done = threading.Event()
+    still_tracing = []
+
+    def worker():
+        with instrumentation.stage('worker'):
+            worker_started.set()
+            main_done.wait(5)
+            buffer = bytearray(4 << 20)
+            still_tracing.append(tracemalloc.is_tracing())
+            del buffer
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    worker_started.wait(5)
+
+    with instrumentation.stage('main'):
+        with instrumentation.stage('main.child'):
+            buffer = bytearray(2 << 20)
+            del buffer
+    main_done.set()
+    thread.join()
+
+    records = {record.stage: record for record in instrumentation.finished()}
+    # The main stages ending did not stop tracing under the open worker stage
+    assert still_tracing == [True]
+    assert records['worker'].peak_traced_bytes >= 4 << 20
+    assert records['main'].peak_traced_bytes >= records['main.child'].peak_traced_bytes >= 2 << 20
+    assert not tracemalloc.is_tracing()
+
+
+# failed_stage
+def _fail(instrumentation, *stages):
+    try:
+        with ExitStack() as stack:
+            for name in stages:
+                stack.enter_context(instrumentation.stage(name))
+            raise ValueError(stages[-1])
+    except ValueError:
+        pass
+
+
+def test_failed_stage_is_scoped_to_the_current_run():
+    instrumentation = Instrumentation()
+    _fail(instrumentation, 'run:first', 'load', 'parse')
+
+    start = instrumentation.mark()
+    _fail(instrumentation, 'run:second', 'report')
+
+    assert instrumentation.failed_stage() == 'parse'
+    assert instrumentation.failed_stage(start) == 'report'
+
+
+# Platforms without the resource module
+def test_stages_work_without_resource(monkeypatch, tmp_path):
+    monkeypatch.setattr(instrumentation, 'resource', None)
+    assert instrumentation.peak_rss_bytes() is None
+
+    collector = Instrumentation()
+    with collector.stage('load', 10):
+        pass
+
+    assert collector.finished()[0].max_rss_bytes is None
+    assert collector.totals()['load']['max_rss_bytes'] == 0
+    assert collector.summary().splitlines()[1].startswith('load')
+    collector.export(str(tmp_path / 'metrics.prom'))
@@ -0,0 +1,75 @@
+import sys
+import threading
+
+import pytest
+
+from utils.lazy_imports import is_loaded, lazy_import, load
+
+
+SLOW_MODULE = """
+import time
+
+import slow_probe_started
+
+FIRST = 1
+slow_probe_started.event.set()
+time.sleep(0.2)
+LAST = 2
+"""
+
+
+def test_lazy_module_runs_on_first_use(tmp_path, monkeypatch):
+    (tmp_path / 'lazy_probe.py').write_text("VALUE = 42\n", encoding='utf-8')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'lazy_probe', raising=False)
+
+    module = lazy_import('lazy_probe')
+    assert not is_loaded('lazy_probe')
+
+    assert module.VALUE == 42
+    assert is_loaded('lazy_probe')
+    assert lazy_import('lazy_probe') is module
+
+
+def test_load_runs_module_now(tmp_path, monkeypatch):
+    (tmp_path / 'load_probe.py').write_text("VALUE = 7\n", encoding='utf-8')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'load_probe', raising=False)
+
+    module = load(lazy_import('load_probe'))
+
+    assert is_loaded('load_probe')
+    assert module.VALUE == 7
+
+
+def test_missing_module_fails_on_first_use():
+    module = lazy_import('no_such_module_for_tests')
+
+    with pytest.raises(ImportError, match='no_such_module_for_tests'):
+        module.anything
+
+
+def test_other_threads_wait_for_a_module_being_loaded(tmp_path, monkeypatch):
+    (tmp_path / 'slow_probe.py').write_text(SLOW_MODULE, encoding='utf-8')
+    (tmp_path / 'slow_probe_started.py').write_text(
+        "import threading\nevent = threading.Event()\n", encoding='utf-8')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'slow_probe', raising=False)
+    monkeypatch.delitem(sys.modules, 'slow_probe_started', raising=False)
+
+    import slow_probe_started
+
+    module = lazy_import('slow_probe')
+    loader = threading.Thread(target=lambda: module.FIRST)
+    loader.start()
+    assert slow_probe_started.event.wait(10)
+
+    # Started while the loader thread is inside the module body
+    seen = []
+    readers = [threading.Thread(target=lambda: seen.append(module.LAST)) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for thread in [loader] + readers:
+        thread.join()
+
+    assert seen == [2, 2, 2, 2]
@@ -0,0 +1,145 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.stub_server import StubProductServer
+from utils import api_handler
+from utils.main import DEFAULT_CONFIG, load_config, run_batch
+
+
+@pytest.fixture
+def server():
+    with StubProductServer(total=150) as stub:
+        yield stub
+
+
+def _config(tmp_path, **overrides):
+    config = dict(DEFAULT_CONFIG)
+    config.update({
+        'inputs': ['data/sales_data.txt'],
+        'cache_file': str(tmp_path / 'product_cache.json'),
+        'enriched_output': str(tmp_path / 'enriched.txt'),
+        'report_output': str(tmp_path / 'report.txt')
+    })
+    config.update(overrides)
+    return config
+
+
+def _matched_rows(enriched_file):
+    with open(enriched_file, 'r', encoding='utf-8') as file:
+        return sum(line.rstrip('\n').endswith('|True') for line in file)
+
+
+# Batch runs
+@pytest.fixture(params=['sample', 'one_row'])
+def batch_input(request, tmp_path):
+    if request.param == 'sample':
+        return 'data/sales_data.txt'
+
+    with open('data/sales_data.txt', 'r', encoding='utf-8') as file:
+        header, first = file.readline(), file.readline()
+    one_row = tmp_path / 'one_row.txt'
+    one_row.write_text(header + first, encoding='utf-8')
+    return str(one_row)
+
+
+def test_offline_batch_succeeds(tmp_path, batch_input):
+    config = _config(tmp_path, inputs=[batch_input], offline=True, save_format=None)
+    assert run_batch(config) == 0
+
+
+def test_batch_cli_in_fresh_interpreter(tmp_path, batch_input):
+    # A new process loads the lazy modules while the catalog thread runs
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    for _ in range(3):
+        result = subprocess.run(
+            [sys.executable, '-m', 'utils.main', batch_input, '--offline', '--save-format', 'none',
+             '--cache-file', str(tmp_path / 'product_cache.json'),
+             '--report-output', str(tmp_path / 'report.txt')],
+            capture_output=True, text=True, env=env
+        )
+        assert result.returncode == 0, result.stdout + result.stderr
+
+
+# Product lookup mode
+def test_product_lookup_flag_sets_config():
+    assert load_config(['data/sales_data.txt'])['product_lookup'] is False
+    assert load_config(['--product-lookup', 'data/sales_data.txt'])['product_lookup'] is True
+
+
+def test_batch_with_product_lookup_fetches_referenced_products_only(server, tmp_path):
+    config = _config(tmp_path, api_url=server.base_url, product_lookup=True)
+
+    assert run_batch(config) == 0
+
+    # One request per referenced ID, no catalog pages
+    with open(tmp_path / 'product_cache_lookup.json', 'r', encoding='utf-8') as file:
+        cached = json.load(file)
+    assert server.requests == len(cached)
+    assert not (tmp_path / 'product_cache.json').exists()
+
+    full = _config(tmp_path / 'full', api_url=server.base_url)
+    assert run_batch(full) == 0
+    assert _matched_rows(config['enriched_output']) == _matched_rows(full['enriched_output']) > 0
+
+
+def test_product_lookup_reuses_its_cache(server, tmp_path):
+    config = _config(tmp_path, api_url=server.base_url, product_lookup=True)
+    run_batch(config)
+    requests_before = server.requests
+
+    assert run_batch(config) == 0
+    assert server.requests == requests_before
+
+
+# Incremental mode
+def _report_lines(report_file):
+    with open(report_file, 'r', encoding='utf-8') as file:
+        return [line for line in file if 'Generated' not in line]
+
+
+def test_incremental_flags_set_config():
+    config = load_config(['--incremental', '--checkpoint', 'ck/{input}.json', 'data/sales_data.txt'])
+
+    assert config['incremental'] is True
+    assert config['checkpoint'] == 'ck/{input}.json'
+
+
+def test_incremental_batch_resumes_from_checkpoint(server, tmp_path):
+    with open('data/sales_data.txt', 'r', encoding='utf-8') as file:
+        lines = file.readlines()
+    growing = tmp_path / 'sales.txt'
+    growing.write_text(''.join(lines[:40]), encoding='utf-8')
+
+    config = _config(
+        tmp_path, inputs=[str(growing)], api_url=server.base_url, incremental=True,
+        checkpoint=str(tmp_path / 'checkpoints' / '{input}_{name}.json'),
+        report_output=str(tmp_path / 'incremental_report.txt')
+    )
+    assert run_batch(config) == 0
+    assert (tmp_path / 'checkpoints' / 'sales_all.json').exists()
+
+    with open(growing, 'a', encoding='utf-8') as file:
+        file.write(''.join(lines[40:]))
+    assert run_batch(config) == 0
+    assert not (tmp_path / 'enriched.txt').exists()
+
+    # Same report as a full run over the whole file
+    full = _config(tmp_path, inputs=[str(growing)], api_url=server.base_url)
+    assert run_batch(full) == 0
+    assert _report_lines(config['report_output']) == _report_lines(full['report_output'])
+
+
+# Catalog thread
+def test_catalog_refresh_error_does_not_escape(tmp_path, monkeypatch, capsys):
+    def broken(timeout=None):
+        raise RuntimeError("refresh exploded")
+
+    monkeypatch.setattr(api_handler, 'wait_for_revalidation', broken)
+    config = _config(tmp_path, offline=True, save_format=None)
+
+    assert run_batch(config) == 0
+    assert "Catalog refresh not finished: RuntimeError: refresh exploded" in capsys.readouterr().out
@@ -0,0 +1,99 @@
+import pytest
+
+from utils.file_handler import read_sales_data
+from utils.mmap_reader import MappedSalesFile, detect_encoding, split_lines
+from utils.parallel_parser import chunk_ranges
+
+
+HEADER = 'TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region'
+ROWS = [
+    'T001|2024-12-01|P101|Laptop|2|45000|C001|North',
+    'T002|2024-12-01|P102|Café Mouse|5|500|C002|South',
+    '',
+    '  T003|2024-12-02|P104|Monitor|1|12000|C003|East  '
+]
+
+
+def _write(path, newline='\n', encoding='utf-8', final_newline=True):
+    text = newline.join([HEADER] + ROWS) + (newline if final_newline else '')
+    path.write_bytes(text.encode(encoding))
+    return str(path)
+
+
+# Encoding detection
+def test_detect_encoding():
+    assert detect_encoding('Café'.encode('utf-8')) == 'utf-8'
+    assert detect_encoding('Café Laptop'.encode('latin-1')) == 'latin-1'
+    assert detect_encoding(b'\xff', encodings=('utf-8',)) is None
+
+
+def test_detect_encoding_ignores_character_cut_at_sample_end():
+    sample = 'abc€'.encode('utf-8')[:-1]
+    assert detect_encoding(sample) == 'utf-8'
+
+
+def test_split_lines_uses_universal_newlines():
+    assert split_lines('a\nb\r\nc\rd') == ['a', 'b', 'c', 'd']
+    assert split_lines('a\r\n') == ['a', '']
+
+
+# MappedSalesFile
+@pytest.mark.parametrize('newline', ['\n', '\r\n', '\r'])
+@pytest.mark.parametrize('final_newline', [True, False])
+def test_iter_lines_matches_read_sales_data(tmp_path, newline, final_newline):
+    filename = _write(tmp_path / 'sales.txt', newline, final_newline=final_newline)
+
+    with MappedSalesFile(filename) as mapped:
+        assert mapped.data_start == len(HEADER) + len(newline)
+        assert list(mapped.iter_lines()) == read_sales_data(filename)
+
+
+def test_latin1_file(tmp_path):
+    filename = _write(tmp_path / 'latin1.txt', encoding='latin-1')
+
+    with MappedSalesFile(filename) as mapped:
+        assert mapped.encoding == 'latin-1'
+        assert list(mapped.iter_lines()) == read_sales_data(filename)
+
+
+@pytest.mark.parametrize('content', [b'', HEADER.encode('utf-8'), (HEADER + '\n').encode('utf-8')])
+def test_header_only_and_empty_files(tmp_path, content):
+    path = tmp_path / 'sales.txt'
+    path.write_bytes(content)
+
+    with MappedSalesFile(str(path)) as mapped:
+        assert mapped.data_start == mapped.size == len(content)
+        assert list(mapped.iter_lines()) == []
+
+
+def test_spans_decode_and_find(tmp_path):
+    filename = _write(tmp_path / 'sales.txt')
+    data = open(filename, 'rb').read()
+
+    with MappedSalesFile(filename) as mapped:
+        spans = list(mapped.iter_line_spans())
+        assert [data[start:end] for start, end in spans] == [row.encode('utf-8') for row in ROWS]
+
+        start, end = spans[1]
+        assert mapped.decode(start, end) == ROWS[1]
+        assert bytes(mapped.raw(start, end)) == data[start:end]
+        assert mapped.find(b'|', start) == data.find(b'|', start)
+        assert mapped.rfind(b'|', 0, end) == data.rfind(b'|', 0, end)
+        assert mapped.find(b'T003', 0, start) == -1
+
+
+# Chunking
+@pytest.mark.parametrize('chunk_count', [1, 2, 3, 50])
+def test_chunk_ranges_cover_file_on_line_boundaries(tmp_path, chunk_count):
+    filename = _write(tmp_path / 'sales.txt', final_newline=False)
+
+    with MappedSalesFile(filename) as mapped:
+        ranges = chunk_ranges(mapped, chunk_count)
+
+        assert ranges[0][0] == mapped.data_start
+        assert ranges[-1][1] == mapped.size
+        assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+        assert all(mapped.raw(end - 1, end) == b'\n' for _, end in ranges[:-1])
+
+        lines = [line for start, end in ranges for line in mapped.iter_lines(start, end)]
+        assert lines == read_sales_data(filename)
@@ -0,0 +1,78 @@
+import pytest
+
+from benchmarks.data_generator import generate_sales_file
+from utils.file_handler import parse_transactions, read_sales_data, validate_and_filter
+from utils.mmap_reader import SAMPLE_SIZE
+from utils.parallel_parser import parse_sales_file_parallel
+
+
+LATIN1_ROW = 'T99999|2024-12-31|P101|Café Laptop|2|45000|C001|North\n'
+
+
+@pytest.fixture(scope='module')
+def generated_lines(tmp_path_factory):
+    filename = tmp_path_factory.mktemp('generated') / 'sales.txt'
+    generate_sales_file(str(filename), 4000, seed=11, noise=0.1)
+    with open(filename, 'r', encoding='utf-8', newline='') as file:
+        return file.readlines()
+
+
+def _write(path, lines, newline='\n', encoding='utf-8'):
+    text = ''.join(line.rstrip('\r\n') + newline for line in lines)
+    path.write_bytes(text.encode(encoding))
+    return str(path)
+
+
+@pytest.fixture(params=['sample', 'generated', 'crlf', 'latin1_early', 'latin1_late'])
+def sales_file(request, tmp_path, generated_lines):
+    """
+    Returns: a file for one of the layouts; latin1_late puts the first
+    non-UTF-8 byte past the encoding sample, so the UTF-8 pass fails
+    part-way and the file is parsed again as latin-1
+    """
+
+    kind = request.param
+    if kind == 'sample':
+        return 'data/sales_data.txt'
+    if kind == 'generated':
+        return _write(tmp_path / 'generated.txt', generated_lines)
+    if kind == 'crlf':
+        return _write(tmp_path / 'crlf.txt', generated_lines, newline='\r\n')
+    if kind == 'latin1_early':
+        lines = generated_lines[:10] + [LATIN1_ROW] + generated_lines[10:]
+        return _write(tmp_path / 'latin1_early.txt', lines, encoding='latin-1')
+
+    lines = generated_lines + [LATIN1_ROW]
+    filename = _write(tmp_path / 'latin1_late.txt', lines, encoding='latin-1')
+    assert sum(map(len, lines)) > SAMPLE_SIZE
+    return filename
+
+
+@pytest.mark.parametrize('workers, chunks_per_worker', [(1, 1), (1, 4), (3, 4)])
+def test_parallel_parse_matches_serial(capsys, sales_file, workers, chunks_per_worker):
+    raw_lines = read_sales_data(sales_file)
+    serial = parse_transactions(raw_lines, columnar=True)
+
+    table, summary = parse_sales_file_parallel(sales_file, workers, chunks_per_worker)
+
+    assert table.to_dicts() == serial.to_dicts()
+    assert summary == {
+        'total_lines': len(raw_lines),
+        'parsed': len(serial),
+        'skipped': len(raw_lines) - len(serial)
+    }
+
+    expected_valid, expected_invalid, expected_summary = validate_and_filter(serial)
+    valid, invalid, filter_summary = validate_and_filter(table)
+    assert valid.to_dicts() == expected_valid.to_dicts()
+    assert (invalid, filter_summary) == (expected_invalid, expected_summary)
+
+
+def test_latin1_rows_are_decoded(capsys, sales_file):
+    table, _ = parse_sales_file_parallel(sales_file, 2)
+
+    names = set(table.product_names.values)
+    if sales_file.endswith(('latin1_early.txt', 'latin1_late.txt')):
+        assert 'Café Laptop' in names
+    else:
+        assert 'Café Laptop' not in names
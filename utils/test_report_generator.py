@@ -0,0 +1,158 @@
+import csv
+import datetime
+import io
+import json
+from html.parser import HTMLParser
+
+import pytest
+
+from utils import report_generator
+from utils.api_handler import enrich_sales_data
+from utils.data_processor import aggregate_sales
+from utils.file_handler import parse_transactions, read_sales_data, validate_and_filter
+from utils.report_generator import (
+    generate_sales_report, render_csv, render_html, render_json, render_text, write_report
+)
+
+
+# sales_report.txt was written by the original generate_sales_report for
+# the sample data and CATALOG at FIXED_NOW; report_fixed.txt is REPORT
+GOLDEN_SAMPLE = 'utils/testdata/sales_report.txt'
+GOLDEN_FIXED = 'utils/testdata/report_fixed.txt'
+
+CATALOG = {
+    pid: {'title': f'Product {pid}', 'category': 'laptops', 'brand': 'Brand', 'rating': 4.5}
+    for pid in (101, 102, 104, 107)
+}
+
+REPORT = {
+    'generated': '2024-12-31 12:00:00',
+    'records': 4,
+    'total_revenue': 123456.5,
+    'avg_order_value': 30864.125,
+    'date_range': ('2024-12-01', '2024-12-03'),
+    'regions': {
+        'North': {'total_sales': 100000.0, 'transaction_count': 2, 'percentage': 81.0},
+        'South': {'total_sales': 23456.5, 'transaction_count': 2, 'percentage': 19.0}
+    },
+    'top_products': [('Laptop', 2, 100000.0), ('Mouse, "Pro" <X>', 5, 23456.5)],
+    'top_customers': [('C001', {'total_spent': 100000.0, 'purchase_count': 2}),
+                      ('C&2', {'total_spent': 23456.5, 'purchase_count': 2})],
+    'daily_trends': {
+        '2024-12-01': {'revenue': 100000.0, 'transaction_count': 2, 'unique_customers': 1},
+        '2024-12-03': {'revenue': 23456.5, 'transaction_count': 2, 'unique_customers': 1}
+    },
+    'peak_day': ('2024-12-01', 100000.0, 2),
+    'low_products': [('Mouse, "Pro" <X>', 5, 23456.5)],
+    'enrichment': {'enriched_count': 2, 'success_rate': 50.0, 'failed_products': ['Mouse, "Pro" <X>']}
+}
+
+
+class FixedDatetime(datetime.datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2024, 12, 31, 12, 0, 0)
+
+
+def _read(filename):
+    with open(filename, 'rb') as file:
+        return file.read()
+
+
+# Text report
+@pytest.mark.parametrize('columnar', [False, True])
+@pytest.mark.parametrize('with_metrics', [False, True])
+def test_text_report_is_byte_identical_to_original(capsys, monkeypatch, tmp_path, columnar, with_metrics):
+    monkeypatch.setattr(report_generator, 'datetime', FixedDatetime)
+    valid, _, _ = validate_and_filter(
+        parse_transactions(read_sales_data('data/sales_data.txt'), columnar=columnar)
+    )
+    metrics = aggregate_sales(valid) if with_metrics else None
+
+    written = generate_sales_report(
+        valid, enrich_sales_data(valid, CATALOG), str(tmp_path / 'report.txt'), metrics=metrics
+    )
+
+    assert written == {'text': str(tmp_path / 'report.txt')}
+    assert _read(tmp_path / 'report.txt') == _read(GOLDEN_SAMPLE)
+
+
+def test_render_text_matches_golden():
+    with open(GOLDEN_FIXED, 'r', encoding='utf-8', newline='') as file:
+        assert render_text(REPORT) == file.read()
+
+
+# Other formats
+def test_render_json():
+    data = json.loads(render_json(REPORT))
+
+    assert data['summary'] == {
+        'total_revenue': 123456.5, 'total_transactions': 4, 'avg_order_value': 30864.125,
+        'date_from': '2024-12-01', 'date_to': '2024-12-03'
+    }
+    assert data['regions'] == REPORT['regions']
+    assert data['top_products'][1] == {'rank': 2, 'product': 'Mouse, "Pro" <X>',
+                                       'quantity': 5, 'revenue': 23456.5}
+    assert data['top_customers'][1] == {'rank': 2, 'customer': 'C&2', 'total_spent': 23456.5, 'orders': 2}
+    assert data['daily_trends'] == REPORT['daily_trends']
+    assert data['peak_day'] == {'date': '2024-12-01', 'revenue': 100000.0, 'transaction_count': 2}
+    assert data['low_performing_products'] == [{'product': 'Mouse, "Pro" <X>', 'quantity': 5,
+                                                'revenue': 23456.5}]
+    assert data['enrichment'] == REPORT['enrichment']
+
+
+def test_render_csv():
+    text = render_csv(REPORT)
+    rows = list(csv.reader(io.StringIO(text, newline='')))
+
+    assert text.endswith('\r\n')
+    assert rows[0] == ['section', 'key', 'metric', 'value']
+    assert ['region', 'South', 'total_sales', '23456.5'] in rows
+    assert ['top_product', 'Mouse, "Pro" <X>', 'quantity', '5'] in rows
+    assert ['top_customer', 'C&2', 'orders', '2'] in rows
+    assert ['daily', '2024-12-03', 'unique_customers', '1'] in rows
+    assert ['peak_day', '2024-12-01', 'revenue', '100000.0'] in rows
+    assert ['enrichment', 'Mouse, "Pro" <X>', 'not_enriched', '1'] in rows
+    assert all(len(row) == 4 for row in rows)
+
+
+class _TableCells(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.cells = []
+        self._in_cell = False
+
+    def handle_starttag(self, tag, attrs):
+        self._in_cell = tag in ('td', 'th')
+
+    def handle_endtag(self, tag):
+        self._in_cell = False
+
+    def handle_data(self, data):
+        if self._in_cell:
+            self.cells.append(data)
+
+
+def test_render_html_escapes_values():
+    page = render_html(REPORT)
+    parser = _TableCells()
+    parser.feed(page)
+
+    assert page.startswith('<!DOCTYPE html>')
+    assert '<X>' not in page and '&lt;X&gt;' in page
+    assert 'Mouse, "Pro" <X>' in parser.cells
+    assert 'C&2' in parser.cells
+    assert '₹123,456.50' in parser.cells
+    assert '81.0%' in parser.cells
+
+
+def test_write_report_uses_format_extensions(tmp_path):
+    written = write_report(REPORT, str(tmp_path / 'report.txt'), formats=('text', 'json', 'csv', 'html'))
+
+    assert written == {fmt: str(tmp_path / f'report.{ext}')
+                       for fmt, ext in (('text', 'txt'), ('json', 'json'), ('csv', 'csv'), ('html', 'html'))}
+    assert _read(tmp_path / 'report.csv') == render_csv(REPORT).encode('utf-8')
+    assert _read(tmp_path / 'report.txt').decode('utf-8') == render_text(REPORT)
+
+    with pytest.raises(ValueError):
+        write_report(REPORT, str(tmp_path / 'report.txt'), formats=('pdf',))
@@ -0,0 +1,110 @@
+import os
+import shutil
+
+import pytest
+
+from benchmarks.data_generator import generate_sales_file
+from utils.data_processor import aggregate_sales
+from utils.file_handler import parse_transactions, read_sales_data, validate_and_filter
+from utils.main import analyze_sales
+from utils.rollup_cube import RollupCube
+
+
+REGIONS = (None, 'North', 'South', 'East', 'West', 'Nowhere')
+
+
+@pytest.fixture(scope='module')
+def source(tmp_path_factory):
+    # Few customers and dates, so many rows share a cube cell
+    filename = str(tmp_path_factory.mktemp('cube') / 'sales.txt')
+    generate_sales_file(filename, 3000, seed=5, noise=0.05, customers=20)
+    return filename
+
+
+@pytest.fixture(scope='module')
+def table(source):
+    return parse_transactions(read_sales_data(source), columnar=True)
+
+
+def _assert_same_analysis(agg, expected):
+    assert agg.transaction_count == expected.transaction_count
+    assert agg.calculate_total_revenue() == pytest.approx(expected.calculate_total_revenue())
+
+    regions = agg.region_wise_sales()
+    expected_regions = expected.region_wise_sales()
+    assert list(regions) == list(expected_regions)
+    for region, data in expected_regions.items():
+        assert regions[region]['transaction_count'] == data['transaction_count']
+        assert regions[region]['total_sales'] == pytest.approx(data['total_sales'])
+        assert regions[region]['percentage'] == pytest.approx(data['percentage'], abs=0.01)
+
+    daily = agg.daily_sales_trend()
+    assert daily.keys() == expected.daily_sales_trend().keys()
+    for date, data in expected.daily_sales_trend().items():
+        assert daily[date] == dict(data, revenue=pytest.approx(data['revenue']))
+
+    products = {name: (qty, revenue) for name, qty, revenue in agg.top_selling_products(100)}
+    for name, qty, revenue in expected.top_selling_products(100):
+        assert products[name] == (qty, pytest.approx(revenue))
+
+    customers = agg.customer_analysis()
+    for cid, data in expected.customer_analysis().items():
+        assert customers[cid]['purchase_count'] == data['purchase_count']
+        assert customers[cid]['total_spent'] == pytest.approx(data['total_spent'])
+        assert set(customers[cid]['products_bought']) == set(data['products_bought'])
+
+
+# Region queries
+@pytest.mark.parametrize('columnar', [False, True])
+def test_region_queries_match_raw_aggregation(capsys, table, columnar, tmp_path, source):
+    valid, _, _ = validate_and_filter(table)
+    cube = RollupCube.build(valid if columnar else valid.to_dicts())
+    assert len(cube) < len(valid)
+
+    cube.save(str(tmp_path / 'cube.json'), source=source)
+    loaded = RollupCube.load(str(tmp_path / 'cube.json'), source=source)
+
+    for region in REGIONS:
+        expected = aggregate_sales(validate_and_filter(table, region=region)[0])
+        _assert_same_analysis(cube.aggregate(region), expected)
+        _assert_same_analysis(loaded.aggregate(region), expected)
+
+
+# Invalidation
+def test_changed_source_invalidates_cube(tmp_path):
+    source = tmp_path / 'sales.txt'
+    shutil.copyfile('data/sales_data.txt', source)
+    cube_file = str(tmp_path / 'cube.json')
+
+    RollupCube.build([]).save(cube_file, source=str(source))
+    assert RollupCube.load(cube_file, source=str(source)) is not None
+
+    with open(source, 'a', encoding='utf-8') as file:
+        file.write('T999|2024-12-31|P101|Laptop|1|45000|C001|North\n')
+    assert RollupCube.load(cube_file, source=str(source)) is None
+
+    # Same size, different mtime
+    RollupCube.build([]).save(cube_file, source=str(source))
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert RollupCube.load(cube_file, source=str(source)) is None
+
+
+# analyze_sales
+def test_analyze_sales_answers_from_the_cube_it_builds(capsys, table, source, tmp_path, monkeypatch):
+    valid, _, _ = validate_and_filter(table)
+    cube_file = str(tmp_path / 'cube.json')
+
+    def no_rescan(*args, **kwargs):
+        raise AssertionError("rows aggregated again")
+
+    monkeypatch.setattr('utils.main.aggregate_sales', no_rescan)
+    metrics = analyze_sales(valid, source=source, cube_file=cube_file, use_cube=True)
+    monkeypatch.undo()
+
+    assert os.path.exists(cube_file)
+    _assert_same_analysis(metrics, aggregate_sales(valid))
+
+    north = validate_and_filter(table, region='North')[0]
+    metrics = analyze_sales(north, region='North', source=source, cube_file=cube_file, use_cube=True)
+    _assert_same_analysis(metrics, aggregate_sales(north))
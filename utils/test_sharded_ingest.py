@@ -0,0 +1,75 @@
+import math
+
+import pytest
+
+from utils.data_processor import aggregate_sales
+from utils.file_handler import parse_transactions, read_sales_data, validate_and_filter
+from utils.sharded_ingest import generate_sharded_report, ingest_shards
+
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+
+
+@pytest.fixture
+def shards(tmp_path):
+    """
+    Three shards of data/sales_data.txt; the second and third repeat rows
+    (and so TransactionIDs) of the shards before them
+
+    Returns: (shard directory, the shards concatenated into one file)
+    """
+
+    with open('data/sales_data.txt', 'r', encoding='utf-8') as file:
+        rows = file.readlines()[1:]
+
+    parts = [rows[:30], rows[30:60] + rows[5:10], rows[60:] + rows[40:45] + rows[0:2]]
+    directory = tmp_path / 'shards'
+    directory.mkdir()
+    for number, part in enumerate(parts):
+        (directory / f'part{number}.txt').write_text(HEADER + ''.join(part), encoding='utf-8')
+
+    whole = tmp_path / 'whole.txt'
+    whole.write_text(HEADER + ''.join(row for part in parts for row in part), encoding='utf-8')
+    return str(directory), str(whole)
+
+
+def _close(a, b):
+    if isinstance(a, dict):
+        if 'products_bought' in a:
+            a, b = dict(a), dict(b)
+            if set(a.pop('products_bought')) != set(b.pop('products_bought')):
+                return False
+        return list(a) == list(b) and all(_close(a[key], b[key]) for key in a)
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(_close(x, y) for x, y in zip(a, b))
+    if isinstance(a, float):
+        return math.isclose(a, b, rel_tol=1e-9)
+    return a == b
+
+
+# Reduce step
+@pytest.mark.parametrize('workers', [1, 2])
+def test_duplicates_across_shards_are_removed(shards, workers, capsys):
+    directory, whole = shards
+    valid, _, summary = validate_and_filter(parse_transactions(read_sales_data(whole)))
+    expected = aggregate_sales(valid)
+
+    result = ingest_shards(directory, workers=workers)
+
+    assert summary['duplicates'] > 0
+    assert result.filter_summary == summary
+    assert _close(result.aggregator.region_wise_sales(), expected.region_wise_sales())
+    assert _close(result.aggregator.daily_sales_trend(), expected.daily_sales_trend())
+    assert _close(result.aggregator.top_customers(5), expected.top_customers(5))
+
+
+def test_approximate_sharded_report(shards, tmp_path):
+    directory, _ = shards
+    result = ingest_shards(directory, workers=1, approximate=True)
+
+    output = str(tmp_path / 'report.txt')
+    written = generate_sharded_report(result, {}, output, formats=('text', 'json'))
+
+    assert written['text'] == output
+    with open(output, 'r', encoding='utf-8') as file:
+        assert 'SALES ANALYTICS REPORT' in file.read()
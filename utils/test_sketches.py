@@ -0,0 +1,74 @@
+import random
+
+from utils.data_processor import aggregate_sales
+from utils.report_generator import build_report_data
+from utils.sketches import CountMinSketch, HyperLogLog, SalesSketch
+
+
+def _transactions(count=5000, seed=3):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        # Products 0..29 sell steadily, every 250th row is one of 30..49
+        product = 30 + i // 250 if i % 250 == 0 else rng.randrange(30)
+        rows.append({
+            'TransactionID': f'T{i:06d}', 'Date': f'2024-12-{1 + i % 28:02d}',
+            'ProductID': f'P{100 + product}', 'ProductName': f'Product {product}',
+            'Quantity': rng.randint(1, 3), 'UnitPrice': float(rng.randint(1, 50) * 100),
+            'CustomerID': f'C{rng.randrange(800):04d}', 'Region': rng.choice(['North', 'South', 'East'])
+        })
+    return rows
+
+
+# Sketch error bounds
+def test_count_min_never_undercounts_and_stays_in_bound():
+    rng = random.Random(1)
+    sketch = CountMinSketch(epsilon=0.01, delta=0.01)
+    truth = {}
+    for _ in range(20000):
+        key = rng.randrange(2000)
+        sketch.add(key)
+        truth[key] = truth.get(key, 0) + 1
+
+    for key, count in truth.items():
+        assert count <= sketch.estimate(key) <= count + 0.01 * sketch.total
+
+
+def test_hyperloglog_within_three_standard_errors():
+    hll = HyperLogLog(error=0.02)
+    for i in range(50000):
+        hll.add(f'C{i}')
+    assert abs(hll.count() - 50000) <= 3 * 0.02 * 50000
+
+
+# Approximate low performing products
+def test_sketch_low_performing_products_has_no_false_positives():
+    rows = _transactions()
+    exact = dict((name, qty) for name, qty, _ in aggregate_sales(rows).low_performing_products(10))
+    sketch = aggregate_sales(rows, approximate=True, cms_epsilon=0.0005)
+    total_units = sketch.product_units.total
+
+    approximate = sketch.low_performing_products(10)
+    assert approximate
+    for name, qty, _ in approximate:
+        assert name in exact and exact[name] <= qty < 10
+
+    # Only products within the documented overcount of the threshold are missed
+    found = {name for name, _, _ in approximate}
+    for name, qty in exact.items():
+        assert name in found or qty >= 10 - 0.0005 * total_units
+
+
+def test_sketch_merge_and_table_input_match_row_input():
+    rows = _transactions()
+    whole = SalesSketch().add_all(rows)
+    merged = SalesSketch().add_all(rows[:2000]).merge(SalesSketch().add_all(rows[2000:]))
+
+    assert merged.low_performing_products(10) == whole.low_performing_products(10)
+    assert merged.product_names == whole.product_names
+
+
+def test_report_builds_from_approximate_metrics():
+    rows = _transactions()
+    report = build_report_data(rows, [], aggregate_sales(rows, approximate=True))
+    assert report['low_products'] == aggregate_sales(rows, approximate=True).low_performing_products()
@@ -0,0 +1,60 @@
+import os
+from array import array
+
+import pytest
+
+from utils.storage import align, atomic_write, read_header, write_blocks
+
+
+MAGIC = b'SATEST\n\0'
+
+
+# atomic_write
+def test_atomic_write_replaces_file(tmp_path):
+    filename = str(tmp_path / 'nested' / 'state.json')
+
+    with atomic_write(filename, encoding='utf-8') as file:
+        file.write('first')
+    with atomic_write(filename, encoding='utf-8') as file:
+        file.write('second')
+
+    with open(filename, encoding='utf-8') as file:
+        assert file.read() == 'second'
+    assert os.listdir(tmp_path / 'nested') == ['state.json']
+
+
+def test_failed_atomic_write_keeps_old_file_and_no_tmp(tmp_path):
+    filename = str(tmp_path / 'state.json')
+    with atomic_write(filename, encoding='utf-8') as file:
+        file.write('kept')
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(filename, encoding='utf-8') as file:
+            file.write('partial')
+            raise RuntimeError("interrupted")
+
+    with open(filename, encoding='utf-8') as file:
+        assert file.read() == 'kept'
+    assert os.listdir(tmp_path) == ['state.json']
+
+
+# Block layout
+def test_blocks_round_trip_aligned(tmp_path):
+    filename = str(tmp_path / 'data.bin')
+    blocks = [array('q', [1, -2, 3]), b'abc', bytearray(b'\x01\x02'), array('d', [0.5])]
+
+    with atomic_write(filename, 'wb') as file:
+        write_blocks(file, MAGIC, {'rows': 3}, blocks)
+
+    with open(filename, 'rb') as file:
+        data = file.read()
+
+    header, data_start = read_header(data, MAGIC)
+    assert header['rows'] == 3
+    assert data_start % 8 == 0
+    for block, (position, length) in zip(blocks, header['blocks']):
+        assert position % 8 == 0
+        assert data[data_start + position:data_start + position + length] == bytes(block)
+
+    assert read_header(b'OTHER\n\0\0' + data[8:], MAGIC) is None
+    assert [align(n) for n in (0, 1, 8, 9)] == [0, 8, 8, 16]
@@ -0,0 +1,46 @@
+from datetime import date
+
+import pytest
+
+from utils.data_processor import aggregate_sales
+from utils.file_handler import parse_transactions
+from utils.time_series import DailySeries
+
+
+LINES = [
+    "T001|2024-12-01|P101|Laptop|1|1000|C001|North",
+    "T002|2024-12-03|P102|Mouse|2|100|C002|South",
+    "T003|12/02/2024|P103|Keyboard|1|500|C003|East",
+    "T004|2024-12-03|P104|Monitor|1|300|C004|West",
+    "T005||P105|Webcam|1|9000|C005|North",
+    "T006|12/02/2024|P103|Keyboard|1|500|C006|East",
+]
+
+
+@pytest.mark.parametrize('source', ['dicts', 'table', 'aggregator'])
+def test_unparseable_dates_are_skipped_and_counted(source):
+    transactions = parse_transactions(LINES, columnar=source == 'table')
+    if source == 'aggregator':
+        transactions = aggregate_sales(transactions)
+
+    series = DailySeries.from_transactions(transactions)
+
+    assert series.invalid_dates == {'12/02/2024': 2, '': 1}
+    assert series.invalid_count == 3
+    assert (series.first_date, series.last_date) == (date(2024, 12, 1), date(2024, 12, 3))
+    assert series.total() == 1500.0
+    assert series.transaction_count() == 3
+    assert series.peak_day() == ('2024-12-01', 1000.0, 1)
+
+
+def test_range_queries_and_rolling():
+    series = DailySeries({'2024-12-01': (10.0, 1), '2024-12-04': (5.0, 2), '2024-12-02': (1.0, 1)})
+
+    assert len(series) == 4
+    assert series.total('2024-12-02', '2024-12-04') == 6.0
+    assert series.transaction_count(end='2024-12-02') == 2
+    assert [revenue for _, revenue in series.rolling(2)] == [10.0, 11.0, 1.0, 5.0]
+    assert series.invalid_dates == {}
+
+    with pytest.raises(ValueError):
+        series.total('yesterday')
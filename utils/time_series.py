@@ -0,0 +1,232 @@
+from array import array
+from datetime import date, timedelta
+
+from utils.transaction_table import TransactionTable, bincount
+
+
+class DailySeries:
+    """
+    Date-indexed daily revenue / transaction counts
+
+    Dates are parsed once to ordinal days and stored as dense arrays
+    covering every day from the first to the last date (days without
+    sales are zero), plus prefix sums, so:
+
+    - total / count between any two dates is O(1)
+    - rolling windows are O(n) over the days
+    - weekly and monthly totals are one pass
+    - the peak day is found while building
+
+    Range totals come from prefix-sum differences, so they can differ
+    from a row-by-row sum in the last floating point digits.
+
+    Dates that are not YYYY-MM-DD are left out of the series (and of the
+    peak day) and counted in invalid_dates instead of failing the build.
+    """
+
+    def __init__(self, daily_totals):
+        """
+        daily_totals: {'YYYY-MM-DD' or date: (revenue, transaction_count)};
+        on equal revenue the peak day is the first one in this order
+        """
+
+        parsed = []
+        # unparseable date -> transaction_count
+        self.invalid_dates = {}
+        for day, (revenue, count) in daily_totals.items():
+            try:
+                parsed.append((_to_ordinal(day), day, revenue, count))
+            except ValueError:
+                self.invalid_dates[day] = count
+
+        self.peak = None
+        if not parsed:
+            self.start = 0
+            self.revenue = array('d')
+            self.counts = array('q')
+        else:
+            self.start = min(entry[0] for entry in parsed)
+            span = max(entry[0] for entry in parsed) - self.start + 1
+            self.revenue = array('d', bytes(8 * span))
+            self.counts = array('q', bytes(8 * span))
+
+            peak_revenue = None
+            for ordinal, day, revenue, count in parsed:
+                self.revenue[ordinal - self.start] += revenue
+                self.counts[ordinal - self.start] += count
+                if peak_revenue is None or revenue > peak_revenue:
+                    peak_revenue = revenue
+                    self.peak = (day, revenue, count)
+
+        self.revenue_prefix = _prefix_sums(self.revenue, 'd')
+        self.count_prefix = _prefix_sums(self.counts, 'q')
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        """
+        Builds the series from transaction dictionaries, a TransactionTable
+        or a SalesAggregator (whose per-date totals are reused)
+        """
+
+        daily = getattr(transactions, 'daily', None)
+        if daily is not None:
+            return cls({day: (data[0], data[1]) for day, data in daily.items()})
+
+        if isinstance(transactions, TransactionTable):
+            dates = transactions.dates
+            revenue = bincount(dates.codes, len(dates.values), transactions.amounts)
+            counts = bincount(dates.codes, len(dates.values))
+            return cls({
+                day: (revenue[code], counts[code])
+                for code, day in enumerate(dates.values) if counts[code]
+            })
+
+        totals = {}
+        for tx in transactions:
+            day_totals = totals.get(tx['Date'])
+            if day_totals is None:
+                day_totals = totals[tx['Date']] = [0.0, 0]
+            day_totals[0] += tx['Quantity'] * tx['UnitPrice']
+            day_totals[1] += 1
+        return cls(totals)
+
+    def __len__(self):
+        return len(self.revenue)
+
+    @property
+    def invalid_count(self):
+        """
+        Returns: number of transactions left out for an unparseable date
+        """
+
+        return sum(self.invalid_dates.values())
+
+    @property
+    def first_date(self):
+        return date.fromordinal(self.start) if self.revenue else None
+
+    @property
+    def last_date(self):
+        return date.fromordinal(self.start + len(self.revenue) - 1) if self.revenue else None
+
+    def _bounds(self, start, end):
+        """
+        Clamps an inclusive [start, end] date range to array positions
+
+        Returns: (first, stop) slice bounds, empty if the range misses the data
+        """
+
+        size = len(self.revenue)
+        first = 0 if start is None else _to_ordinal(start) - self.start
+        stop = size if end is None else _to_ordinal(end) - self.start + 1
+        first = min(max(first, 0), size)
+        return first, max(first, min(stop, size))
+
+    def total(self, start=None, end=None):
+        """
+        Returns: revenue between two dates, both inclusive (None = open end)
+        """
+
+        first, stop = self._bounds(start, end)
+        return self.revenue_prefix[stop] - self.revenue_prefix[first]
+
+    def transaction_count(self, start=None, end=None):
+        first, stop = self._bounds(start, end)
+        return self.count_prefix[stop] - self.count_prefix[first]
+
+    def revenue_on(self, day):
+        position = _to_ordinal(day) - self.start
+        return self.revenue[position] if 0 <= position < len(self.revenue) else 0.0
+
+    def daily(self, include_empty=False):
+        """
+        Returns: [(date, revenue, transaction_count)] in date order
+        """
+
+        return [
+            (date.fromordinal(self.start + i), revenue, count)
+            for i, (revenue, count) in enumerate(zip(self.revenue, self.counts))
+            if include_empty or count
+        ]
+
+    def rolling(self, window=7):
+        """
+        Trailing window revenue for every day in the range, where the first
+        window - 1 days cover only the days available
+
+        Returns: [(date, revenue over the window ending on date)]
+        """
+
+        if window < 1:
+            raise ValueError("window must be at least 1 day")
+
+        prefix = self.revenue_prefix
+        return [
+            (date.fromordinal(self.start + i), prefix[i + 1] - prefix[max(0, i + 1 - window)])
+            for i in range(len(self.revenue))
+        ]
+
+    def weekly(self):
+        """
+        Returns: {monday date: (revenue, transaction_count)} per ISO week
+        """
+
+        return self._grouped(lambda day: day - timedelta(days=day.weekday()))
+
+    def monthly(self):
+        """
+        Returns: {'YYYY-MM': (revenue, transaction_count)}
+        """
+
+        return self._grouped(lambda day: f"{day.year:04d}-{day.month:02d}")
+
+    def _grouped(self, key):
+        groups = {}
+        for i, (revenue, count) in enumerate(zip(self.revenue, self.counts)):
+            if not count:
+                continue
+            group = key(date.fromordinal(self.start + i))
+            totals = groups.get(group)
+            if totals is None:
+                groups[group] = (revenue, count)
+            else:
+                groups[group] = (totals[0] + revenue, totals[1] + count)
+        return groups
+
+    def peak_day(self):
+        """
+        Returns: (date, revenue, transaction_count) like find_peak_sales_day,
+        without another scan
+        """
+
+        if self.peak is None:
+            raise ValueError("peak_day() of an empty series")
+
+        return self.peak
+
+
+def _to_ordinal(day):
+    if isinstance(day, date):
+        return day.toordinal()
+    try:
+        return date.fromisoformat(day).toordinal()
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid date '{day}', expected YYYY-MM-DD") from None
+
+
+def _prefix_sums(values, typecode):
+    prefix = array(typecode, [0])
+    running = prefix[0]
+    for value in values:
+        running += value
+        prefix.append(running)
+    return prefix
+
+
+def build_daily_series(transactions):
+    """
+    Returns: DailySeries for transactions (dicts, TransactionTable or a
+    SalesAggregator)
+    """
+
+    return DailySeries.from_transactions(transactions)
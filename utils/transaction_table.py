@@ -0,0 +1,266 @@
+import operator
+from array import array
+
+
+# Range of the int64 Quantity column
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+
+
+class EncodedColumn:
+    """
+    Dictionary-encoded string column
+
+    Each distinct string is stored once in values (in first-seen order)
+    and every row holds an integer code into it
+    """
+
+    def __init__(self):
+        self.codes = array('l')
+        self.values = []
+        self._index = {}
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, row):
+        return self.values[self.codes[row]]
+
+    def __getstate__(self):
+        # The lookup index is rebuilt on load, so pickled chunks stay compact
+        return self.codes, self.values
+
+    def __setstate__(self, state):
+        self.codes, self.values = state
+        self._index = {value: code for code, value in enumerate(self.values)}
+
+    @classmethod
+    def from_values(cls, values):
+        """
+        Encodes a whole list of strings at once
+        """
+
+        column = cls()
+        column.values = list(dict.fromkeys(values))
+        column._index = {value: code for code, value in enumerate(column.values)}
+        column.codes = array('l', map(column._index.__getitem__, values))
+        return column
+
+    def encode(self, value):
+        """
+        Returns the code for value, adding it to the dictionary if new
+        """
+
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def append(self, value):
+        self.codes.append(self.encode(value))
+
+    def code_of(self, value):
+        """
+        Returns the code for value, or None if it never occurs
+        """
+
+        return self._index.get(value)
+
+    def take(self, row_ids):
+        """
+        Builds a new column holding only the given rows, re-encoded so
+        the dictionary stays in first-seen order for the subset
+        """
+
+        column = EncodedColumn()
+        remap = {}
+        codes = self.codes
+        values = self.values
+
+        for row in row_ids:
+            old = codes[row]
+            new = remap.get(old)
+            if new is None:
+                new = remap[old] = column.encode(values[old])
+            column.codes.append(new)
+
+        return column
+
+    def extend(self, other):
+        """
+        Appends every row of another column, translating its codes
+        """
+
+        remap = [self.encode(value) for value in other.values]
+        self.codes.extend(remap[code] for code in other.codes)
+
+
+class TransactionTable:
+    """
+    Compact columnar store for parsed transactions
+
+    Quantity, UnitPrice and the precomputed Amount (Quantity * UnitPrice)
+    live in typed arrays; Date, ProductID, ProductName, CustomerID and
+    Region are dictionary-encoded. Iterating the table yields the same
+    dictionaries parse_transactions returns, so existing code keeps working.
+    """
+
+    def __init__(self):
+        self.transaction_ids = []
+        self.dates = EncodedColumn()
+        self.product_ids = EncodedColumn()
+        self.product_names = EncodedColumn()
+        self.quantities = array('q')
+        self.unit_prices = array('d')
+        self.amounts = array('d')
+        self.customer_ids = EncodedColumn()
+        self.regions = EncodedColumn()
+
+    def __len__(self):
+        return len(self.transaction_ids)
+
+    def __iter__(self):
+        for row in range(len(self.transaction_ids)):
+            yield self.row(row)
+
+    def __getitem__(self, row):
+        """
+        Returns: the row dictionary, or a new TransactionTable for a slice
+        """
+
+        if isinstance(row, slice):
+            return self.take(range(*row.indices(len(self))))
+        return self.row(row)
+
+    def append(self, transaction_id, date, product_id, product_name,
+               quantity, unit_price, customer_id, region):
+        # Typed columns first: a value they cannot hold (e.g. a quantity
+        # beyond int64) raises before any other column has grown
+        amount = quantity * unit_price
+        self.quantities.append(quantity)
+        self.unit_prices.append(unit_price)
+        self.amounts.append(amount)
+        self.transaction_ids.append(transaction_id)
+        self.dates.append(date)
+        self.product_ids.append(product_id)
+        self.product_names.append(product_name)
+        self.customer_ids.append(customer_id)
+        self.regions.append(region)
+
+    def extend(self, other):
+        """
+        Appends every row of another table (e.g. a parsed chunk)
+        """
+
+        self.transaction_ids.extend(other.transaction_ids)
+        self.dates.extend(other.dates)
+        self.product_ids.extend(other.product_ids)
+        self.product_names.extend(other.product_names)
+        self.quantities.extend(other.quantities)
+        self.unit_prices.extend(other.unit_prices)
+        self.amounts.extend(other.amounts)
+        self.customer_ids.extend(other.customer_ids)
+        self.regions.extend(other.regions)
+
+    def take(self, row_ids):
+        """
+        Returns a new table holding only the given rows, in the given order
+        """
+
+        row_ids = list(row_ids)
+        table = TransactionTable()
+
+        ids = self.transaction_ids
+        quantities = self.quantities
+        unit_prices = self.unit_prices
+        amounts = self.amounts
+
+        table.transaction_ids = [ids[row] for row in row_ids]
+        table.dates = self.dates.take(row_ids)
+        table.product_ids = self.product_ids.take(row_ids)
+        table.product_names = self.product_names.take(row_ids)
+        table.quantities = array('q', (quantities[row] for row in row_ids))
+        table.unit_prices = array('d', (unit_prices[row] for row in row_ids))
+        table.amounts = array('d', (amounts[row] for row in row_ids))
+        table.customer_ids = self.customer_ids.take(row_ids)
+        table.regions = self.regions.take(row_ids)
+
+        return table
+
+    def row(self, row):
+        """
+        Returns a single row as a transaction dictionary
+        """
+
+        return {
+            'TransactionID': self.transaction_ids[row],
+            'Date': self.dates[row],
+            'ProductID': self.product_ids[row],
+            'ProductName': self.product_names[row],
+            'Quantity': self.quantities[row],
+            'UnitPrice': self.unit_prices[row],
+            'CustomerID': self.customer_ids[row],
+            'Region': self.regions[row]
+        }
+
+    def to_dicts(self):
+        """
+        Converts the table back to a list of transaction dictionaries
+        """
+
+        return list(self)
+
+    @classmethod
+    def from_dicts(cls, transactions):
+        """
+        Builds a table from transaction dictionaries
+        """
+
+        table = cls()
+        for tx in transactions:
+            table.append(
+                tx['TransactionID'], tx['Date'], tx['ProductID'], tx['ProductName'],
+                tx['Quantity'], tx['UnitPrice'], tx['CustomerID'], tx['Region']
+            )
+        return table
+
+    @classmethod
+    def from_columns(cls, transaction_ids, dates, product_ids, product_names,
+                     quantities, unit_prices, customer_ids, regions):
+        """
+        Builds a table from whole columns (e.g. from a bulk parser)
+        """
+
+        table = cls()
+        table.transaction_ids = list(transaction_ids)
+        table.dates = EncodedColumn.from_values(dates)
+        table.product_ids = EncodedColumn.from_values(product_ids)
+        table.product_names = EncodedColumn.from_values(product_names)
+        table.quantities = array('q', quantities)
+        table.unit_prices = array('d', unit_prices)
+        table.amounts = array('d', map(operator.mul, quantities, unit_prices))
+        table.customer_ids = EncodedColumn.from_values(customer_ids)
+        table.regions = EncodedColumn.from_values(regions)
+        return table
+
+
+def bincount(codes, size, weights=None, zero=0.0):
+    """
+    Group-by sum over integer codes
+
+    Returns: list of length size with the row count per code, or the sum
+    of weights per code when weights are given (summed in row order,
+    starting from zero)
+    """
+
+    if weights is None:
+        counts = [0] * size
+        for code in codes:
+            counts[code] += 1
+        return counts
+
+    totals = [zero] * size
+    for code, weight in zip(codes, weights):
+        totals[code] += weight
+    return totals